@@ -0,0 +1,6 @@
+"""Performance benchmarks for tech-mcp.
+
+Run from projects/tech-mcp, e.g.:
+
+    uv run python -m benchmarks.retrieval --sizes 10000 100000
+"""
@@ -0,0 +1,198 @@
+"""Local stand-in for the Ollama HTTP API.
+
+Implements /api/embed and /api/tags with configurable latency, jitter,
+failure rate and max concurrency, so ingestion can be benchmarked without
+a real Ollama. Embeddings use the hash scheme from benchmarks.synthetic,
+so they match FakeEmbeddingFunction exactly.
+
+Standalone: uv run python -m benchmarks.fake_ollama --port 11434 --latency-ms 40
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import base_vectors, expand
+
+
+@dataclass
+class FakeOllamaConfig:
+    model: str = "nomic-embed-text"
+    # Fixed cost per request plus a per-text cost, like a real model
+    latency_ms: float = 20.0
+    per_text_ms: float = 2.0
+    jitter_ms: float = 5.0
+    failure_rate: float = 0.0
+    # Requests processed at once; the rest queue (OLLAMA_NUM_PARALLEL)
+    max_concurrency: int = 4
+    seed: int = 0
+
+
+@dataclass
+class FakeOllamaStats:
+    requests: int = 0
+    texts: int = 0
+    failures: int = 0
+    max_in_flight: int = 0
+    _in_flight: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "failures": self.failures,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+class FakeOllama:
+    """Threaded HTTP server emulating Ollama. Use as a context manager."""
+
+    def __init__(
+        self,
+        config: FakeOllamaConfig | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config or FakeOllamaConfig()
+        self.stats = FakeOllamaStats()
+        self._slots = threading.BoundedSemaphore(self.config.max_concurrency)
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-ollama", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    # ── Request handling ─────────────────────────────────────────────────
+
+    def _delay(self, n_texts: int) -> float:
+        cfg = self.config
+        with self._rng_lock:
+            jitter = self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        return max(0.0, cfg.latency_ms + cfg.per_text_ms * n_texts + jitter) / 1000
+
+    def _should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.config.failure_rate
+
+    def _embed(self, body: dict) -> tuple[int, dict]:
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        if body.get("model", "").split(":")[0] != self.config.model:
+            return 404, {"error": f"model '{body.get('model')}' not found"}
+
+        with self._slots:
+            stats = self.stats
+            with stats._lock:
+                stats._in_flight += 1
+                stats.max_in_flight = max(stats.max_in_flight, stats._in_flight)
+                stats.requests += 1
+                stats.texts += len(texts)
+            try:
+                time.sleep(self._delay(len(texts)))
+                if self._should_fail():
+                    with stats._lock:
+                        stats.failures += 1
+                    return 500, {"error": "injected failure"}
+                vectors = expand(base_vectors(texts)).tolist() if texts else []
+                return 200, {"model": self.config.model, "embeddings": vectors}
+            finally:
+                with stats._lock:
+                    stats._in_flight -= 1
+
+    def _tags(self) -> dict:
+        return {"models": [{"name": f"{self.config.model}:latest"}]}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                if self.path == "/api/tags":
+                    self._reply(200, fake._tags())
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/embed":
+                    self._reply(*fake._embed(body))
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def _reply(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--per-text-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        model=args.model,
+        latency_ms=args.latency_ms,
+        per_text_ms=args.per_text_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        max_concurrency=args.max_concurrency,
+    )
+    server = FakeOllama(config, host=args.host, port=args.port)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Ingestion throughput against a local fake Ollama server.
+
+Generates repositories of varying size and file mix, then ingests each one
+two ways: in-process through Ingestion.ingest_directory, and end to end
+through scripts/ingest_repo.py. Reports files/s, chunks/s and time per
+stage (walk, read, chunk, embed, write). --hosts starts several fake
+servers and passes them all in OLLAMA_HOST, to measure how ingestion
+scales across an Ollama pool.
+
+Run: uv run python -m benchmarks.ingestion --files 50 500 --mixes code docs
+     uv run python -m benchmarks.ingestion --files 200 --hosts 1 2 4 --no-cli
+"""
+
+import argparse
+import itertools
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from tech_mcp.config import Settings
+from tech_mcp.embeddings import OllamaEmbeddingFunction
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.relationships import RelationshipGraph
+
+from benchmarks.fake_ollama import FakeOllama, FakeOllamaConfig
+from benchmarks.synthetic import generate_repo, peak_rss_bytes, write_results
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "ingest_repo.py"
+_REPO_NAME = "auth-api"
+
+
+def _settings(workdir: Path, ollama_url: str, batch_size: int) -> Settings:
+    return Settings(
+        ollama_host=ollama_url,
+        ollama_embed_model="nomic-embed-text",
+        chroma_persist_dir=str(workdir / "chroma"),
+        relationships_file=str(workdir / "relationships.json"),
+        embed_batch_size=batch_size,
+        log_level="WARNING",
+        port=8091,
+        mcp_host="127.0.0.1",
+    )
+
+
+def _rates(files: int, chunks: int, elapsed: float) -> dict:
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "files_per_s": round(files / elapsed, 2) if elapsed else 0.0,
+        "chunks_per_s": round(chunks / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run_in_process(repo: Path, workdir: Path, url: str, batch_size: int) -> dict:
+    settings = _settings(workdir / "inproc", url, batch_size)
+    graph = RelationshipGraph(settings.relationships_file)
+    embedding_fn = OllamaEmbeddingFunction(
+        host=url, model=settings.ollama_embed_model, batch_size=batch_size
+    )
+    ingestion = Ingestion(settings, graph, embedding_fn)
+    start = time.perf_counter()
+    summary = ingestion.ingest_directory(str(repo), _REPO_NAME)
+    elapsed = time.perf_counter() - start
+    return {
+        "files_ingested": summary["files_ingested"],
+        "chunks": summary["chunks_created"],
+        **_rates(summary["files_ingested"], summary["chunks_created"], elapsed),
+        "stage_s": summary["stage_seconds"],
+    }
+
+
+def run_cli(repo: Path, workdir: Path, url: str, batch_size: int) -> dict:
+    settings = _settings(workdir / "cli", url, batch_size)
+    env = {
+        **os.environ,
+        "OLLAMA_HOST": url,
+        "PORT": "8091",
+        "CHROMA_PERSIST_DIR": settings.chroma_persist_dir,
+        "RELATIONSHIPS_FILE": settings.relationships_file,
+        "EMBED_BATCH_SIZE": str(batch_size),
+        "LOG_LEVEL": "WARNING",
+    }
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(_SCRIPT), str(repo), _REPO_NAME],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    files = int(re.search(r"Files ingested:\s+(\d+)", proc.stdout).group(1))
+    chunks = int(re.search(r"Chunks created:\s+(\d+)", proc.stdout).group(1))
+    # Wall time includes interpreter start, imports and the Ollama check
+    return {"files_ingested": files, "chunks": chunks, **_rates(files, chunks, elapsed)}
+
+
+def _pool_stats(fakes: list[FakeOllama]) -> dict:
+    per_host = [fake.stats.snapshot() for fake in fakes]
+    totals = {
+        key: sum(stats[key] for stats in per_host)
+        for key in ("requests", "texts", "failures")
+    }
+    return {**totals, "per_host_requests": [s["requests"] for s in per_host]}
+
+
+def run_scenario(
+    files: int,
+    mix: str,
+    config: FakeOllamaConfig,
+    batch_size: int,
+    cli: bool = True,
+    seed: int = 0,
+    hosts: int = 1,
+) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix=f"tech-mcp-ingest-{files}-{mix}-"))
+    try:
+        repo = workdir / "repo"
+        repo_info = generate_repo(repo, files, mix, seed)
+        result: dict = {"repo": repo_info, "batch_size": batch_size, "hosts": hosts}
+        with ExitStack() as stack:
+            fakes = [stack.enter_context(FakeOllama(config)) for _ in range(hosts)]
+            url = ",".join(fake.url for fake in fakes)
+            result["in_process"] = run_in_process(repo, workdir, url, batch_size)
+            result["in_process"]["ollama"] = _pool_stats(fakes)
+            if cli:
+                result["cli"] = run_cli(repo, workdir, url, batch_size)
+        result["peak_rss_bytes"] = peak_rss_bytes()
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="+", type=int, default=[50, 500])
+    parser.add_argument("--mixes", nargs="+", default=["code", "docs", "mixed"])
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--per-text-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument(
+        "--hosts", nargs="+", type=int, default=[1], help="Fake Ollama pool sizes"
+    )
+    parser.add_argument("--no-cli", action="store_true", help="Skip the CLI runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark-results/ingestion.json")
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        latency_ms=args.latency_ms,
+        per_text_ms=args.per_text_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        max_concurrency=args.max_concurrency,
+        seed=args.seed,
+    )
+
+    runs = []
+    for files, mix, hosts in itertools.product(args.files, args.mixes, args.hosts):
+        print(f"Ingesting {files} files ({mix}, {hosts} host(s))...", flush=True)
+        result = run_scenario(
+            files, mix, config, args.batch_size, not args.no_cli, args.seed, hosts
+        )
+        inproc = result["in_process"]
+        stages = "  ".join(f"{k} {v:.2f}s" for k, v in inproc["stage_s"].items())
+        print(
+            f"  in-process {inproc['files_per_s']:.1f} files/s  "
+            f"{inproc['chunks_per_s']:.1f} chunks/s  [{stages}]",
+            flush=True,
+        )
+        if "cli" in result:
+            cli = result["cli"]
+            print(
+                f"  cli        {cli['files_per_s']:.1f} files/s  "
+                f"{cli['chunks_per_s']:.1f} chunks/s  "
+                f"({cli['elapsed_s']:.2f}s wall)",
+                flush=True,
+            )
+        runs.append({"files": files, "mix": mix, **result})
+
+    params = {
+        "batch_size": args.batch_size,
+        "fake_ollama": {
+            "latency_ms": config.latency_ms,
+            "per_text_ms": config.per_text_ms,
+            "jitter_ms": config.jitter_ms,
+            "failure_rate": config.failure_rate,
+            "max_concurrency": config.max_concurrency,
+        },
+    }
+    write_results(args.output, "ingestion", runs, params)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Peak-memory profiling for ingestion and maintenance paths.
+
+MemoryProfile combines tracemalloc (Python heap, exact) with RSS sampling
+on a background thread (catches native allocations in Chroma's Rust core
+and numpy that tracemalloc cannot see). tests/test_memory.py runs the
+operations below against budgets; this module's CLI prints the numbers at
+larger sizes.
+
+Run: uv run python -m benchmarks.memory --chunks 100000 --file-mb 8
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from tech_mcp.config import Settings
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.relationships import RelationshipGraph
+from tests.conftest import FakeEmbeddingFunction
+
+from benchmarks.synthetic import build_corpus, current_rss_bytes, random_text
+
+_SAMPLE_INTERVAL = 0.005
+
+
+@dataclass
+class MemoryReport:
+    python_peak_bytes: int
+    rss_peak_delta_bytes: int
+
+    def as_dict(self) -> dict:
+        return {
+            "python_peak_mib": round(self.python_peak_bytes / 2**20, 2),
+            "rss_peak_delta_mib": round(self.rss_peak_delta_bytes / 2**20, 2),
+        }
+
+
+class MemoryProfile:
+    """Context manager measuring peak Python heap and peak RSS growth."""
+
+    def __init__(self) -> None:
+        self.report: MemoryReport | None = None
+        self._stop = threading.Event()
+        self._rss_peak = 0
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "MemoryProfile":
+        self._rss_baseline = current_rss_bytes()
+        self._rss_peak = self._rss_baseline
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self._stop.set()
+        self._thread.join()
+        self._rss_peak = max(self._rss_peak, current_rss_bytes())
+        self.report = MemoryReport(
+            python_peak_bytes=python_peak,
+            rss_peak_delta_bytes=self._rss_peak - self._rss_baseline,
+        )
+
+    def _sample(self) -> None:
+        while not self._stop.wait(_SAMPLE_INTERVAL):
+            self._rss_peak = max(self._rss_peak, current_rss_bytes())
+
+
+def profile(fn: Callable[[], Any]) -> tuple[Any, MemoryReport]:
+    """Run fn under a MemoryProfile. Returns (result, report)."""
+    with MemoryProfile() as prof:
+        result = fn()
+    return result, prof.report
+
+
+# ── Scenarios ────────────────────────────────────────────────────────────────
+
+
+def make_ingestion(workdir: Path) -> Ingestion:
+    settings = Settings(
+        ollama_host="http://fake:11434",
+        ollama_embed_model="nomic-embed-text",
+        chroma_persist_dir=str(workdir / "chroma"),
+        relationships_file=str(workdir / "relationships.json"),
+        embed_batch_size=10,
+        log_level="WARNING",
+        port=8091,
+        mcp_host="127.0.0.1",
+    )
+    graph = RelationshipGraph(settings.relationships_file)
+    return Ingestion(settings, graph, FakeEmbeddingFunction())
+
+
+def write_large_file(path: Path, megabytes: float) -> Path:
+    """Write a markdown file of roughly the given size under many headings."""
+    target = int(megabytes * 2**20)
+    path = path.with_suffix(".md")
+    with path.open("w") as fh:
+        written = section = 0
+        rng = random.Random(0)
+        while written < target:
+            block = f"## Section {section}\n\n" + "\n\n".join(
+                random_text(rng, 80) for _ in range(4)
+            )
+            block += "\n\n"
+            fh.write(block)
+            written += len(block)
+            section += 1
+    return path
+
+
+def run_kb_scenarios(ingestion: Ingestion, chunks: int) -> dict[str, MemoryReport]:
+    """Populate a synthetic KB, then profile the full-scan maintenance paths."""
+    repo_names = sorted(ingestion._graph.list_repos())
+    build_corpus(ingestion.collection, chunks, repo_names)
+    reports = {}
+    _, reports["get_stats"] = profile(ingestion.get_stats)
+    _, reports["list_recent_ingestions"] = profile(ingestion.list_recent_ingestions)
+    _, reports["delete_by_repo"] = profile(lambda: ingestion.delete_by_repo("auth-api"))
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--file-mb", type=float, default=8.0)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="tech-mcp-memory-"))
+    try:
+        ingestion = make_ingestion(workdir)
+        results = {
+            name: report.as_dict()
+            for name, report in run_kb_scenarios(ingestion, args.chunks).items()
+        }
+        big = write_large_file(workdir / "big", args.file_mb)
+        _, report = profile(lambda: ingestion.ingest_file(str(big), "auth-api"))
+        results["ingest_file"] = report.as_dict()
+        print(json.dumps({"chunks": args.chunks, "file_mb": args.file_mb, **results}))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
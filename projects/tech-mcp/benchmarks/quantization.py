@@ -0,0 +1,238 @@
+"""Index memory vs recall for reduced-dimension storage modes.
+
+For each mode (EMBED_DIMENSIONS:RERANK_DTYPE) a KB is built through the
+real storage path (truncated vectors in Chroma, full vectors in the rerank
+sidecar) and searched with Retrieval.search_kb. Recall@k is measured
+against exact full-precision search. Index and sidecar sizes come from
+disk; the HNSW files are what Chroma holds in memory.
+
+Vectors are synthetic by default: clustered, with variance decaying over
+the dimensions like a Matryoshka model, so truncation loses real signal
+(unlike the tiled hash embeddings). Pass --snapshot to measure our own
+corpus from a full-dimension snapshot (scripts/snapshot.py export); a
+held-out sample of its chunks serves as queries.
+
+Run: uv run python -m benchmarks.quantization --chunks 20000
+     uv run python -m benchmarks.quantization --snapshot kb.snap
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from tech_mcp.config import Settings
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.retrieval import Retrieval
+from tech_mcp.snapshot import iter_blocks, read_header
+from tech_mcp.vectors import write_chunks
+
+from benchmarks.synthetic import normalize, percentiles, write_results
+
+_DEFAULT_MODES = [
+    "0:none",
+    "384:none",
+    "256:none",
+    "256:float16",
+    "256:int8",
+    "128:float16",
+    "128:int8",
+]
+_BATCH = 1000
+
+
+class LookupEmbeddingFunction(EmbeddingFunction):
+    """Serves precomputed vectors for the benchmark's doc and query texts."""
+
+    def __init__(self, vectors: dict[str, np.ndarray]) -> None:
+        self._vectors = vectors
+
+    def __call__(self, input: Documents) -> Embeddings:  # noqa: A002
+        return [self._vectors[text] for text in input]
+
+
+@dataclass
+class Dataset:
+    docs: np.ndarray
+    queries: np.ndarray
+    source: str
+
+
+def synthetic_dataset(
+    chunks: int, queries: int, dimensions: int = 768, seed: int = 0
+) -> Dataset:
+    rng = np.random.default_rng(seed)
+    # Leading dimensions carry the most variance, as in Matryoshka models
+    scale = (np.arange(dimensions) + 1.0) ** -0.5
+    centers = rng.standard_normal((max(chunks // 50, 8), dimensions)) * scale
+
+    def sample(n: int) -> np.ndarray:
+        picks = rng.integers(0, len(centers), n)
+        noise = rng.standard_normal((n, dimensions)) * scale * 0.8
+        return (centers[picks] + noise).astype(np.float32)
+
+    return Dataset(sample(chunks), sample(queries), "synthetic")
+
+
+def snapshot_dataset(path: str, queries: int, seed: int = 0) -> Dataset:
+    rows: list[list[float]] = []
+    with Path(path).open("rb") as fh:
+        header = read_header(fh)
+        for block in iter_blocks(fh, header):
+            rows.extend(block["embeddings"])
+    vectors = np.asarray(rows, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    held_out = rng.choice(
+        len(vectors), size=min(queries, len(vectors) // 10), replace=False
+    )
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[held_out] = False
+    return Dataset(vectors[mask], vectors[held_out], f"snapshot:{path}")
+
+
+def _settings(workdir: Path, dimensions: int, dtype: str, candidates: int) -> Settings:
+    return Settings(
+        ollama_host="http://fake:11434",
+        ollama_embed_model="nomic-embed-text",
+        chroma_persist_dir=str(workdir / "chroma"),
+        relationships_file=str(workdir / "relationships.json"),
+        embed_batch_size=10,
+        log_level="WARNING",
+        port=8091,
+        mcp_host="127.0.0.1",
+        query_cache_size=0,
+        slow_query_ms=0,
+        embed_dimensions=dimensions,
+        rerank_dtype=dtype,
+        rerank_candidates=candidates,
+    )
+
+
+def _hnsw_bytes(persist_dir: Path) -> int:
+    # Chroma keeps each HNSW index in a per-segment subdirectory
+    return sum(
+        f.stat().st_size
+        for sub in persist_dir.iterdir()
+        if sub.is_dir()
+        for f in sub.rglob("*")
+        if f.is_file()
+    )
+
+
+def run_mode(
+    dataset: Dataset, dimensions: int, dtype: str, k: int, candidates: int
+) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix=f"tech-mcp-quant-{dimensions}-{dtype}-"))
+    try:
+        settings = _settings(workdir, dimensions, dtype, candidates)
+        graph = RelationshipGraph(settings.relationships_file)
+        lookup = {f"doc {i}": v for i, v in enumerate(dataset.docs)}
+        lookup.update({f"query {j}": v for j, v in enumerate(dataset.queries)})
+        embedding_fn = LookupEmbeddingFunction(lookup)
+        ingestion = Ingestion(settings, graph, embedding_fn)
+        retrieval = Retrieval(settings, graph, embedding_fn)
+
+        start = time.perf_counter()
+        for i in range(0, len(dataset.docs), _BATCH):
+            texts = [f"doc {n}" for n in range(i, min(i + _BATCH, len(dataset.docs)))]
+            write_chunks(
+                ingestion.collection,
+                ingestion.rerank_store,
+                ids=[t.replace(" ", "-") for t in texts],
+                embeddings=embedding_fn(texts),
+                documents=texts,
+                metadatas=[{"repo": "bench", "source": "doc"}] * len(texts),
+            )
+        build_s = time.perf_counter() - start
+
+        exact = normalize(dataset.queries) @ normalize(dataset.docs).T
+        latencies: list[float] = []
+        recalls: list[float] = []
+        retrieval.search_kb("query 0", limit=k)
+        for j in range(len(dataset.queries)):
+            t0 = time.perf_counter()
+            response = retrieval.search_kb(f"query {j}", limit=k)
+            latencies.append(time.perf_counter() - t0)
+            got = {r["id"] for r in json.loads(response)["results"]}
+            top = np.argpartition(-exact[j], k - 1)[:k]
+            recalls.append(len(got & {f"doc-{i}" for i in top}) / k)
+
+        persist = Path(settings.chroma_persist_dir)
+        sidecar = persist / "rerank_vectors.sqlite3"
+        if sidecar.exists():
+            # Fold the WAL back in so the file size reflects the stored vectors
+            with sqlite3.connect(sidecar) as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        stored_dims = dimensions or dataset.docs.shape[1]
+        return {
+            "dimensions": stored_dims,
+            "rerank_dtype": dtype if dimensions else "none",
+            "recall_at_k": round(float(np.mean(recalls)), 4),
+            **percentiles(latencies),
+            "build_s": round(build_s, 2),
+            "vector_bytes": len(dataset.docs) * stored_dims * 4,
+            "hnsw_bytes": _hnsw_bytes(persist),
+            "sidecar_bytes": sidecar.stat().st_size if sidecar.exists() else 0,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--snapshot", help="Full-dimension snapshot to use as corpus")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=_DEFAULT_MODES,
+        help="DIMENSIONS:RERANK_DTYPE pairs; 0 keeps full vectors",
+    )
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark-results/quantization.json")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        dataset = snapshot_dataset(args.snapshot, args.queries, args.seed)
+    else:
+        dataset = synthetic_dataset(args.chunks, args.queries, seed=args.seed)
+    chunks, queries = len(dataset.docs), len(dataset.queries)
+    print(f"{chunks:,} chunks, {queries} queries ({dataset.source})")
+
+    runs = []
+    for mode in args.modes:
+        dims, dtype = mode.split(":")
+        result = run_mode(dataset, int(dims), dtype, args.k, args.candidates)
+        print(
+            f"  {result['dimensions']:>4}d rerank={result['rerank_dtype']:<7}  "
+            f"recall@{args.k} {result['recall_at_k']:.3f}  "
+            f"p50 {result['p50_ms']:.2f}ms  "
+            f"hnsw {result['hnsw_bytes'] / 2**20:.1f}MiB  "
+            f"sidecar {result['sidecar_bytes'] / 2**20:.1f}MiB",
+            flush=True,
+        )
+        runs.append(result)
+
+    params = {
+        "chunks": len(dataset.docs),
+        "queries": len(dataset.queries),
+        "source": dataset.source,
+        "k": args.k,
+        "candidates": args.candidates,
+    }
+    write_results(args.output, "quantization", runs, params)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
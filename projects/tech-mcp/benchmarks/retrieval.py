@@ -0,0 +1,165 @@
+"""Retrieval latency, recall and memory on synthetic knowledge bases.
+
+Builds a KB per size with hash-based embeddings (no Ollama), then measures
+search_kb and search_related latency percentiles, recall@k against exact
+brute-force search, and memory footprint.
+
+Run: uv run python -m benchmarks.retrieval --sizes 10000 100000 500000
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from tech_mcp.config import Settings
+from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.retrieval import Retrieval
+from tests.conftest import FakeEmbeddingFunction
+
+from benchmarks.synthetic import (
+    base_vectors,
+    build_corpus,
+    current_rss_bytes,
+    dir_size_bytes,
+    peak_rss_bytes,
+    percentiles,
+    random_text,
+    write_results,
+)
+
+
+def _settings(workdir: Path) -> Settings:
+    return Settings(
+        ollama_host="http://fake:11434",
+        ollama_embed_model="nomic-embed-text",
+        chroma_persist_dir=str(workdir / "chroma"),
+        relationships_file=str(workdir / "relationships.json"),
+        embed_batch_size=10,
+        log_level="WARNING",
+        port=8091,
+        mcp_host="127.0.0.1",
+        # Every query is distinct, but keep the cache out of the numbers
+        query_cache_size=0,
+        slow_query_ms=0,
+    )
+
+
+def _ids(response: str) -> list[str]:
+    return [r["id"] for r in json.loads(response)["results"]]
+
+
+def run_size(size: int, queries: int, k: int, seed: int) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix=f"tech-mcp-bench-{size}-"))
+    try:
+        settings = _settings(workdir)
+        graph = RelationshipGraph(settings.relationships_file)
+        retrieval = Retrieval(settings, graph, FakeEmbeddingFunction())
+        repo_names = sorted(graph.list_repos())
+
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        corpus = build_corpus(retrieval.collection, size, repo_names, seed=seed)
+        build_s = time.perf_counter() - start
+        rss_after_build = current_rss_bytes()
+
+        rng = random.Random(seed + 1)
+        query_texts = [random_text(rng, words=12) for _ in range(queries)]
+        query_bases = base_vectors(query_texts)
+        related_repo = "auth-api"
+        related_scope = [related_repo, *graph.get_related_repos(related_repo)]
+
+        # First query loads the HNSW segment; keep it out of the percentiles
+        retrieval.search_kb(query_texts[0], limit=k)
+
+        kb_latency: list[float] = []
+        kb_recall: list[float] = []
+        related_latency: list[float] = []
+        related_recall: list[float] = []
+        for text, base in zip(query_texts, query_bases, strict=True):
+            t0 = time.perf_counter()
+            got = _ids(retrieval.search_kb(text, limit=k))
+            kb_latency.append(time.perf_counter() - t0)
+            expected = corpus.exact_top_k(base, k)
+            kb_recall.append(len(set(got) & set(expected)) / len(expected))
+
+            t0 = time.perf_counter()
+            got = _ids(retrieval.search_related(text, related_repo, limit=k))
+            related_latency.append(time.perf_counter() - t0)
+            expected = corpus.exact_top_k(base, k, repos=related_scope)
+            related_recall.append(len(set(got) & set(expected)) / len(expected))
+
+        return {
+            "chunks": size,
+            "queries": queries,
+            "k": k,
+            "build_s": round(build_s, 3),
+            "build_chunks_per_s": round(size / build_s, 1),
+            "search_kb": {
+                **percentiles(kb_latency),
+                "recall_at_k": round(sum(kb_recall) / len(kb_recall), 4),
+            },
+            "search_related": {
+                **percentiles(related_latency),
+                "recall_at_k": round(sum(related_recall) / len(related_recall), 4),
+            },
+            "memory": {
+                "rss_delta_build_bytes": rss_after_build - rss_before,
+                "rss_bytes": current_rss_bytes(),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "persist_dir_bytes": dir_size_bytes(settings.chroma_persist_dir),
+            },
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[10_000, 100_000, 500_000],
+        help="Corpus sizes in chunks",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Queries per size")
+    parser.add_argument("-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        default="benchmark-results/retrieval.json",
+        help="Where to write JSON results",
+    )
+    args = parser.parse_args()
+
+    runs = []
+    for size in args.sizes:
+        print(f"Building {size:,} chunks...", flush=True)
+        result = run_size(size, args.queries, args.k, args.seed)
+        kb, rel = result["search_kb"], result["search_related"]
+        print(
+            f"  search_kb      p50 {kb['p50_ms']:.2f}ms  p95 {kb['p95_ms']:.2f}ms  "
+            f"p99 {kb['p99_ms']:.2f}ms  recall@{args.k} {kb['recall_at_k']:.3f}\n"
+            f"  search_related p50 {rel['p50_ms']:.2f}ms  p95 {rel['p95_ms']:.2f}ms  "
+            f"p99 {rel['p99_ms']:.2f}ms  recall@{args.k} {rel['recall_at_k']:.3f}\n"
+            f"  rss {result['memory']['rss_bytes'] / 2**20:.0f}MiB  "
+            f"disk {result['memory']['persist_dir_bytes'] / 2**20:.0f}MiB",
+            flush=True,
+        )
+        runs.append(result)
+
+    write_results(
+        args.output,
+        "retrieval",
+        runs,
+        {"queries": args.queries, "k": args.k, "seed": args.seed},
+    )
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
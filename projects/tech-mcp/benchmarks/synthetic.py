@@ -0,0 +1,331 @@
+"""Synthetic knowledge bases and measurement helpers shared by benchmarks.
+
+Embeddings follow the FakeEmbeddingFunction scheme from tests/conftest.py:
+each text's SHA-256 digest (32 bytes) is mapped to [-1, 1] and tiled to
+768 dimensions. Tiling scales dot products and norms equally, so cosine
+similarity over the 32-value base vectors equals cosine over the full
+vectors. That lets ground truth for large corpora be computed from a
+compact (n, 32) array instead of holding every 768-dim vector.
+"""
+
+import hashlib
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+DIMENSIONS = 768
+_BASE_DIMENSIONS = 32
+
+_VOCABULARY = (  # noqa: SIM905
+    "auth token session passkey webauthn caddy proxy docker network dns "
+    "container volume compose ollama embedding chroma index query search "
+    "repo ingest chunk metadata collection relationship graph service api "
+    "handler router middleware config yaml toml env variable secret deploy "
+    "build image registry ansible inventory raspberry solar inverter influx "
+    "bucket retention flux dashboard metric latency throughput retry backoff "
+    "timeout error panic log trace span request response status header cookie"
+).split()
+
+_SOURCES = ("doc", "code", "session")
+_SUFFIXES = (".md", ".py", ".go", ".ts", ".yaml")
+
+
+def base_vectors(texts: list[str]) -> np.ndarray:
+    """Return the (n, 32) base vectors for texts (see module docstring)."""
+    digests = b"".join(hashlib.sha256(t.encode()).digest() for t in texts)
+    raw = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), -1)
+    return (raw.astype(np.float32) / 255.0) * 2 - 1
+
+
+def expand(base: np.ndarray) -> np.ndarray:
+    """Tile (n, 32) base vectors to full (n, 768) embeddings."""
+    return np.tile(base, DIMENSIONS // _BASE_DIMENSIONS)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+@dataclass
+class Corpus:
+    """Ids, repos and normalized base vectors of a synthetic KB."""
+
+    ids: list[str]
+    repos: np.ndarray
+    repo_names: list[str]
+    vectors: np.ndarray
+
+    def exact_top_k(
+        self,
+        query_base: np.ndarray,
+        k: int,
+        repos: list[str] | None = None,
+    ) -> list[str]:
+        """Brute-force cosine top-k ids, optionally restricted to repos."""
+        q = normalize(query_base.reshape(1, -1))[0]
+        scores = self.vectors @ q
+        if repos is not None:
+            allowed = np.isin(self.repos, [self.repo_names.index(r) for r in repos])
+            scores = np.where(allowed, scores, -np.inf)
+        k = min(k, int(np.isfinite(scores).sum()))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.ids[i] for i in top]
+
+
+def random_text(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choices(_VOCABULARY, k=words))
+
+
+def iter_chunks(
+    size: int,
+    repo_names: list[str],
+    seed: int = 0,
+) -> Iterator[tuple[str, str, dict]]:
+    """Yield (id, document, metadata) for a deterministic synthetic corpus."""
+    rng = random.Random(seed)
+    for i in range(size):
+        repo = repo_names[i % len(repo_names)]
+        file_no = i // 8
+        suffix = _SUFFIXES[file_no % len(_SUFFIXES)]
+        file_path = f"/src/{repo}/pkg{file_no % 97}/file{file_no}{suffix}"
+        chunk_index = i % 8
+        yield (
+            f"{repo}:{file_path}:{chunk_index}",
+            f"chunk {i} " + random_text(rng),
+            {
+                "source": _SOURCES[i % len(_SOURCES)],
+                "repo": repo,
+                "repo_type": "service",
+                "related_repos": "",
+                "file_path": file_path,
+                "heading_context": "",
+                "modified_at": "2026-01-01T00:00:00+00:00",
+                "ingested_at": "2026-01-01T00:00:00+00:00",
+                "ingest_session_id": f"bench-{file_no}",
+                "chunk_index": chunk_index,
+                "total_chunks": 8,
+                "tags": "",
+                "generated": "false",
+                "mcp_server": "",
+            },
+        )
+
+
+def build_corpus(
+    collection,
+    size: int,
+    repo_names: list[str],
+    batch_size: int = 5000,
+    seed: int = 0,
+) -> Corpus:
+    """Bulk-load a synthetic corpus into collection with precomputed vectors."""
+    ids: list[str] = []
+    repos: list[int] = []
+    bases: list[np.ndarray] = []
+    batch: list[tuple[str, str, dict]] = []
+
+    def flush() -> None:
+        batch_ids = [b[0] for b in batch]
+        docs = [b[1] for b in batch]
+        base = base_vectors(docs)
+        collection.add(
+            ids=batch_ids,
+            embeddings=expand(base),
+            documents=docs,
+            metadatas=[b[2] for b in batch],
+        )
+        ids.extend(batch_ids)
+        repos.extend(repo_names.index(b[2]["repo"]) for b in batch)
+        bases.append(base)
+        batch.clear()
+
+    for item in iter_chunks(size, repo_names, seed):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return Corpus(
+        ids=ids,
+        repos=np.asarray(repos, dtype=np.int16),
+        repo_names=repo_names,
+        vectors=normalize(np.concatenate(bases)),
+    )
+
+
+# ── Synthetic repositories ───────────────────────────────────────────────────
+
+# File-type mixes: suffix → relative weight
+REPO_MIXES: dict[str, dict[str, float]] = {
+    "code": {".py": 4, ".go": 3, ".ts": 2, ".md": 1},
+    "docs": {".md": 6, ".yaml": 3, ".toml": 1},
+    "mixed": {".py": 2, ".go": 2, ".ts": 1, ".md": 3, ".yaml": 2},
+}
+
+
+def _py_source(rng: random.Random, units: int) -> str:
+    parts = ["import os\nimport json\n\n"]
+    for i in range(units):
+        body = "\n".join(
+            f"    # {random_text(rng, 10)}" for _ in range(rng.randint(3, 25))
+        )
+        parts.append(
+            f"def handler_{i}(request):\n"
+            f'    """{random_text(rng, 12)}"""\n{body}\n'
+            f"    return json.dumps({{'status': {i}}})\n\n\n"
+        )
+    return "".join(parts)
+
+
+def _go_source(rng: random.Random, units: int) -> str:
+    parts = ['package main\n\nimport "fmt"\n\n']
+    for i in range(units):
+        body = "\n".join(
+            f"\t// {random_text(rng, 10)}" for _ in range(rng.randint(3, 25))
+        )
+        parts.append(
+            f'func Handler{i}() error {{\n{body}\n\treturn fmt.Errorf("{i}")\n}}\n\n'
+        )
+    return "".join(parts)
+
+
+def _ts_source(rng: random.Random, units: int) -> str:
+    parts = []
+    for i in range(units):
+        body = "\n".join(
+            f"  // {random_text(rng, 10)}" for _ in range(rng.randint(3, 25))
+        )
+        parts.append(
+            f"export function handler{i}(): number {{\n{body}\n  return {i};\n}}\n\n"
+        )
+    return "".join(parts)
+
+
+def _md_source(rng: random.Random, units: int) -> str:
+    parts = [f"# {random_text(rng, 4)}\n\n"]
+    for _ in range(units):
+        paragraphs = "\n\n".join(random_text(rng, 50) for _ in range(rng.randint(1, 6)))
+        parts.append(f"## {random_text(rng, 4)}\n\n{paragraphs}\n\n")
+    return "".join(parts)
+
+
+def _yaml_source(rng: random.Random, units: int) -> str:
+    parts = []
+    for i in range(units):
+        keys = "\n".join(
+            f"  key_{j}: {random_text(rng, 6)}" for j in range(rng.randint(2, 15))
+        )
+        parts.append(f"section_{i}:\n{keys}\n")
+    return "".join(parts)
+
+
+def _toml_source(rng: random.Random, units: int) -> str:
+    parts = []
+    for i in range(units):
+        keys = "\n".join(
+            f'key_{j} = "{random_text(rng, 6)}"' for j in range(rng.randint(2, 15))
+        )
+        parts.append(f"[section_{i}]\n{keys}\n\n")
+    return "".join(parts)
+
+
+_GENERATORS = {
+    ".py": _py_source,
+    ".go": _go_source,
+    ".ts": _ts_source,
+    ".md": _md_source,
+    ".yaml": _yaml_source,
+    ".toml": _toml_source,
+}
+
+
+def generate_repo(root: Path, files: int, mix: str = "mixed", seed: int = 0) -> dict:
+    """Write a synthetic repository under root. Returns file and byte counts.
+
+    File sizes vary from a couple of units to ~60 (a few hundred bytes to
+    tens of KB), and a node_modules directory is added to exercise skipping.
+    """
+    rng = random.Random(seed)
+    weights = REPO_MIXES[mix]
+    suffixes = rng.choices(list(weights), weights=list(weights.values()), k=files)
+    total_bytes = 0
+    for i, suffix in enumerate(suffixes):
+        path = root / f"pkg{i % 17}" / f"sub{i % 5}" / f"file{i}{suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        units = max(2, int(rng.paretovariate(1.5) * 3))
+        content = _GENERATORS[suffix](rng, min(units, 60))
+        path.write_text(content)
+        total_bytes += len(content)
+
+    skipped = root / "node_modules" / "dep"
+    skipped.mkdir(parents=True, exist_ok=True)
+    (skipped / "index.js").write_text("module.exports = {};\n")
+    return {"files": files, "bytes": total_bytes, "mix": mix}
+
+
+# ── Measurement ──────────────────────────────────────────────────────────────
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50/p95/p99 and mean of samples, in milliseconds."""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value, "mean_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc, else peak RSS)."""
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def dir_size_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def write_results(path: str, name: str, runs: list[dict], params: dict) -> None:
+    """Write benchmark results as JSON for comparison across runs."""
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "params": params,
+        "runs": runs,
+    }
+    out.write_text(json.dumps(payload, indent=2) + "\n")
@@ -2,23 +2,59 @@
 """CLI for bulk ingestion of a repository into tech-mcp's knowledge base."""
 
 import argparse
+import logging
 import sys
+import threading
+import time
+from pathlib import Path
 
 from tech_mcp.config import _load_settings
-from tech_mcp.embeddings import OllamaEmbeddingFunction, check_ollama
+from tech_mcp.embeddings import check_ollama
 from tech_mcp.ingestion import Ingestion
+from tech_mcp.manifest import ManifestEntry, ingest_manifest, load_manifest
+from tech_mcp.migration import load_state, open_ingestion
 from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.watch import RepoWatcher
+
+# Seconds between progress lines when stderr is not a terminal
+_PROGRESS_LOG_INTERVAL = 10.0
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Ingest a repository into tech-mcp's knowledge base",
     )
-    parser.add_argument("path", help="Path to the repository directory")
+    parser.add_argument(
+        "path",
+        nargs="?",
+        help="Repository directory, or a tar/zip archive to read without extracting",
+    )
     parser.add_argument(
         "repo_name",
+        nargs="?",
         help="Repository name (must exist in relationships.json)",
     )
+    parser.add_argument(
+        "--manifest",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help="Ingest every repo in a JSON manifest instead of one path "
+        '(default: repos with a "path" in relationships.json)',
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Repos ingested at once with --manifest (default: INGEST_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--ref",
+        default=None,
+        help="Ingest this git branch, tag or commit of the repository "
+        "(via git archive, without a checkout)",
+    )
     parser.add_argument(
         "--related",
         nargs="*",
@@ -31,38 +67,173 @@ def main() -> None:
         default=None,
         help="File extensions to include (e.g. .py .go .md)",
     )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Re-ingest every file instead of resuming an unfinished run",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After ingesting, keep re-ingesting files as they change (Ctrl-C stops)",
+    )
     args = parser.parse_args()
+    if args.manifest is None and not (args.path and args.repo_name):
+        parser.error("path and repo_name are required without --manifest")
+    if args.watch and (args.ref or (args.path and Path(args.path).is_file())):
+        parser.error("--watch needs a directory, not an archive or git ref")
 
     settings = _load_settings()
+    graph = RelationshipGraph(settings.relationships_file)
+    if args.manifest is not None:
+        try:
+            entries = load_manifest(
+                args.manifest or settings.relationships_file,
+                graph,
+                require_path=bool(args.manifest),
+            )
+        except (OSError, ValueError) as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            sys.exit(1)
+        if not entries:
+            print('Error: no repos with a "path" to ingest', file=sys.stderr)
+            sys.exit(1)
+    else:
+        entries = [
+            ManifestEntry(args.repo_name, args.path, args.related, args.extensions)
+        ]
+
+    # Embed with the model the KB was built with, not OLLAMA_EMBED_MODEL
+    model = load_state(settings).model
 
-    if not check_ollama(settings.ollama_host, settings.ollama_embed_model):
+    if not check_ollama(settings.ollama_host, model):
         print(
             f"Error: Ollama not reachable at {settings.ollama_host} "
-            f"or model '{settings.ollama_embed_model}' not available.",
+            f"or model '{model}' not available.",
             file=sys.stderr,
         )
         sys.exit(1)
 
-    embedding_fn = OllamaEmbeddingFunction(
-        host=settings.ollama_host,
-        model=settings.ollama_embed_model,
-        batch_size=settings.embed_batch_size,
-    )
-    graph = RelationshipGraph(settings.relationships_file)
-    ingestion = Ingestion(settings, graph, embedding_fn)
-
-    print(f"Ingesting {args.path} as '{args.repo_name}'...")
-    summary = ingestion.ingest_directory(
-        path=args.path,
-        repo_name=args.repo_name,
-        related_repos=args.related,
-        extensions=args.extensions,
-    )
+    ingestion = open_ingestion(settings, graph)
+
+    resume = not args.no_resume
+    if args.manifest is not None:
+        jobs = args.jobs or settings.ingest_concurrency
+        ok = _ingest_manifest(ingestion, entries, jobs, resume)
+    else:
+        ok = _ingest_one(ingestion, entries[0], resume, args.ref)
+
+    if args.watch:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        watcher = RepoWatcher(
+            ingestion,
+            {entry.repo: Path(entry.path) for entry in entries},
+            debounce_ms=settings.watch_debounce_ms,
+            rate=settings.watch_rate,
+            polling=settings.watch_polling,
+            poll_seconds=settings.watch_poll_seconds,
+            extensions=args.extensions,
+        )
+        watcher.start()
+        print(f"Watching {len(entries)} repo(s) ({watcher.backend}); Ctrl-C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            watcher.stop(timeout=5)
+    if not ok:
+        sys.exit(1)
+
+
+def _ingest_one(
+    ingestion: Ingestion, entry: ManifestEntry, resume: bool, ref: str | None
+) -> bool:
+    at = f" at {ref}" if ref else ""
+    print(f"Ingesting {entry.path}{at} as '{entry.repo}'...")
+    if ref or Path(entry.path).is_file():
+        summary = ingestion.ingest_archive(
+            source=entry.path,
+            repo_name=entry.repo,
+            ref=ref,
+            related_repos=entry.related_repos,
+            extensions=entry.extensions,
+        )
+    else:
+        summary = ingestion.ingest_directory(
+            path=entry.path,
+            repo_name=entry.repo,
+            related_repos=entry.related_repos,
+            extensions=entry.extensions,
+            resume=resume,
+        )
 
     print(f"  Files found:           {summary['files_found']}")
     print(f"  Files ingested:        {summary['files_ingested']}")
+    if summary.get("files_resumed"):
+        print(f"  Files resumed:         {summary['files_resumed']}")
+    if summary["files_failed"]:
+        print(f"  Files failed:          {summary['files_failed']} (rerun to resume)")
+    if summary.get("files_removed"):
+        print(f"  Files removed:         {summary['files_removed']}")
     print(f"  Chunks created:        {summary['chunks_created']}")
-    print(f"  Session ID:            {summary['ingest_session_id']}")
+    skipped = summary["generated_skipped"]
+    if skipped["files"]:
+        reasons = ", ".join(f"{r}: {n}" for r, n in skipped["by_reason"].items())
+        print(
+            f"  Generated skipped:     {skipped['files']} files, "
+            f"{skipped['bytes']:,} bytes, ~{skipped['chunks']} chunks ({reasons})"
+        )
+    if "ingest_session_id" in summary:
+        print(f"  Session ID:            {summary['ingest_session_id']}")
+    print(f"  Elapsed:               {summary['elapsed_seconds']:.2f}s")
+    for stage, seconds in summary["stage_seconds"].items():
+        print(f"    {stage + ':':<20} {seconds:.2f}s")
+    return not summary["files_failed"]
+
+
+def _ingest_manifest(
+    ingestion: Ingestion, entries: list[ManifestEntry], jobs: int, resume: bool
+) -> bool:
+    print(f"Ingesting {len(entries)} repos, {jobs} at a time...")
+    tty = sys.stderr.isatty()
+    last = 0.0
+
+    def show(totals: dict) -> None:
+        nonlocal last
+        now = time.monotonic()
+        finished = totals["repos_done"] == totals["repos_total"]
+        if not finished and now - last < (0.2 if tty else _PROGRESS_LOG_INTERVAL):
+            return
+        last = now
+        line = (
+            f"  {totals['repos_done']}/{totals['repos_total']} repos  "
+            f"{totals['files_done']:,}/{totals['files_found']:,} files  "
+            f"{totals['chunks']:,} chunks  {totals['chunks_per_second']:.1f} chunks/s"
+        )
+        end = "\n" if finished or not tty else ""
+        print(f"\r{line}" if tty else line, end=end, file=sys.stderr, flush=True)
+
+    report = ingest_manifest(ingestion, entries, jobs, resume, progress=show)
+
+    print(f"  {'Repo':<16} {'Files':>7} {'Chunks':>8} {'Seconds':>8} {'Chunks/s':>9}")
+    for repo in report["repos"]:
+        if "error" in repo:
+            print(f"  {repo['repo']:<16} failed: {repo['error']}")
+            continue
+        failed = f"  ({repo['files_failed']} failed)" if repo["files_failed"] else ""
+        print(
+            f"  {repo['repo']:<16} {repo['files_ingested']:>7} "
+            f"{repo['chunks_created']:>8} {repo['elapsed_seconds']:>8.2f} "
+            f"{repo['chunks_per_second']:>9.1f}{failed}"
+        )
+    print(f"  Files ingested:        {report['files_ingested']}")
+    print(f"  Chunks created:        {report['chunks_created']}")
+    print(f"  Embeddings reused:     {report['embeddings_reused']}")
+    print(f"  Elapsed:               {report['elapsed_seconds']:.2f}s")
+    print(
+        f"  Throughput:            {report['files_per_second']:.1f} files/s, "
+        f"{report['chunks_per_second']:.1f} chunks/s"
+    )
+    return not (report["repos_failed"] or report["files_failed"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""CLI for bulk ingestion of debugging sessions from JSONL."""
+
+import argparse
+import json
+import sys
+
+from tech_mcp.config import _load_settings
+from tech_mcp.embeddings import check_ollama
+from tech_mcp.migration import load_state, open_ingestion
+from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.sessions import parse_sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingest debugging sessions (one JSON object per line)",
+    )
+    parser.add_argument("path", help="JSONL file of sessions, or - for stdin")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only validate the sessions; ingest nothing",
+    )
+    args = parser.parse_args()
+
+    settings = _load_settings()
+    graph = RelationshipGraph(settings.relationships_file)
+
+    # Validate everything before touching Ollama or Chroma
+    try:
+        if args.path == "-":
+            sessions = parse_sessions(sys.stdin, graph)
+        else:
+            with open(args.path) as fh:
+                sessions = parse_sessions(fh, graph)
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+    if args.check:
+        print(f"{len(sessions)} sessions OK")
+        return
+
+    # Embed with the model the KB was built with, not OLLAMA_EMBED_MODEL
+    model = load_state(settings).model
+
+    if not check_ollama(settings.ollama_host, model):
+        print(
+            f"Error: Ollama not reachable at {settings.ollama_host} "
+            f"or model '{model}' not available.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    ingestion = open_ingestion(settings, graph)
+    summary = ingestion.ingest_sessions(sessions)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""CLI for exporting and importing tech-mcp knowledge-base snapshots."""
+
+import argparse
+import json
+
+from tech_mcp.config import _load_settings
+from tech_mcp.migration import load_state, open_ingestion
+from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.snapshot import export_snapshot, import_snapshot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export or import a tech-mcp knowledge-base snapshot",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write chunks and embeddings to a file")
+    export.add_argument("path", help="Snapshot file to write")
+    export.add_argument("--repos", nargs="*", default=None, help="Repos to export")
+    export.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Store blocks uncompressed",
+    )
+
+    restore = sub.add_parser("import", help="Load a snapshot without re-embedding")
+    restore.add_argument("path", help="Snapshot file to read")
+    restore.add_argument("--repos", nargs="*", default=None, help="Repos to import")
+    restore.add_argument(
+        "--force",
+        action="store_true",
+        help="Import even if the embedding model differs",
+    )
+    args = parser.parse_args()
+
+    settings = _load_settings()
+    model = load_state(settings).model
+    # Snapshots carry their embeddings. Ollama is only called to fill the
+    # other collection of a migration that is running or not yet finalized
+    graph = RelationshipGraph(settings.relationships_file)
+    ingestion = open_ingestion(settings, graph)
+    collection = ingestion.collection
+
+    if args.command == "export":
+        summary = export_snapshot(
+            collection,
+            ingestion.rerank_store,
+            args.path,
+            model,
+            args.repos,
+            compress=not args.no_compress,
+            symbols=ingestion.symbols,
+        )
+    else:
+        summary = import_snapshot(
+            ingestion, args.path, model, args.repos, force=args.force
+        )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
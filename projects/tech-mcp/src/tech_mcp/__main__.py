@@ -4,6 +4,8 @@ from tech_mcp.server import mcp
 
 
 def main() -> None:
+    # The Ollama check and warmup start from the transport's lifespan, in
+    # the background (warn, don't crash, and don't hold up the transport).
     mcp.run(transport=os.environ.get("MCP_TRANSPORT", "stdio"))
 
 
@@ -0,0 +1,132 @@
+"""Read files out of tar/zip archives and git refs without extracting them.
+
+Each source yields ArchiveMember objects one at a time. A member's bytes
+are only read if read() is called, and must be read before the next member
+is requested: tar and `git archive` output are consumed as a stream, so
+earlier members cannot be revisited.
+"""
+
+import subprocess
+import tarfile
+import zipfile
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    path: str
+    size: int
+    mtime: float
+    read: Callable[[], bytes]
+
+
+def iter_tar(source: str | IO[bytes]) -> Iterator[ArchiveMember]:
+    """Regular files in a tar archive (any compression), in archive order."""
+    target = {"name": source} if isinstance(source, str) else {"fileobj": source}
+    with tarfile.open(mode="r|*", **target) as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            yield ArchiveMember(
+                path=info.name.removeprefix("./"),
+                size=info.size,
+                mtime=float(info.mtime),
+                read=_tar_reader(tar, info),
+            )
+
+
+def iter_zip(path: str) -> Iterator[ArchiveMember]:
+    """Regular files in a zip archive."""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            yield ArchiveMember(
+                path=info.filename,
+                size=info.file_size,
+                mtime=_zip_mtime(info),
+                read=lambda info=info: archive.read(info),
+            )
+
+
+def resolve_commit(repo_dir: str, ref: str) -> str:
+    """The commit a ref points to in a git repository."""
+    if ref.startswith("-"):
+        msg = f"Invalid git ref '{ref}'"
+        raise ValueError(msg)
+    result = subprocess.run(
+        [
+            "git",
+            "-C",
+            repo_dir,
+            "rev-parse",
+            "--verify",
+            "--quiet",
+            f"{ref}^{{commit}}",
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        msg = f"Unknown git ref '{ref}' in {repo_dir}"
+        raise ValueError(msg)
+    return result.stdout.strip()
+
+
+def iter_git(repo_dir: str, commit: str) -> Iterator[ArchiveMember]:
+    """Files of a commit, streamed from `git archive` without a checkout."""
+    proc = subprocess.Popen(
+        ["git", "-C", repo_dir, "archive", "--format=tar", commit],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    completed = False
+    try:
+        yield from iter_tar(proc.stdout)
+        completed = True
+    finally:
+        # The consumer may stop early; don't leave git blocked on the pipe
+        if not completed:
+            proc.kill()
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode(errors="replace")
+        proc.stderr.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        msg = f"git archive {commit} failed: {stderr.strip()}"
+        raise RuntimeError(msg)
+
+
+def open_source(source: str, ref: str | None = None) -> Iterator[ArchiveMember]:
+    """Members of a git repo at ref, or of a .zip or tar archive."""
+    if Path(source).is_dir():
+        if not ref:
+            msg = f"{source} is a directory; pass a git ref or use ingest_directory"
+            raise ValueError(msg)
+        return iter_git(source, resolve_commit(source, ref))
+    if not Path(source).is_file():
+        msg = f"Archive not found: {source}"
+        raise FileNotFoundError(msg)
+    if zipfile.is_zipfile(source):
+        return iter_zip(source)
+    if not tarfile.is_tarfile(source):
+        msg = f"{source} is not a tar or zip archive"
+        raise ValueError(msg)
+    return iter_tar(source)
+
+
+def _tar_reader(tar: tarfile.TarFile, info: tarfile.TarInfo) -> Callable[[], bytes]:
+    def read() -> bytes:
+        fh = tar.extractfile(info)
+        return fh.read() if fh is not None else b""
+
+    return read
+
+
+def _zip_mtime(info: zipfile.ZipInfo) -> float:
+    return datetime(*info.date_time).timestamp()
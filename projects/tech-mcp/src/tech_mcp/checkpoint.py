@@ -0,0 +1,119 @@
+"""Durable progress records for ingest_directory, so a run can resume.
+
+Each run over a (repo, directory) pair appends one JSON line per finished
+file to checkpoints/<repo>-<hash>.jsonl in the persist dir, fsynced so it
+survives the process (or the machine) dying. A run that finishes without
+failed files removes the checkpoint. Otherwise the next run for the same
+directory skips the files it lists, as long as their size and mtime have
+not changed, and retries the rest.
+
+The file that was in progress needs no record of its own: chunks are
+upserted before stale ones are deleted, and a chunk whose stored text is
+unchanged keeps its stored embedding, so redoing that file re-embeds only
+the batches that never reached Chroma.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TextIO
+
+logger = logging.getLogger(__name__)
+
+_CHECKPOINT_DIR = "checkpoints"
+
+
+class IngestCheckpoint:
+    """Finished files of one ingest_directory run, in an append-only file."""
+
+    def __init__(self, persist_dir: str, repo_name: str, root: Path) -> None:
+        self._root = root.absolute()
+        digest = hashlib.sha1(str(self._root).encode()).hexdigest()[:12]
+        self.path = Path(persist_dir) / _CHECKPOINT_DIR / f"{repo_name}-{digest}.jsonl"
+        self._repo = repo_name
+        self._done: dict[str, tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._fh: TextIO | None = None
+
+    def start(self, resume: bool = True) -> int:
+        """Open the checkpoint; returns how many files an earlier run finished.
+
+        Without resume, or with no earlier checkpoint, a new one is begun.
+        """
+        if resume and self.path.exists():
+            self._done, torn = self._load()
+            self._fh = self.path.open("a")
+            if torn:
+                self._fh.write("\n")
+            if self._done:
+                logger.info(
+                    "Resuming ingest of %s: %d files already done",
+                    self._root,
+                    len(self._done),
+                )
+            return len(self._done)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._done = {}
+        self._fh = self.path.open("w")
+        self._append(
+            {
+                "repo": self._repo,
+                "path": str(self._root),
+                "started_at": datetime.now(UTC).isoformat(),
+            }
+        )
+        return 0
+
+    def is_done(self, file_path: Path) -> bool:
+        """Whether an earlier run finished this file and it is unchanged."""
+        done = self._done.get(self._key(file_path))
+        return done is not None and done == _stat(file_path)
+
+    def mark_done(self, file_path: Path) -> None:
+        mtime_ns, size = _stat(file_path)
+        self._append({"file": self._key(file_path), "mtime_ns": mtime_ns, "size": size})
+
+    def finish(self, complete: bool) -> None:
+        """Close the checkpoint, deleting it when every file succeeded."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+        if complete:
+            self.path.unlink(missing_ok=True)
+
+    def _append(self, record: dict) -> None:
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(line)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def _load(self) -> tuple[dict[str, tuple[int, int]], bool]:
+        """Finished files, and whether the last line was cut short."""
+        done = {}
+        line = "\n"
+        with self.path.open() as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line is cut short if the process died mid-write
+                    continue
+                if "file" in record:
+                    done[record["file"]] = (record["mtime_ns"], record["size"])
+        return done, not line.endswith("\n")
+
+    def _key(self, file_path: Path) -> str:
+        return file_path.absolute().relative_to(self._root).as_posix()
+
+
+def _stat(file_path: Path) -> tuple[int, int]:
+    stat = file_path.stat()
+    return stat.st_mtime_ns, stat.st_size
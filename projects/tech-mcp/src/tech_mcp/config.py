@@ -12,6 +12,30 @@ class Settings:
     log_level: str
     port: int
     mcp_host: str
+    search_concurrency: int = 8
+    ingest_concurrency: int = 2
+    maintenance_concurrency: int = 2
+    warmup_enabled: bool = True
+    ollama_keep_alive: str = ""
+    query_cache_size: int = 256
+    slow_query_ms: float = 1000.0
+    slow_query_log: str = "./data/slow_queries.log"
+    migration_rate: float = 20.0
+    embed_dimensions: int = 0
+    rerank_dtype: str = "float16"
+    rerank_candidates: int = 4
+    generated_files: str = "skip"
+    dedup_threshold: float = 0.9
+    stream_ingest_kb: int = 1024
+    watch_enabled: bool = False
+    watch_debounce_ms: int = 2000
+    watch_rate: float = 20.0
+    watch_polling: bool = False
+    watch_poll_seconds: float = 2.0
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() in {"1", "true", "yes"}
 
 
 def _load_settings() -> Settings:
@@ -36,4 +60,24 @@ def _load_settings() -> Settings:
         log_level=os.environ.get("LOG_LEVEL", "INFO"),
         port=int(port_str),
         mcp_host=os.environ.get("MCP_HOST", "0.0.0.0"),
+        search_concurrency=int(os.environ.get("SEARCH_CONCURRENCY", "8")),
+        ingest_concurrency=int(os.environ.get("INGEST_CONCURRENCY", "2")),
+        maintenance_concurrency=int(os.environ.get("MAINTENANCE_CONCURRENCY", "2")),
+        warmup_enabled=_env_bool("WARMUP_ENABLED", "true"),
+        ollama_keep_alive=os.environ.get("OLLAMA_KEEP_ALIVE", ""),
+        query_cache_size=int(os.environ.get("QUERY_CACHE_SIZE", "256")),
+        slow_query_ms=float(os.environ.get("SLOW_QUERY_MS", "1000")),
+        slow_query_log=os.environ.get("SLOW_QUERY_LOG", "./data/slow_queries.log"),
+        migration_rate=float(os.environ.get("MIGRATION_RATE", "20")),
+        embed_dimensions=int(os.environ.get("EMBED_DIMENSIONS", "0")),
+        rerank_dtype=os.environ.get("RERANK_DTYPE", "float16").strip().lower(),
+        rerank_candidates=int(os.environ.get("RERANK_CANDIDATES", "4")),
+        generated_files=os.environ.get("GENERATED_FILES", "skip").strip().lower(),
+        dedup_threshold=float(os.environ.get("DEDUP_THRESHOLD", "0.9")),
+        stream_ingest_kb=int(os.environ.get("STREAM_INGEST_KB", "1024")),
+        watch_enabled=_env_bool("WATCH_ENABLED", "false"),
+        watch_debounce_ms=int(os.environ.get("WATCH_DEBOUNCE_MS", "2000")),
+        watch_rate=float(os.environ.get("WATCH_RATE", "20")),
+        watch_polling=_env_bool("WATCH_POLLING", "false"),
+        watch_poll_seconds=float(os.environ.get("WATCH_POLL_SECONDS", "2")),
     )
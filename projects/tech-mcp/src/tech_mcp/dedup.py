@@ -0,0 +1,167 @@
+"""Near-duplicate chunk detection with MinHash.
+
+LICENSE files, Dockerfiles, CI configs and copied boilerplate recur almost
+verbatim across repos. Each chunk gets a MinHash signature over its word
+3-shingles at ingest time. Signatures are bucketed by LSH bands in a SQLite
+sidecar (minhash.sqlite3) next to Chroma's data. A new chunk whose
+estimated Jaccard similarity to a stored one reaches DEDUP_THRESHOLD reuses
+that chunk's embedding instead of calling Ollama, and is linked to it
+through the "duplicate_of" metadata key. search_kb(collapse_duplicates=True)
+folds linked hits into one result.
+
+Signatures depend only on the text, so the index is keyed by chunk id and
+shared by every collection (it survives embedding migrations).
+"""
+
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+_SIDECAR_FILE = "minhash.sqlite3"
+_SHINGLE = 3
+_NUM_PERM = 128
+# 16 bands of 8 rows: pairs at Jaccard 0.8 share a band ~95% of the time,
+# pairs at 0.5 only ~6%, so few candidates need checking
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_MAX_CANDIDATES = 50
+_SQL_BATCH = 500
+
+_PRIME = (1 << 32) - 5
+# a < 2**31 keeps a * hash + b inside uint64
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 1 << 31, _NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, _NUM_PERM, dtype=np.uint64)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def signature(text: str) -> bytes | None:
+    """MinHash signature of text, or None if it has no words."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    span = min(_SHINGLE, len(tokens))
+    shingles = {" ".join(tokens[i : i + span]) for i in range(len(tokens) - span + 1)}
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)
+    )
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype("<u4").tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.frombuffer(a, "<u4") == np.frombuffer(b, "<u4")))
+
+
+def _band_keys(sig: bytes) -> list[int]:
+    width = _ROWS * 4
+    return [
+        (band << 32) | zlib.crc32(sig[band * width : (band + 1) * width])
+        for band in range(_BANDS)
+    ]
+
+
+class SignatureIndex:
+    """MinHash signatures and LSH buckets, in SQLite next to Chroma's data.
+
+    Like RerankStore, the database is created on the first write.
+    """
+
+    def __init__(self, persist_dir: str) -> None:
+        self._path = Path(persist_dir) / _SIDECAR_FILE
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def put(self, ids: Sequence[str], signatures: Sequence[bytes | None]) -> None:
+        """Replace the signatures of ids; None leaves a chunk without one."""
+        pairs = zip(ids, signatures, strict=True)
+        rows = [(id_, sig) for id_, sig in pairs if sig is not None]
+        with self._lock:
+            conn = self._connect(create=bool(rows))
+            if conn is None:
+                return
+            with conn:
+                self._delete(conn, ids)
+                conn.executemany("INSERT INTO signatures VALUES (?, ?)", rows)
+                conn.executemany(
+                    "INSERT INTO bands VALUES (?, ?)",
+                    [(key, id_) for id_, sig in rows for key in _band_keys(sig)],
+                )
+
+    def find(
+        self, sig: bytes, threshold: float, exclude_prefix: str | None = None
+    ) -> tuple[str, float] | None:
+        """Most similar stored chunk at or above threshold, as (id, similarity).
+
+        Chunks whose id starts with exclude_prefix are not considered.
+        """
+        keys = _band_keys(sig)
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return None
+            marks = ",".join("?" * len(keys))
+            hits = Counter(
+                id_
+                for (id_,) in conn.execute(
+                    f"SELECT id FROM bands WHERE key IN ({marks})", keys
+                )
+                if not exclude_prefix or not id_.startswith(exclude_prefix)
+            )
+            # Sharing more bands means more similar; check the likeliest first
+            candidates = [id_ for id_, _ in hits.most_common(_MAX_CANDIDATES)]
+            if not candidates:
+                return None
+            marks = ",".join("?" * len(candidates))
+            stored = conn.execute(
+                f"SELECT id, signature FROM signatures WHERE id IN ({marks})",
+                candidates,
+            ).fetchall()
+        scored = [(id_, similarity(sig, other)) for id_, other in stored]
+        best = max(scored, key=lambda pair: pair[1], default=None)
+        if best is None or best[1] < threshold:
+            return None
+        return best
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                self._delete(conn, ids)
+
+    def _delete(self, conn: sqlite3.Connection, ids: Sequence[str]) -> None:
+        for i in range(0, len(ids), _SQL_BATCH):
+            batch = list(ids[i : i + _SQL_BATCH])
+            marks = ",".join("?" * len(batch))
+            conn.execute(f"DELETE FROM signatures WHERE id IN ({marks})", batch)
+            conn.execute(f"DELETE FROM bands WHERE id IN ({marks})", batch)
+
+    def _connect(self, create: bool) -> sqlite3.Connection | None:
+        if self._conn is None:
+            if not create and not self._path.exists():
+                return None
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures "
+                "(id TEXT PRIMARY KEY, signature BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands "
+                "(key INTEGER NOT NULL, id TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_key ON bands (key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_id ON bands (id)")
+            self._conn = conn
+        return self._conn
@@ -1,79 +1,302 @@
 import logging
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 
 import httpx
 from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 
+from tech_mcp import metrics
+
 logger = logging.getLogger(__name__)
 
 _MAX_RETRIES = 3
 _INITIAL_BACKOFF = 1.0
+# A failed host sits out for this long, doubling per consecutive failure
+_EJECT_SECONDS = 5.0
+_MAX_EJECT_SECONDS = 120.0
+_HEALTH_TIMEOUT = 2.0
+
+
+def parse_hosts(value: str) -> list[str]:
+    """Split a comma-separated OLLAMA_HOST into base URLs."""
+    hosts = [h.strip().rstrip("/") for h in value.split(",")]
+    return [h for h in hosts if h]
+
+
+@dataclass
+class _Host:
+    url: str
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    up: bool = True
+
+
+class HostPool:
+    """Ollama endpoints, picked by least outstanding requests.
+
+    A host that fails a request is ejected for _EJECT_SECONDS, doubling
+    with each consecutive failure. Once that expires a timer thread runs a
+    health check, and the host gets traffic again only if it passes, so
+    callers never wait on a probe. A single host is never ejected, and
+    when every host is ejected the pool still hands one out, so a flapping
+    cluster degrades to retries instead of refusing work.
+    """
+
+    def __init__(self, hosts: list[str], health_check: Callable[[str], bool]) -> None:
+        if not hosts:
+            msg = "At least one Ollama host is required"
+            raise ValueError(msg)
+        self._hosts = [_Host(url) for url in hosts]
+        self._health_check = health_check
+        self._lock = threading.Lock()
+        for host in self._hosts:
+            metrics.EMBED_HOST_UP.set(1, host=host.url)
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def acquire(self, exclude: set[str] | frozenset[str] = frozenset()) -> _Host:
+        """Reserve the least busy healthy host not in exclude."""
+        with self._lock:
+            allowed = [h for h in self._hosts if h.url not in exclude] or self._hosts
+            healthy = [h for h in allowed if h.up]
+            host = min(healthy or allowed, key=lambda h: (h.in_flight, h.requests))
+            host.in_flight += 1
+            host.requests += 1
+            return host
+
+    def release(self, host: _Host, ok: bool) -> None:
+        with self._lock:
+            host.in_flight -= 1
+            if ok:
+                host.failures = 0
+                return
+            host.failures += 1
+            # An ejected host already has a probe scheduled
+            if len(self._hosts) > 1 and host.up:
+                self._eject(host)
+
+    def status(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "host": h.url,
+                    "healthy": h.up,
+                    "in_flight": h.in_flight,
+                    "requests": h.requests,
+                }
+                for h in self._hosts
+            ]
+
+    def _eject(self, host: _Host) -> None:
+        seconds = min(_EJECT_SECONDS * 2 ** (host.failures - 1), _MAX_EJECT_SECONDS)
+        host.up = False
+        probe = threading.Timer(seconds, self._probe, args=(host,))
+        probe.daemon = True
+        probe.start()
+        metrics.EMBED_HOST_EJECTIONS.inc(host=host.url)
+        metrics.EMBED_HOST_UP.set(0, host=host.url)
+        logger.warning("Ejected Ollama host %s for %.0fs", host.url, seconds)
+
+    def _probe(self, host: _Host) -> None:
+        # Runs on the timer thread, outside the lock
+        ok = self._health_check(host.url)
+        with self._lock:
+            if ok:
+                host.up = True
+                metrics.EMBED_HOST_UP.set(1, host=host.url)
+                logger.info("Ollama host %s is back", host.url)
+            else:
+                host.failures += 1
+                self._eject(host)
 
 
 class OllamaEmbeddingFunction(EmbeddingFunction):
-    """ChromaDB-compatible embedding function backed by Ollama."""
+    """ChromaDB-compatible embedding function backed by Ollama.
+
+    host may list several endpoints separated by commas. Batches are then
+    spread over them and embedded concurrently, one per host at a time.
+    Duplicate texts, within a call or across concurrent calls, are sent
+    to Ollama once.
+    """
 
-    def __init__(self, host: str, model: str, batch_size: int = 10) -> None:
-        self._host = host.rstrip("/")
+    def __init__(
+        self,
+        host: str,
+        model: str,
+        batch_size: int = 10,
+        keep_alive: str = "",
+    ) -> None:
         self._model = model
         self._batch_size = batch_size
+        self._keep_alive = keep_alive
         self._client = httpx.Client(timeout=120.0)
+        self._pool = HostPool(parse_hosts(host), self._is_healthy)
+        self._in_flight: dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def parallelism(self) -> int:
+        """Batches worth embedding at once: one per host."""
+        return len(self._pool)
+
+    def host_status(self) -> list[dict]:
+        return self._pool.status()
 
     def __call__(self, input: Documents) -> Embeddings:  # noqa: A002
-        all_embeddings: Embeddings = []
-        for i in range(0, len(input), self._batch_size):
-            batch = input[i : i + self._batch_size]
-            embeddings = self._embed_with_retry(batch)
-            all_embeddings.extend(embeddings)
-        return all_embeddings
+        # Single-flight: each distinct text is embedded once, and a text
+        # another caller is already embedding is waited on, not re-sent.
+        # Claimed texts are embedded before waiting on anyone else's, so
+        # two callers waiting on each other cannot deadlock.
+        unique = list(dict.fromkeys(input))
+        if len(unique) < len(input):
+            metrics.EMBED_COALESCED.inc(len(input) - len(unique), kind="batch")
+        owned: dict[str, Future] = {}
+        waiting: dict[str, Future] = {}
+        with self._in_flight_lock:
+            for text in unique:
+                if text in self._in_flight:
+                    waiting[text] = self._in_flight[text]
+                else:
+                    owned[text] = self._in_flight[text] = Future()
+        if waiting:
+            metrics.EMBED_COALESCED.inc(len(waiting), kind="in_flight")
+
+        try:
+            vectors = self._embed_batches(list(owned))
+        except BaseException as exc:
+            self._settle(owned, exc=exc)
+            raise
+        self._settle(owned, vectors=vectors)
+
+        by_text = dict(zip(owned, vectors, strict=True))
+        for text, future in waiting.items():
+            by_text[text] = future.result()
+        return [by_text[text] for text in input]
+
+    def _settle(
+        self,
+        futures: dict[str, Future],
+        vectors: list | None = None,
+        exc: BaseException | None = None,
+    ) -> None:
+        with self._in_flight_lock:
+            for text in futures:
+                del self._in_flight[text]
+        for i, future in enumerate(futures.values()):
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(vectors[i])
+
+    def _embed_batches(self, texts: list[str]) -> list[list[float]]:
+        batches = [
+            texts[i : i + self._batch_size]
+            for i in range(0, len(texts), self._batch_size)
+        ]
+        workers = min(self.parallelism, len(batches))
+        if workers <= 1:
+            results = [self._embed_with_retry(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._embed_with_retry, batches))
+        return [vector for embeddings in results for vector in embeddings]
 
     def _embed_with_retry(self, texts: list[str]) -> list[list[float]]:
+        metrics.EMBED_BATCH_SIZE.observe(len(texts))
         last_error: Exception | None = None
-        for attempt in range(_MAX_RETRIES):
+        # Every host gets a try before the backoff between rounds kicks in
+        attempts = _MAX_RETRIES + len(self._pool) - 1
+        tried: set[str] = set()
+        rounds = 0
+        for attempt in range(attempts):
+            host = self._pool.acquire(exclude=tried)
             try:
                 start = time.monotonic()
-                response = self._client.post(
-                    f"{self._host}/api/embed",
-                    json={"model": self._model, "input": texts},
-                )
+                payload: dict = {"model": self._model, "input": texts}
+                if self._keep_alive:
+                    payload["keep_alive"] = self._keep_alive
+                response = self._client.post(f"{host.url}/api/embed", json=payload)
                 response.raise_for_status()
-                elapsed = time.monotonic() - start
-                logger.debug("Embedded %d texts in %.2fs", len(texts), elapsed)
-                return response.json()["embeddings"]
+                embeddings = response.json()["embeddings"]
             except (httpx.HTTPError, KeyError) as exc:
+                self._pool.release(host, ok=False)
                 last_error = exc
-                if attempt < _MAX_RETRIES - 1:
-                    backoff = _INITIAL_BACKOFF * (2**attempt)
+                metrics.EMBED_REQUESTS.inc(outcome="error")
+                if attempt == attempts - 1:
+                    break
+                metrics.EMBED_RETRIES.inc()
+                tried.add(host.url)
+                if len(tried) < len(self._pool):
                     logger.warning(
-                        "Ollama embed attempt %d failed: %s (retrying in %.1fs)",
-                        attempt + 1,
+                        "Ollama embed on %s failed: %s (trying another host)",
+                        host.url,
                         exc,
-                        backoff,
                     )
-                    time.sleep(backoff)
+                    continue
+                tried.clear()
+                backoff = _INITIAL_BACKOFF * (2**rounds)
+                rounds += 1
+                logger.warning(
+                    "Ollama embed attempt %d failed: %s (retrying in %.1fs)",
+                    attempt + 1,
+                    exc,
+                    backoff,
+                )
+                time.sleep(backoff)
+            else:
+                self._pool.release(host, ok=True)
+                elapsed = time.monotonic() - start
+                logger.debug(
+                    "Embedded %d texts on %s in %.2fs", len(texts), host.url, elapsed
+                )
+                metrics.EMBED_REQUESTS.inc(outcome="ok")
+                metrics.EMBED_SECONDS.observe(elapsed)
+                return embeddings
 
+        metrics.EMBED_FAILURES.inc()
         msg = (
-            f"Ollama embedding failed after {_MAX_RETRIES} attempts. "
-            f"Host: {self._host}, Model: {self._model}. "
-            f"Last error: {last_error}"
+            f"Ollama embedding failed after {attempts} attempts. "
+            f"Hosts: {', '.join(h['host'] for h in self._pool.status())}, "
+            f"Model: {self._model}. Last error: {last_error}"
         )
         raise RuntimeError(msg)
 
+    def _is_healthy(self, url: str) -> bool:
+        try:
+            response = self._client.get(f"{url}/api/tags", timeout=_HEALTH_TIMEOUT)
+            return response.is_success
+        except httpx.HTTPError:
+            return False
+
 
 def check_ollama(host: str, model: str) -> bool:
-    """Check if Ollama is reachable and the model is available."""
+    """Check that Ollama is reachable with the model on at least one host.
+
+    host may be a comma-separated list; each unhealthy host is logged.
+    """
+    results = [_check_host(url, model) for url in parse_hosts(host)]
+    return any(results)
+
+
+def _check_host(host: str, model: str) -> bool:
     try:
         client = httpx.Client(timeout=5.0)
-        response = client.get(f"{host.rstrip('/')}/api/tags")
+        response = client.get(f"{host}/api/tags")
         response.raise_for_status()
         models = [m["name"] for m in response.json().get("models", [])]
         # Model names may include :latest tag
         available = any(m == model or m.startswith(f"{model}:") for m in models)
         if not available:
             logger.warning(
-                "Ollama reachable but model '%s' not found. "
+                "Ollama reachable but model '%s' not found on %s. "
                 "Available: %s. Run: ollama pull %s",
                 model,
+                host,
                 models,
                 model,
             )
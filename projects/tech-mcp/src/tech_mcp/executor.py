@@ -0,0 +1,54 @@
+import asyncio
+import functools
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from tech_mcp.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Tool lanes. Each lane gets its own thread pool so a burst of slow ingests
+# can never occupy the workers that searches need.
+SEARCH = "search"
+INGEST = "ingest"
+MAINTENANCE = "maintenance"
+
+
+class ToolExecutor:
+    """Runs blocking tool bodies on per-lane thread pools."""
+
+    def __init__(self, settings: Settings) -> None:
+        limits = {
+            SEARCH: settings.search_concurrency,
+            INGEST: settings.ingest_concurrency,
+            MAINTENANCE: settings.maintenance_concurrency,
+        }
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        for lane, limit in limits.items():
+            if limit < 1:
+                msg = f"Concurrency limit for '{lane}' must be >= 1, got {limit}"
+                raise ValueError(msg)
+            self._pools[lane] = ThreadPoolExecutor(
+                max_workers=limit,
+                thread_name_prefix=f"tech-mcp-{lane}",
+            )
+        logger.debug("Tool executor limits: %s", limits)
+
+    async def run(
+        self,
+        lane: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """Run fn(*args, **kwargs) on the lane's pool and await the result."""
+        pool = self._pools[lane]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down all lane pools."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
@@ -0,0 +1,213 @@
+"""Detect generated, minified and lockfile content before it is embedded.
+
+Such files cost as much to chunk and embed as hand-written ones but are
+noise in search results. classify() looks at the path and a prefix of the
+content and returns a reason, or None for ordinary source:
+
+- "pattern": matched a repo's extra glob patterns
+- "filename": a known lockfile or generated-file name (package-lock.json,
+  *.min.js, *_pb2.py, ...) or a vendored/generated directory
+- "header": a "Code generated ... DO NOT EDIT" style marker near the top
+- "lockfile": lockfile-shaped JSON/YAML content
+- "minified": long lines with almost no whitespace
+- "high-entropy": base64 blobs, embedded binaries and the like
+- "large-data": JSON/YAML files too big to be hand-written
+
+What happens to a match is the policy's action: "skip" (default), "mark"
+(ingest with generated="true") or "index" (no detection). GENERATED_FILES
+sets the default; a repo overrides it in relationships.json:
+
+    "generated": {"action": "mark", "patterns": ["*.snap"], "allow": ["api/*.json"]}
+
+Patterns are fnmatch globs tested against the file name and the full path.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import PurePath
+
+GENERATED_ACTIONS = ("skip", "mark", "index")
+
+# Only this much of a file is inspected, so classification is O(1) in size
+_SAMPLE_CHARS = 64 * 1024
+_HEADER_LINES = 5
+_MIN_STATS_CHARS = 2048
+_LONG_LINE = 1000
+# Share of the sample in long lines, and the whitespace ratio below which
+# those lines are minified rather than prose paragraphs
+_LONG_LINE_SHARE = 0.6
+_MINIFIED_WHITESPACE = 0.1
+# Bits per character. English prose is ~4.2, source code ~4.5-5, base64 ~6
+_ENTROPY_BITS = 5.6
+# Minified code and encoded blobs are ASCII. Prose in other scripts has a
+# large alphabet and may not separate words with spaces, so the statistics
+# only look at the ASCII part, and not at all when that is under this share
+_MIN_ASCII_SHARE = 0.5
+_LOCKFILE_MARKERS = 20
+_LARGE_DATA_CHARS = 1024 * 1024
+_DATA_SUFFIXES = {".json", ".yaml", ".yml"}
+
+_GENERATED_NAMES = (
+    # Lockfiles
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "bun.lock",
+    "deno.lock",
+    "composer.lock",
+    "Cargo.lock",
+    "Gemfile.lock",
+    "Pipfile.lock",
+    "poetry.lock",
+    "uv.lock",
+    "flake.lock",
+    "go.sum",
+    # Minified and bundled assets
+    "*.min.js",
+    "*.min.mjs",
+    "*.min.css",
+    "*-min.js",
+    "*.bundle.js",
+    "*.chunk.js",
+    "*.js.map",
+    "*.css.map",
+    # Code generators
+    "*.pb.go",
+    "*.pb.gw.go",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.pb.ts",
+    "*_generated.go",
+    "*.gen.go",
+    "*.gen.ts",
+    "*.generated.*",
+    "zz_generated*.go",
+)
+_GENERATED_DIRS = (
+    "*/vendor/*",
+    "*/third_party/*",
+    "*/generated/*",
+    "*/__generated__/*",
+    "*/node_modules/*",
+)
+# Generator markers, only inside a comment: prose that mentions generated
+# values or asks not to edit something is not a generated file
+_HEADER_RE = re.compile(
+    r"^\s*(?:#+|//+|/\*+|\*|<!--|--|;+)\s*(?:.*\s)?"
+    r"(?:code generated\b.*\bdo not edit|@generated\b|<auto-generated\b"
+    r"|this file (?:was|is) automatically generated)",
+    re.IGNORECASE | re.MULTILINE,
+)
+_LOCKFILE_RE = re.compile(
+    r'"(?:integrity|resolved)"\s*:|^\s*(?:integrity|resolution):', re.MULTILINE
+)
+_LOCKFILE_HEAD_RE = re.compile(r'"?lockfileVersion"?\s*:')
+
+
+@dataclass(frozen=True)
+class GeneratedPolicy:
+    """What to do with generated files in one repo."""
+
+    action: str = "skip"
+    patterns: tuple[str, ...] = ()
+    allow: tuple[str, ...] = ()
+
+    @classmethod
+    def for_repo(cls, default_action: str, repo_entry: dict) -> "GeneratedPolicy":
+        """Build the policy from GENERATED_FILES and a relationships.json entry."""
+        config = repo_entry.get("generated", {})
+        action = config.get("action", default_action)
+        if action not in GENERATED_ACTIONS:
+            msg = (
+                f"generated action must be one of {', '.join(GENERATED_ACTIONS)}, "
+                f"got '{action}'"
+            )
+            raise ValueError(msg)
+        return cls(
+            action=action,
+            patterns=tuple(config.get("patterns", ())),
+            allow=tuple(config.get("allow", ())),
+        )
+
+
+class GeneratedFileError(ValueError):
+    """Raised by ingest_file when the policy skips a generated file."""
+
+    def __init__(self, path: str, reason: str, size: int, chunks: int) -> None:
+        self.path = path
+        self.reason = reason
+        self.size = size
+        self.chunks = chunks
+        super().__init__(f"Skipped generated file {path} ({reason})")
+
+
+def _matches(path: str, patterns: tuple[str, ...]) -> bool:
+    name = PurePath(path).name
+    posix = PurePath(path).as_posix()
+    return any(fnmatch(name, p) or fnmatch(posix, p) for p in patterns)
+
+
+def classify_path(path: str, policy: GeneratedPolicy) -> str | None:
+    """Reason the path alone marks a file as generated, if any."""
+    if policy.action == "index" or _matches(path, policy.allow):
+        return None
+    if _matches(path, policy.patterns):
+        return "pattern"
+    if _matches(path, _GENERATED_NAMES) or _matches(path, _GENERATED_DIRS):
+        return "filename"
+    return None
+
+
+def classify(
+    path: str, content: str, policy: GeneratedPolicy, size: int | None = None
+) -> str | None:
+    """Reason the file looks generated, or None.
+
+    size is the file's length when content is only its first part, as for
+    streamed files.
+    """
+    if policy.action == "index" or _matches(path, policy.allow):
+        return None
+    reason = classify_path(path, policy)
+    if reason:
+        return reason
+
+    sample = content[:_SAMPLE_CHARS]
+    head = "\n".join(sample.splitlines()[:_HEADER_LINES])
+    if _HEADER_RE.search(head):
+        return "header"
+
+    suffix = PurePath(path).suffix.lower()
+    if suffix in _DATA_SUFFIXES:
+        if _LOCKFILE_HEAD_RE.search(head) or (
+            len(_LOCKFILE_RE.findall(sample)) >= _LOCKFILE_MARKERS
+        ):
+            return "lockfile"
+        if (len(content) if size is None else size) > _LARGE_DATA_CHARS:
+            return "large-data"
+
+    if len(sample) < _MIN_STATS_CHARS:
+        return None
+    ascii_text = sample.encode("ascii", "ignore").decode()
+    if len(ascii_text) < _MIN_ASCII_SHARE * len(sample):
+        return None
+    long_chars = sum(
+        len(line) for line in sample.splitlines() if len(line) >= _LONG_LINE
+    )
+    if long_chars / len(sample) >= _LONG_LINE_SHARE:
+        whitespace = sum(ascii_text.count(c) for c in " \t\n")
+        if whitespace / len(ascii_text) < _MINIFIED_WHITESPACE:
+            return "minified"
+    if _entropy(ascii_text) >= _ENTROPY_BITS:
+        return "high-entropy"
+    return None
+
+
+def _entropy(text: str) -> float:
+    """Shannon entropy in bits per character."""
+    total = len(text)
+    return -sum((n / total) * math.log2(n / total) for n in Counter(text).values())
@@ -1,18 +1,39 @@
 import logging
+import math
+import mmap
+import threading
 import uuid
+from collections.abc import Callable, Container, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import NoReturn
 
 import chromadb
-from langchain_text_splitters import (
-    Language,
-    MarkdownHeaderTextSplitter,
-    RecursiveCharacterTextSplitter,
-)
 
+from tech_mcp import metrics
+from tech_mcp.archives import ArchiveMember, open_source
+from tech_mcp.checkpoint import IngestCheckpoint
 from tech_mcp.config import Settings
+from tech_mcp.dedup import SignatureIndex, signature
 from tech_mcp.embeddings import OllamaEmbeddingFunction
+from tech_mcp.generated import (
+    GeneratedFileError,
+    GeneratedPolicy,
+    classify,
+    classify_path,
+)
+from tech_mcp.paths import PathIndex
 from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.sessions import format_session, session_date, stable_session_id
+from tech_mcp.symbols import SYMBOL_LANGUAGES, SymbolIndex, chunk_code
+from tech_mcp.timing import StageTimer
+from tech_mcp.vectors import (
+    RerankStore,
+    StorageMode,
+    delete_chunks,
+    write_chunks,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +43,32 @@ _MD_CHUNK_OVERLAP = 400
 _CODE_CHUNK_SIZE = 1600
 _CODE_CHUNK_OVERLAP = 320
 
-_LANGUAGE_MAP: dict[str, Language] = {
-    ".py": Language.PYTHON,
-    ".go": Language.GO,
-    ".ts": Language.TS,
-    ".tsx": Language.TS,
-    ".js": Language.JS,
-    ".jsx": Language.JS,
+# Rows fetched per collection.get() when scanning or deleting, which bounds
+# peak memory regardless of collection size
+_SCAN_PAGE_SIZE = 1000
+
+# Chunks embedded and written together. Chroma pays a fixed cost per add,
+# and the embedding function splits each batch into EMBED_BATCH_SIZE
+# requests spread over the Ollama hosts.
+_WRITE_BATCH_SIZE = 200
+
+# Files over STREAM_INGEST_KB are read and chunked a window at a time, cut
+# at a heading, paragraph or line break, and written in write batches, so
+# peak memory does not grow with file size. Detection of generated files
+# looks at the first _STREAM_HEAD_BYTES, which covers its 64 KB sample.
+_STREAM_WINDOW_BYTES = 256 * 1024
+_STREAM_HEAD_BYTES = 64 * 1024
+_STREAM_CUTS = (b"\n#", b"\n\n", b"\n")
+
+# Values are langchain_text_splitters.Language members. langchain is imported
+# on first chunking call, so the map holds the enum values rather than members.
+_LANGUAGE_MAP: dict[str, str] = {
+    ".py": "python",
+    ".go": "go",
+    ".ts": "ts",
+    ".tsx": "ts",
+    ".js": "js",
+    ".jsx": "js",
 }
 
 _CODE_EXTENSIONS = {
@@ -78,6 +118,35 @@ _MD_HEADERS = [
 ]
 
 
+def _window_end(view: mmap.mmap, pos: int, size: int) -> int:
+    """End of the streaming window at pos, on the safest nearby boundary."""
+    end = pos + _STREAM_WINDOW_BYTES
+    if end >= size:
+        return size
+    for i, cut in enumerate(_STREAM_CUTS):
+        # Headings and paragraphs only count in the window's second half
+        floor = pos if i == len(_STREAM_CUTS) - 1 else pos + _STREAM_WINDOW_BYTES // 2
+        found = view.rfind(cut, floor, end)
+        if found >= 0:
+            return found + 1
+    # No line break at all: at least keep UTF-8 sequences whole
+    while end > pos and view[end] & 0xC0 == 0x80:
+        end -= 1
+    return end
+
+
+def _new_skipped() -> dict:
+    return {"files": 0, "bytes": 0, "chunks": 0, "by_reason": {}}
+
+
+def _add_skipped(skipped: dict, exc: GeneratedFileError) -> None:
+    """Count a generated file in a summary's generated_skipped."""
+    skipped["files"] += 1
+    skipped["bytes"] += exc.size
+    skipped["chunks"] += exc.chunks
+    skipped["by_reason"][exc.reason] = skipped["by_reason"].get(exc.reason, 0) + 1
+
+
 def _is_allowed_file(path: Path) -> bool:
     """Check if a file has an allowed extension or filename."""
     return (
@@ -86,6 +155,49 @@ def _is_allowed_file(path: Path) -> bool:
     )
 
 
+def _stored_chunk_symbols(
+    text: str, language: str, documents: list[str]
+) -> tuple[list[list[tuple[str, str, int]]], int]:
+    """The (name, kind, line) symbols of each stored chunk of source text.
+
+    documents are the chunks in chunk order. Returns the symbols per
+    chunk and how many chunks could not be found in text.
+    """
+    chunks = chunk_code(text, language, _CODE_CHUNK_SIZE) or []
+    exact = {chunk["text"]: chunk["symbols"] for chunk in chunks}
+    found: list[list[tuple[str, str, int]]] = [[] for _ in documents]
+    placed: set[tuple[str, int]] = set()
+    ranges: list[tuple[int, int, int]] = []
+    unmatched = 0
+    pos = 0
+    for k, document in enumerate(documents):
+        if document in exact:
+            found[k] = list(exact[document])
+            placed.update((name, line) for name, _, line in found[k])
+            continue
+        # Chunks come in file order, but overlapping ones start before the
+        # previous chunk ends
+        at = text.find(document, pos)
+        if at < 0:
+            at = text.find(document)
+        if at < 0:
+            unmatched += 1
+            continue
+        pos = at + 1
+        first = text.count("\n", 0, at) + 1
+        ranges.append((k, first, first + document.count("\n")))
+    # A symbol in the overlap of two chunks goes to the first of them
+    for name, kind, line in (s for chunk in chunks for s in chunk["symbols"]):
+        if (name, line) in placed:
+            continue
+        for k, first, last in ranges:
+            if first <= line <= last:
+                found[k].append((name, kind, line))
+                placed.add((name, line))
+                break
+    return found, unmatched
+
+
 class Ingestion:
     """Handles chunking, embedding, and storage of content."""
 
@@ -94,32 +206,93 @@ class Ingestion:
         settings: Settings,
         graph: RelationshipGraph,
         embedding_fn: OllamaEmbeddingFunction,
+        collection_name: str = "knowledge_base",
     ) -> None:
         self._settings = settings
         self._graph = graph
         self._embedding_fn = embedding_fn
+        self._collection_name = collection_name
         self._client: chromadb.ClientAPI | None = None
         self._collection: chromadb.Collection | None = None
+        self._storage_mode = StorageMode.from_settings(settings)
+        self.rerank_store = RerankStore(settings.chroma_persist_dir)
+        self.signatures = SignatureIndex(settings.chroma_persist_dir)
+        self.symbols = SymbolIndex(settings.chroma_persist_dir)
+        self.paths = PathIndex(settings.chroma_persist_dir)
+        # While an embedding model migration runs (and until it is finalized)
+        # a second collection receives the same writes, embedded by its own
+        # model. See tech_mcp.migration.
+        self._mirror: tuple[chromadb.Collection, OllamaEmbeddingFunction] | None = None
+        # Held around every collection write. Reentrant so a migration can
+        # hold it across its final catch-up and the switch.
+        self.write_lock = threading.RLock()
+        # Concurrent first users must not each create a client
+        self._open_lock = threading.RLock()
 
     @property
     def client(self) -> chromadb.ClientAPI:
         if self._client is None:
-            self._client = chromadb.PersistentClient(
-                path=self._settings.chroma_persist_dir,
-                settings=chromadb.Settings(anonymized_telemetry=False),
-            )
+            with self._open_lock:
+                if self._client is None:
+                    self._client = chromadb.PersistentClient(
+                        path=self._settings.chroma_persist_dir,
+                        settings=chromadb.Settings(anonymized_telemetry=False),
+                    )
         return self._client
 
     @property
     def collection(self) -> chromadb.Collection:
         if self._collection is None:
-            self._collection = self.client.get_or_create_collection(
-                name="knowledge_base",
-                embedding_function=self._embedding_fn,
-                metadata={"hnsw:space": "cosine"},
-            )
+            with self._open_lock:
+                if self._collection is None:
+                    self._collection = self.open_collection(
+                        self._collection_name, self._embedding_fn
+                    )
         return self._collection
 
+    @property
+    def collection_name(self) -> str:
+        return self._collection_name
+
+    @property
+    def embedding_fn(self) -> OllamaEmbeddingFunction:
+        return self._embedding_fn
+
+    def open_collection(
+        self, name: str, embedding_fn: OllamaEmbeddingFunction
+    ) -> chromadb.Collection:
+        """Open a collection, creating it in the configured storage mode.
+
+        An existing collection keeps the mode it was created with.
+        """
+        return self.client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_fn,
+            metadata={"hnsw:space": "cosine", **self._storage_mode.metadata()},
+        )
+
+    def switch_collection(
+        self, name: str, embedding_fn: OllamaEmbeddingFunction
+    ) -> None:
+        """Send writes to another collection, embedded by another model."""
+        collection = self.open_collection(name, embedding_fn)
+        with self.write_lock:
+            self._collection = collection
+            self._collection_name = name
+            self._embedding_fn = embedding_fn
+
+    def set_mirror(
+        self,
+        name: str | None,
+        embedding_fn: OllamaEmbeddingFunction | None = None,
+    ) -> None:
+        """Mirror writes into another collection, or stop (name=None)."""
+        mirror = None
+        if name is not None and embedding_fn is not None:
+            mirror = (self.open_collection(name, embedding_fn), embedding_fn)
+        with self.write_lock:
+            self._mirror = mirror
+
     def ingest_session(
         self,
         problem: str,
@@ -135,84 +308,136 @@ class Ingestion:
             self._graph.validate_repo(repo)
 
         session_id = str(uuid.uuid4())
+        ids, documents, metadatas = self._session_chunks(
+            session_id,
+            {
+                "problem": problem,
+                "attempts": attempts,
+                "root_cause": root_cause,
+                "solution": solution,
+                "repos": repos,
+                "tags": tags,
+            },
+            datetime.now(UTC).isoformat(),
+        )
+        self._add_to_collection(ids, documents, metadatas)
+        logger.info(
+            "Ingested session '%s' → %d chunks (id: %s)",
+            problem[:50],
+            len(ids),
+            session_id,
+        )
+        return session_id
+
+    def ingest_sessions(self, sessions: list[dict]) -> dict:
+        """Ingest many sessions, as checked by sessions.parse_sessions.
+
+        Chunks from all sessions are embedded and written together, a large
+        batch at a time, instead of one small write per session. Ids come
+        from each session's content, so re-running a backfill replaces the
+        sessions it already wrote. Returns a summary with the ids in input
+        order.
+        """
+        timer = StageTimer()
         now = datetime.now(UTC).isoformat()
-        tag_str = ",".join(tags) if tags else ""
-        repo_str = ",".join(repos)
-        primary_repo = repos[0]
-
-        # Format into session template
-        attempts_text = ""
-        for i, attempt in enumerate(attempts, 1):
-            action = attempt.get("action", "")
-            outcome = attempt.get("outcome", "")
-            why_failed = attempt.get("why_failed", "")
-            attempts_text += (
-                f"{i}. **Action:** {action}\n"
-                f"   **Outcome:** {outcome}\n"
-                f"   **Why it failed:** {why_failed}\n\n"
-            )
+        flush_at = max(self._settings.embed_batch_size, _WRITE_BATCH_SIZE)
+        session_ids: list[str] = []
+        written: set[str] = set()
+        ids: list[str] = []
+        documents: list[str] = []
+        metadatas: list[dict] = []
+        total = 0
+        for record in sessions:
+            sid = stable_session_id(record)
+            session_ids.append(sid)
+            if sid in written:
+                continue
+            written.add(sid)
+            with timer.stage("chunk"):
+                chunk_ids, chunk_docs, chunk_metas = self._session_chunks(
+                    sid, record, now
+                )
+            ids += chunk_ids
+            documents += chunk_docs
+            metadatas += chunk_metas
+            if len(ids) >= flush_at:
+                self._add_to_collection(ids, documents, metadatas, timer)
+                total += len(ids)
+                ids, documents, metadatas = [], [], []
+        self._add_to_collection(ids, documents, metadatas, timer)
+        total += len(ids)
+
+        summary = {
+            "sessions": len(written),
+            "chunks_created": total,
+            "ingest_session_ids": session_ids,
+            "stage_seconds": {
+                name: round(secs, 3) for name, secs in timer.stages.items()
+            },
+            "elapsed_seconds": round(timer.total(), 3),
+        }
+        logger.info("Ingested %d sessions → %d chunks", len(written), total)
+        return summary
 
-        document = (
-            f"# Session: {problem}\n\n"
-            f"**Repos:** {repo_str}\n"
-            f"**Date:** {now[:10]}\n"
-            f"**Tags:** {tag_str}\n\n"
-            f"## Problem\n\n{problem}\n\n"
-            f"## What Was Tried\n\n{attempts_text}"
-            f"## Root Cause\n\n{root_cause}\n\n"
-            f"## Solution\n\n{solution}\n\n"
-            f"## Key Signals\n\n"
-            f"What to look for next time this pattern appears.\n"
+    def _session_chunks(
+        self, session_id: str, record: dict, now: str
+    ) -> tuple[list[str], list[str], list[dict]]:
+        """Chunk ids, texts and metadata for one session."""
+        date = session_date(record["date"]) if record.get("date") else now
+        repos = record["repos"]
+        tags = record.get("tags")
+        document = format_session(
+            record["problem"],
+            record["attempts"],
+            record["root_cause"],
+            record["solution"],
+            repos,
+            tags,
+            date,
         )
 
         # Chunk with markdown splitter
         chunks = self._chunk_markdown(document)
         total = len(chunks)
 
-        # Build metadata and store
+        # Build metadata
         ids = []
         documents = []
         metadatas = []
-
         for i, chunk in enumerate(chunks):
-            chunk_id = f"session:{session_id}:{i}"
-            ids.append(chunk_id)
+            ids.append(f"session:{session_id}:{i}")
             documents.append(chunk["text"])
             metadatas.append(
                 {
                     "source": "session",
-                    "repo": primary_repo,
-                    "repo_type": self._graph.get_repo_type(primary_repo),
-                    "related_repos": repo_str,
+                    "repo": repos[0],
+                    "repo_type": self._graph.get_repo_type(repos[0]),
+                    "related_repos": ",".join(repos),
                     "file_path": "",
                     "heading_context": chunk.get("heading_context", ""),
-                    "modified_at": now,
+                    "modified_at": date,
                     "ingested_at": now,
                     "ingest_session_id": session_id,
                     "chunk_index": i,
                     "total_chunks": total,
-                    "tags": tag_str,
+                    "tags": ",".join(tags) if tags else "",
                     "generated": "false",
                     "mcp_server": "",
+                    "duplicate_of": "",
+                    "ref": "",
                 }
             )
-
-        self._add_to_collection(ids, documents, metadatas)
-        logger.info(
-            "Ingested session '%s' → %d chunks (id: %s)",
-            problem[:50],
-            total,
-            session_id,
-        )
-        return session_id
+        return ids, documents, metadatas
 
     def ingest_file(
         self,
         path: str,
         repo_name: str,
         related_repos: list[str] | None = None,
+        timer: StageTimer | None = None,
     ) -> tuple[int, str]:
         """Ingest a single file. Returns (chunk_count, ingest_session_id)."""
+        timer = timer or StageTimer()
         self._graph.validate_repo(repo_name)
         file_path = Path(path)
 
@@ -234,25 +459,64 @@ class Ingestion:
             )
             raise ValueError(msg)
 
-        if file_path.stat().st_size > 50 * 1024:
-            logger.warning(
-                "File %s is >50KB (%d bytes) — may chunk poorly",
-                path,
-                file_path.stat().st_size,
-            )
-
-        content = file_path.read_text(errors="replace")
+        suffix = file_path.suffix.lower()
+        policy = self._generated_policy(repo_name)
+        # Name checks first, so lockfiles and bundles are never read
+        reason = classify_path(str(file_path), policy)
+        if reason and policy.action == "skip":
+            size = file_path.stat().st_size
+            self._skip_generated(str(file_path), repo_name, reason, size, suffix)
+
+        size = file_path.stat().st_size
+        stream = 0 < self._settings.stream_ingest_kb * 1024 < size
+        if size > 50 * 1024 and not stream:
+            logger.warning("File %s is >50KB (%d bytes) — may chunk poorly", path, size)
+
+        with timer.stage("read"):
+            if stream:
+                with file_path.open("rb") as fh:
+                    content = fh.read(_STREAM_HEAD_BYTES).decode(errors="replace")
+            else:
+                content = file_path.read_text(errors="replace")
         modified_at = datetime.fromtimestamp(
             file_path.stat().st_mtime, tz=UTC
         ).isoformat()
 
+        with timer.stage("classify"):
+            reason = reason or classify(
+                str(file_path), content, policy, size if stream else None
+            )
+        if reason and policy.action == "skip":
+            self._skip_generated(
+                str(file_path),
+                repo_name,
+                reason,
+                size if stream else len(content),
+                suffix,
+            )
+
+        if stream:
+            logger.info("Streaming large file %s (%d bytes)", path, size)
+            return self._write_file_chunks(
+                self._stream_chunks(file_path, suffix, timer),
+                None,
+                file_path=str(file_path),
+                repo_name=repo_name,
+                suffix=suffix,
+                related_repos=related_repos,
+                modified_at=modified_at,
+                timer=timer,
+                generated=reason is not None,
+            )
         return self._ingest_content(
             content=content,
             file_path=str(file_path),
             repo_name=repo_name,
-            suffix=file_path.suffix.lower(),
+            suffix=suffix,
             related_repos=related_repos,
             modified_at=modified_at,
+            timer=timer,
+            generated=reason is not None,
         )
 
     def _ingest_content(
@@ -263,62 +527,198 @@ class Ingestion:
         suffix: str,
         related_repos: list[str] | None = None,
         modified_at: str | None = None,
+        timer: StageTimer | None = None,
+        generated: bool = False,
+        ref: str = "",
     ) -> tuple[int, str]:
         """Shared ingestion logic for file and content-based ingestion."""
+        timer = timer or StageTimer()
+        with timer.stage("chunk"):
+            chunks = self._chunk_content(content, suffix)
+        return self._write_file_chunks(
+            [chunks],
+            len(chunks),
+            file_path=file_path,
+            repo_name=repo_name,
+            suffix=suffix,
+            related_repos=related_repos,
+            modified_at=modified_at,
+            timer=timer,
+            generated=generated,
+            ref=ref,
+        )
+
+    def _write_file_chunks(
+        self,
+        batches: Iterable[list[dict]],
+        total: int | None,
+        file_path: str,
+        repo_name: str,
+        suffix: str,
+        related_repos: list[str] | None,
+        modified_at: str | None,
+        timer: StageTimer,
+        generated: bool,
+        ref: str = "",
+    ) -> tuple[int, str]:
+        """Replace a file's chunks with batches of new ones, writing as they come.
+
+        If the file already has chunks, the new version is written under
+        fresh ids (a generation suffix), and the old chunks are deleted only
+        once every batch is written. If a batch fails, the new chunks written
+        so far are removed and the old version stays as it was. Unchanged
+        chunks still reuse the embedding of the old chunk at their position.
+
+        total is None when the chunk count is only known at the end (streamed
+        files); total_chunks is then filled in once everything is written.
+        """
         session_id = str(uuid.uuid4())
+        previous = self._file_chunk_ids(file_path, repo_name)
+        suffix_id = f"~{session_id[:8]}" if previous else ""
         now = datetime.now(UTC).isoformat()
         related_str = ",".join(related_repos) if related_repos else ""
         if modified_at is None:
             modified_at = now
 
-        # Deduplicate: delete existing chunks for this file + repo
-        self._delete_file_chunks(file_path, repo_name)
-
-        # Choose chunking strategy
         source_type = "code" if suffix in _CODE_EXTENSIONS else "doc"
-        if suffix == ".md":
-            chunks = self._chunk_markdown(content)
-        elif suffix in _LANGUAGE_MAP:
-            chunks = self._chunk_code(content, _LANGUAGE_MAP[suffix])
-        elif suffix in _CODE_EXTENSIONS:
-            chunks = self._chunk_code(content)
-        else:
-            chunks = self._chunk_generic(content)
-
-        total = len(chunks)
+        flush_at = max(self._settings.embed_batch_size, _WRITE_BATCH_SIZE)
+        count = 0
+        ids: list[str] = []
+        documents: list[str] = []
+        metadatas: list[dict] = []
+        symbols: list[tuple] = []
 
-        ids = []
-        documents = []
-        metadatas = []
+        try:
+            for chunks in batches:
+                for chunk in chunks:
+                    chunk_id = f"{repo_name}:{file_path}:{count}{suffix_id}"
+                    ids.append(chunk_id)
+                    documents.append(chunk["text"])
+                    symbols.extend(
+                        (name, kind, repo_name, file_path, chunk_id, line)
+                        for name, kind, line in chunk.get("symbols", ())
+                    )
+                    metadatas.append(
+                        {
+                            "source": source_type,
+                            "repo": repo_name,
+                            "repo_type": self._graph.get_repo_type(repo_name),
+                            "related_repos": related_str,
+                            "file_path": file_path,
+                            "heading_context": chunk.get("heading_context", ""),
+                            "modified_at": modified_at,
+                            "ingested_at": now,
+                            "ingest_session_id": session_id,
+                            "chunk_index": count,
+                            "total_chunks": total or 0,
+                            "tags": "",
+                            "generated": "true" if generated else "false",
+                            "mcp_server": "",
+                            "duplicate_of": "",
+                            "ref": ref,
+                        }
+                    )
+                    count += 1
+                if len(ids) >= flush_at:
+                    self._flush_file_chunks(
+                        ids, documents, metadatas, symbols, timer, previous
+                    )
+                    ids, documents, metadatas, symbols = [], [], [], []
+            self._flush_file_chunks(ids, documents, metadatas, symbols, timer, previous)
+            if total is None and count:
+                with timer.stage("write"):
+                    self._set_total_chunks(file_path, repo_name, count, suffix_id)
+        except BaseException:
+            # Drop the partial new version; the old one was never touched
+            try:
+                self._delete_where({"ingest_session_id": session_id})
+            except Exception:
+                logger.exception("Could not remove partial chunks of %s", file_path)
+            raise
+        with timer.stage("write"):
+            self._delete_stale_chunks(file_path, repo_name, session_id)
 
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{repo_name}:{file_path}:{i}"
-            ids.append(chunk_id)
-            documents.append(chunk["text"])
-            metadatas.append(
-                {
-                    "source": source_type,
-                    "repo": repo_name,
-                    "repo_type": self._graph.get_repo_type(repo_name),
-                    "related_repos": related_str,
-                    "file_path": file_path,
-                    "heading_context": chunk.get("heading_context", ""),
-                    "modified_at": modified_at,
-                    "ingested_at": now,
-                    "ingest_session_id": session_id,
-                    "chunk_index": i,
-                    "total_chunks": total,
-                    "tags": "",
-                    "generated": "false",
-                    "mcp_server": "",
-                }
-            )
+        logger.info("Ingested file %s (%s) → %d chunks", file_path, repo_name, count)
+        return count, session_id
 
+    def _flush_file_chunks(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        symbols: list[tuple],
+        timer: StageTimer,
+        previous: dict[int, str],
+    ) -> None:
         if documents:
-            self._add_to_collection(ids, documents, metadatas)
+            # The chunk that held each position before, for embedding reuse
+            first = metadatas[0]["chunk_index"]
+            stored_ids = [previous.get(first + k, id_) for k, id_ in enumerate(ids)]
+            self._add_to_collection(ids, documents, metadatas, timer, stored_ids)
+            with timer.stage("write"):
+                self.symbols.put(ids, symbols)
+
+    def _file_chunk_ids(self, file_path: str, repo_name: str) -> dict[int, str]:
+        """Ids of a file's stored chunks, by chunk_index."""
+        with metrics.CHROMA_SECONDS.time(op="get"):
+            got = self.collection.get(
+                where={"$and": [{"file_path": file_path}, {"repo": repo_name}]},
+                include=["metadatas"],
+            )
+        return {
+            meta["chunk_index"]: id_
+            for id_, meta in zip(got["ids"], got["metadatas"], strict=True)
+        }
 
-        logger.info("Ingested file %s (%s) → %d chunks", file_path, repo_name, total)
-        return total, session_id
+    def _set_total_chunks(
+        self, file_path: str, repo_name: str, total: int, suffix_id: str
+    ) -> None:
+        """Record total_chunks on a streamed file's chunks (update merges)."""
+        for i in range(0, total, _WRITE_BATCH_SIZE):
+            end = min(i + _WRITE_BATCH_SIZE, total)
+            ids = [f"{repo_name}:{file_path}:{k}{suffix_id}" for k in range(i, end)]
+            metadatas = [{"total_chunks": total} for _ in ids]
+            with self.write_lock, metrics.CHROMA_SECONDS.time(op="update"):
+                self.collection.update(ids=ids, metadatas=metadatas)
+                if self._mirror is not None:
+                    self._mirror[0].update(ids=ids, metadatas=metadatas)
+
+    def _stream_chunks(
+        self, path: Path, suffix: str, timer: StageTimer
+    ) -> Iterator[list[dict]]:
+        """Chunk a large file one window at a time through a memory map."""
+        heading = ""
+        line_offset = 0
+        with (
+            path.open("rb") as fh,
+            mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as view,
+        ):
+            pos, size = 0, len(view)
+            while pos < size:
+                with timer.stage("read"):
+                    end = _window_end(view, pos, size)
+                    raw = view[pos:end]
+                    text = raw.decode(errors="replace")
+                with timer.stage("chunk"):
+                    chunks = self._chunk_content(text, suffix)
+                for chunk in chunks:
+                    if "symbols" in chunk:
+                        chunk["symbols"] = [
+                            (name, kind, line + line_offset)
+                            for name, kind, line in chunk["symbols"]
+                        ]
+                if suffix == ".md":
+                    # A section continued from the last window keeps its heading
+                    for chunk in chunks:
+                        if chunk["heading_context"]:
+                            break
+                        chunk["heading_context"] = heading
+                    if chunks:
+                        heading = chunks[-1]["heading_context"]
+                line_offset += raw.count(b"\n")
+                pos = end
+                del raw, text
+                yield chunks
 
     def ingest_directory(
         self,
@@ -326,8 +726,16 @@ class Ingestion:
         repo_name: str,
         related_repos: list[str] | None = None,
         extensions: list[str] | None = None,
+        resume: bool = True,
+        progress: Callable[[int, int, int], None] | None = None,
     ) -> dict:
-        """Ingest a directory. Returns summary dict."""
+        """Ingest a directory. Returns summary dict.
+
+        Progress is checkpointed per file. If an earlier run over the same
+        directory did not finish, the files it completed are skipped (when
+        unchanged) unless resume is False. progress, if given, is called
+        after each file with (files done, files found, chunks written).
+        """
         self._graph.validate_repo(repo_name)
         dir_path = Path(path)
 
@@ -338,74 +746,293 @@ class Ingestion:
         allowed_ext = set(extensions) if extensions else _ALLOWED_EXTENSIONS
 
         session_id = str(uuid.uuid4())
-        files_found = 0
+        timer = StageTimer()
         files_ingested = 0
         total_chunks = 0
+        checkpoint = IngestCheckpoint(
+            self._settings.chroma_persist_dir, repo_name, dir_path
+        )
+        resumed = 0
+
+        with timer.stage("walk"):
+            checkpoint.start(resume)
+            candidates = []
+            for file_path in sorted(dir_path.rglob("*")):
+                if not file_path.is_file():
+                    continue
+
+                # Skip ignored directories
+                parts = file_path.relative_to(dir_path).parts
+                if any(part in _SKIP_DIRS for part in parts):
+                    continue
+
+                ext_ok = file_path.suffix.lower() in allowed_ext
+                name_ok = file_path.name in _ALLOWED_FILENAMES
+                if not ext_ok and not name_ok:
+                    continue
+
+                if checkpoint.is_done(file_path):
+                    resumed += 1
+                    continue
+
+                candidates.append(file_path)
+
+        def ingest_one(file_path: Path) -> int | GeneratedFileError | None:
+            nonlocal files_done, chunks_done
+            file_timer = StageTimer()
+            result: int | GeneratedFileError | None = None
+            try:
+                result, _ = self.ingest_file(
+                    str(file_path), repo_name, related_repos, timer=file_timer
+                )
+            except GeneratedFileError as exc:
+                result = exc
+            except Exception:
+                logger.exception("Failed to ingest %s", file_path)
+            if result is not None:
+                checkpoint.mark_done(file_path)
+            with timer_lock:
+                timer.merge(file_timer)
+                files_done += 1
+                if isinstance(result, int):
+                    chunks_done += result
+                if progress is not None:
+                    progress(files_done, len(candidates), chunks_done)
+            return result
+
+        # With several Ollama hosts, keep one file embedding per host
+        timer_lock = threading.Lock()
+        files_done = chunks_done = 0
+        workers = getattr(self.embedding_fn, "parallelism", 1)
+        try:
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    counts = list(pool.map(ingest_one, candidates))
+            else:
+                counts = [ingest_one(file_path) for file_path in candidates]
+        except BaseException:
+            # Keep the checkpoint so the next run picks up from here
+            checkpoint.finish(complete=False)
+            raise
+        failed = sum(count is None for count in counts)
+        checkpoint.finish(complete=failed == 0)
+
+        skipped = _new_skipped()
+        for count in counts:
+            if isinstance(count, GeneratedFileError):
+                _add_skipped(skipped, count)
+            elif count is not None:
+                files_ingested += 1
+                total_chunks += count
 
-        for file_path in sorted(dir_path.rglob("*")):
-            if not file_path.is_file():
-                continue
+        summary = {
+            "ingest_session_id": session_id,
+            "files_found": len(candidates),
+            "files_ingested": files_ingested,
+            "files_resumed": resumed,
+            "files_failed": failed,
+            "chunks_created": total_chunks,
+            "generated_skipped": skipped,
+            "stage_seconds": {
+                name: round(secs, 3) for name, secs in timer.stages.items()
+            },
+            "elapsed_seconds": round(timer.total(), 3),
+        }
+        logger.info("Directory ingestion complete: %s", summary)
+        return summary
 
-            # Skip ignored directories
-            parts = file_path.relative_to(dir_path).parts
-            if any(part in _SKIP_DIRS for part in parts):
+    def ingest_archive(
+        self,
+        source: str,
+        repo_name: str,
+        ref: str | None = None,
+        related_repos: list[str] | None = None,
+        extensions: list[str] | None = None,
+    ) -> dict:
+        """Ingest files straight from a tar/zip archive or a git ref.
+
+        source is an archive file, or a git repository when ref is given
+        (read through `git archive`, with no checkout). Nothing is written
+        to disk. Files are stored as "<source>@<ref>/<path>" ("<source>/<path>"
+        without a ref), with the ref in their metadata. Files stored under
+        that prefix by an earlier run but no longer in the source are
+        removed, unless some file failed.
+        """
+        self._graph.validate_repo(repo_name)
+        allowed_ext = set(extensions) if extensions else _ALLOWED_EXTENSIONS
+        members = open_source(source, ref)
+        label = f"{source}@{ref}" if ref else source.rstrip("/")
+
+        timer = StageTimer()
+        files_found = files_ingested = failed = total_chunks = 0
+        skipped = _new_skipped()
+        seen: set[str] = set()
+        for member in members:
+            member_path = PurePosixPath(member.path)
+            if any(part in _SKIP_DIRS for part in member_path.parts[:-1]):
                 continue
-
-            ext_ok = file_path.suffix.lower() in allowed_ext
-            name_ok = file_path.name in _ALLOWED_FILENAMES
-            if not ext_ok and not name_ok:
+            ext_ok = member_path.suffix.lower() in allowed_ext
+            if not ext_ok and member_path.name not in _ALLOWED_FILENAMES:
+                continue
+            if member.size == 0:
                 continue
-
             files_found += 1
-
+            file_path = f"{label}/{member.path}"
+            seen.add(file_path)
             try:
-                count, _ = self.ingest_file(str(file_path), repo_name, related_repos)
-                files_ingested += 1
-                total_chunks += count
+                count = self._ingest_member(
+                    member, file_path, repo_name, related_repos, ref or "", timer
+                )
+            except GeneratedFileError as exc:
+                _add_skipped(skipped, exc)
             except Exception:
                 logger.exception("Failed to ingest %s", file_path)
+                failed += 1
+            else:
+                files_ingested += 1
+                total_chunks += count
+
+        files_removed = 0
+        if not failed:
+            with timer.stage("write"):
+                files_removed = self._delete_missing(f"{label}/", repo_name, seen)
 
         summary = {
-            "ingest_session_id": session_id,
+            "source": source,
+            "ref": ref or "",
             "files_found": files_found,
             "files_ingested": files_ingested,
+            "files_failed": failed,
+            "files_removed": files_removed,
             "chunks_created": total_chunks,
+            "generated_skipped": skipped,
+            "stage_seconds": {
+                name: round(secs, 3) for name, secs in timer.stages.items()
+            },
+            "elapsed_seconds": round(timer.total(), 3),
         }
-        logger.info("Directory ingestion complete: %s", summary)
+        logger.info("Archive ingestion complete: %s", summary)
         return summary
 
-    def delete_by_session(self, session_id: str) -> int:
-        """Delete all chunks for an ingest_session_id. Returns count."""
-        results = self.collection.get(
-            where={"ingest_session_id": session_id},
+    def _ingest_member(
+        self,
+        member: ArchiveMember,
+        file_path: str,
+        repo_name: str,
+        related_repos: list[str] | None,
+        ref: str,
+        timer: StageTimer,
+    ) -> int:
+        """Ingest one archive member through the same path as a file."""
+        suffix = PurePosixPath(member.path).suffix.lower()
+        policy = self._generated_policy(repo_name)
+        # Name checks first, so lockfiles and bundles are never read
+        reason = classify_path(member.path, policy)
+        if reason and policy.action == "skip":
+            self._skip_generated(file_path, repo_name, reason, member.size, suffix)
+        with timer.stage("read"):
+            content = member.read().decode(errors="replace")
+        with timer.stage("classify"):
+            reason = reason or classify(member.path, content, policy)
+        if reason and policy.action == "skip":
+            self._skip_generated(file_path, repo_name, reason, len(content), suffix)
+        count, _ = self._ingest_content(
+            content=content,
+            file_path=file_path,
+            repo_name=repo_name,
+            suffix=suffix,
+            related_repos=related_repos,
+            modified_at=datetime.fromtimestamp(member.mtime, tz=UTC).isoformat(),
+            timer=timer,
+            generated=reason is not None,
+            ref=ref,
         )
-        count = len(results["ids"])
-        if count > 0:
-            self.collection.delete(ids=results["ids"])
         return count
 
+    def _delete_missing(self, prefix: str, repo_name: str, keep: set[str]) -> int:
+        """Delete a repo's files under prefix that are not in keep."""
+        stale = {
+            meta["file_path"]
+            for meta in self._iter_metadatas({"repo": repo_name})
+            if meta["file_path"].startswith(prefix) and meta["file_path"] not in keep
+        }
+        for path in stale:
+            self._delete_file_chunks(path, repo_name)
+        return len(stale)
+
+    def delete_by_session(self, session_id: str) -> int:
+        """Delete all chunks for an ingest_session_id. Returns count."""
+        return self._delete_where({"ingest_session_id": session_id})
+
     def delete_by_file(self, path: str, repo_name: str) -> int:
         """Delete all chunks for a specific file + repo."""
         return self._delete_file_chunks(path, repo_name)
 
     def delete_by_repo(self, repo_name: str) -> int:
         """Delete all chunks for a repo."""
-        results = self.collection.get(
-            where={"repo": repo_name},
-        )
-        count = len(results["ids"])
-        if count > 0:
-            self.collection.delete(ids=results["ids"])
-        return count
+        return self._delete_where({"repo": repo_name})
+
+    def import_chunks(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        documents: list[str],
+        metadatas: list[dict],
+        embedding_fn: OllamaEmbeddingFunction,
+        symbols: list[tuple[str, str, str, str, str, int]] | None = None,
+    ) -> None:
+        """Upsert chunks that already carry their embeddings, e.g. a snapshot's.
+
+        The embeddings must come from embedding_fn's model. If a migration
+        has switched the collection away from it, nothing is written. A
+        migration mirror gets the documents embedded with its own model, so
+        the chunks survive a rollback. Signatures and paths are updated, and
+        symbol rows replaced if symbols is given.
+        """
+        signatures = self._signatures(documents)
+        while True:
+            mirror = self._mirror
+            mirror_embeddings = mirror[1](documents) if mirror else None
+            with self.write_lock:
+                if mirror is not self._mirror:
+                    continue
+                if embedding_fn is not self._embedding_fn:
+                    msg = (
+                        "An embedding migration switched collections during the "
+                        "import. Import again."
+                    )
+                    raise ValueError(msg)
+                with metrics.CHROMA_SECONDS.time(op="upsert"):
+                    write_chunks(
+                        self.collection,
+                        self.rerank_store,
+                        ids,
+                        embeddings,
+                        documents,
+                        metadatas,
+                        upsert=True,
+                    )
+                    if mirror is not None:
+                        write_chunks(
+                            mirror[0],
+                            self.rerank_store,
+                            ids,
+                            mirror_embeddings,
+                            documents,
+                            metadatas,
+                            upsert=True,
+                        )
+                self.signatures.put(ids, signatures)
+                self.paths.put(ids, metadatas)
+                if symbols is not None:
+                    self.symbols.put(ids, symbols)
+            return
 
     def list_recent_ingestions(self, limit: int = 20) -> list[dict]:
         """List recent ingestion sessions."""
-        results = self.collection.get(
-            include=["metadatas"],
-        )
         # Group by ingest_session_id
         sessions: dict[str, dict] = {}
-        for meta in results["metadatas"]:
+        for meta in self._iter_metadatas():
             sid = meta["ingest_session_id"]
             if sid not in sessions:
                 sessions[sid] = {
@@ -427,9 +1054,8 @@ class Ingestion:
 
     def get_stats(self) -> dict:
         """Get chunk counts grouped by repo and source type."""
-        results = self.collection.get(include=["metadatas"])
         stats: dict[str, dict[str, int]] = {}
-        for meta in results["metadatas"]:
+        for meta in self._iter_metadatas():
             repo = meta["repo"]
             source = meta["source"]
             if repo not in stats:
@@ -437,44 +1063,336 @@ class Ingestion:
             stats[repo][source] = stats[repo].get(source, 0) + 1
         return stats
 
+    def rebuild_symbols(self, repos: list[str] | None = None) -> dict:
+        """Rebuild the symbol index of stored code files from their source.
+
+        For chunks that were never indexed, e.g. ingested before the index
+        existed, by the overlapping character splitter. Each file is read
+        from its file_path and its symbols found again. A stored chunk that
+        is still one of the file's symbol chunks gets that chunk's symbols.
+        Any other stored chunk is located in the source, and gets the
+        symbols defined within its lines. Nothing is re-embedded.
+
+        Chunks that no longer appear in the source (the file changed since
+        it was ingested) are counted as unmatched. Files no longer on disk,
+        archive members and git refs are counted as missing. Re-ingest
+        both kinds.
+        """
+        where: dict = {"source": "code"}
+        if repos:
+            where = {"$and": [where, {"repo": {"$in": repos}}]}
+        files = {(m["repo"], m["file_path"]) for m in self._iter_metadatas(where)}
+        summary = {
+            "files_indexed": 0,
+            "files_missing": 0,
+            "chunks_unmatched": 0,
+            "symbols": 0,
+        }
+        for repo_name, file_path in sorted(files):
+            path = Path(file_path)
+            language = _LANGUAGE_MAP.get(path.suffix.lower())
+            if language not in SYMBOL_LANGUAGES:
+                continue
+            if not path.is_file():
+                summary["files_missing"] += 1
+                continue
+            with metrics.CHROMA_SECONDS.time(op="get"):
+                stored = self.collection.get(
+                    where={"$and": [{"file_path": file_path}, {"repo": repo_name}]},
+                    include=["documents", "metadatas"],
+                )
+            order = sorted(
+                range(len(stored["ids"])),
+                key=lambda k: stored["metadatas"][k]["chunk_index"],
+            )
+            ids = [stored["ids"][k] for k in order]
+            found, unmatched = _stored_chunk_symbols(
+                path.read_text(errors="replace"),
+                language,
+                [stored["documents"][k] for k in order],
+            )
+            rows = [
+                (name, kind, repo_name, file_path, ids[k], line)
+                for k, symbols in enumerate(found)
+                for name, kind, line in symbols
+            ]
+            self.symbols.put(ids, rows)
+            summary["chunks_unmatched"] += unmatched
+            if rows:
+                summary["files_indexed"] += 1
+                summary["symbols"] += len(rows)
+        logger.info("Rebuilt symbol index: %s", summary)
+        return summary
+
     # ── Private helpers ──────────────────────────────────────────────
 
+    def _generated_policy(self, repo_name: str) -> GeneratedPolicy:
+        return GeneratedPolicy.for_repo(
+            self._settings.generated_files, self._graph.get_repo(repo_name)
+        )
+
+    def _skip_generated(
+        self, path: str, repo_name: str, reason: str, size: int, suffix: str
+    ) -> NoReturn:
+        """Drop any chunks from before the file became generated, then raise."""
+        self._delete_file_chunks(path, repo_name)
+        chunk_size = _CODE_CHUNK_SIZE if suffix in _CODE_EXTENSIONS else _MD_CHUNK_SIZE
+        metrics.GENERATED_SKIPPED.inc(reason=reason)
+        logger.info("Skipping generated file %s (%s)", path, reason)
+        raise GeneratedFileError(path, reason, size, math.ceil(size / chunk_size))
+
     def _add_to_collection(
         self,
         ids: list[str],
         documents: list[str],
         metadatas: list[dict],
+        timer: StageTimer | None = None,
+        stored_ids: list[str] | None = None,
     ) -> None:
-        """Add documents to the collection in batches."""
-        batch_size = self._settings.embed_batch_size
+        """Embed and upsert documents into the collection in batches.
+
+        A chunk whose stored counterpart has the same text keeps its stored
+        embedding, so re-ingesting an unchanged or half-ingested file costs
+        no Ollama calls for the chunks that made it in. The counterpart is
+        the chunk under the same id, or under stored_ids[k] when given.
+        """
+        stored_ids = stored_ids or ids
+        timer = timer or StageTimer()
+        batch_size = max(self._settings.embed_batch_size, _WRITE_BATCH_SIZE)
         for i in range(0, len(ids), batch_size):
             end = i + batch_size
-            self.collection.add(
-                ids=ids[i:end],
-                documents=documents[i:end],
-                metadatas=metadatas[i:end],
+            with timer.stage("dedup"):
+                signatures = self._signatures(documents[i:end])
+            while True:
+                embedding_fn, mirror = self._embedding_fn, self._mirror
+                with timer.stage("dedup"):
+                    reused = self._reuse_unchanged(
+                        stored_ids[i:end], documents[i:end], metadatas[i:end]
+                    )
+                    reused.update(
+                        self._link_near_duplicates(
+                            ids[i:end], signatures, metadatas[i:end], skip=reused
+                        )
+                    )
+                # Embed explicitly so Chroma add latency excludes Ollama time
+                with timer.stage("embed"):
+                    embeddings = self._embed_reusing(
+                        embedding_fn, documents[i:end], reused
+                    )
+                    mirror_embeddings = mirror[1](documents[i:end]) if mirror else None
+                with timer.stage("write"), self.write_lock:
+                    # A migration switched collections mid-batch: embed again
+                    if (
+                        embedding_fn is not self._embedding_fn
+                        or mirror is not self._mirror
+                    ):
+                        continue
+                    with metrics.CHROMA_SECONDS.time(op="upsert"):
+                        write_chunks(
+                            self.collection,
+                            self.rerank_store,
+                            ids[i:end],
+                            embeddings,
+                            documents[i:end],
+                            metadatas[i:end],
+                            upsert=True,
+                        )
+                    if mirror is not None:
+                        with metrics.CHROMA_SECONDS.time(op="upsert"):
+                            write_chunks(
+                                mirror[0],
+                                self.rerank_store,
+                                ids[i:end],
+                                mirror_embeddings,
+                                documents[i:end],
+                                metadatas[i:end],
+                                upsert=True,
+                            )
+                    self.signatures.put(ids[i:end], signatures)
+                    self.paths.put(ids[i:end], metadatas[i:end])
+                break
+            for meta in metadatas[i:end]:
+                metrics.CHUNKS_INGESTED.inc(source=meta["source"])
+
+    def _signatures(self, documents: list[str]) -> list[bytes | None]:
+        if self._settings.dedup_threshold <= 0:
+            return [None] * len(documents)
+        return [signature(doc) for doc in documents]
+
+    def _stored(
+        self, ids: Sequence[str], documents: bool = False
+    ) -> dict[str, tuple[Sequence[float] | None, dict, str | None]]:
+        """Stored (embedding, metadata, document) of the ids that exist.
+
+        The embedding is None where it cannot be reused: a reduced index
+        holds truncated vectors, so only full ones from the sidecar count.
+        """
+        collection = self.collection
+        mode = StorageMode.from_collection(collection)
+        include = ["embeddings", "metadatas", *(["documents"] if documents else [])]
+        with metrics.CHROMA_SECONDS.time(op="get"):
+            got = collection.get(ids=list(ids), include=include)
+        full: dict[str, list[float]] = {}
+        if mode.reranks:
+            full = self.rerank_store.get(collection.name, got["ids"])
+        docs = got["documents"] if documents else [None] * len(got["ids"])
+        return {
+            id_: (full.get(id_) if mode.reduced else embedding, meta, doc)
+            for id_, embedding, meta, doc in zip(
+                got["ids"], got["embeddings"], got["metadatas"], docs, strict=True
             )
+        }
+
+    def _reuse_unchanged(
+        self, ids: list[str], documents: list[str], metadatas: list[dict]
+    ) -> dict[int, Sequence[float]]:
+        """Stored embeddings of chunks whose text has not changed, by position."""
+        stored = self._stored(ids, documents=True)
+        reused: dict[int, Sequence[float]] = {}
+        for k, id_ in enumerate(ids):
+            vector, meta, document = stored.get(id_, (None, {}, None))
+            if vector is None or document != documents[k]:
+                continue
+            reused[k] = vector
+            metadatas[k]["duplicate_of"] = meta.get("duplicate_of", "")
+        if reused:
+            metrics.CHUNKS_UNCHANGED.inc(len(reused))
+        return reused
+
+    def _link_near_duplicates(
+        self,
+        ids: list[str],
+        signatures: list[bytes | None],
+        metadatas: list[dict],
+        skip: Container[int] = (),
+    ) -> dict[int, Sequence[float]]:
+        """Point near-duplicates at the chunk they copy via "duplicate_of".
+
+        Returns the stored embeddings they can reuse, by batch position.
+        Chunks of the same file are not matched: they are being replaced.
+        """
+        threshold = self._settings.dedup_threshold
+        matches: dict[int, str] = {}
+        for k, sig in enumerate(signatures):
+            if sig is None or k in skip:
+                continue
+            same_file = ids[k].rsplit(":", 1)[0] + ":"
+            match = self.signatures.find(sig, threshold, exclude_prefix=same_file)
+            if match is not None:
+                matches[k] = match[0]
+        if not matches:
+            return {}
+
+        found = self._stored(sorted(set(matches.values())))
+        reused: dict[int, Sequence[float]] = {}
+        for k, match_id in matches.items():
+            if match_id not in found:
+                # Indexed but not in this collection, e.g. mid-migration
+                continue
+            vector, meta, _ = found[match_id]
+            # Link to the original so duplicates of duplicates form one group.
+            # A re-ingested original can match its own copy; it stays unlinked.
+            original = meta.get("duplicate_of") or match_id
+            metadatas[k]["duplicate_of"] = "" if original == ids[k] else original
+            if vector is not None:
+                reused[k] = vector
+            metrics.NEAR_DUPLICATES.inc(
+                embedding="reused" if vector is not None else "embedded"
+            )
+        return reused
+
+    @staticmethod
+    def _embed_reusing(
+        embedding_fn: OllamaEmbeddingFunction,
+        documents: list[str],
+        reused: dict[int, Sequence[float]],
+    ) -> list[Sequence[float]]:
+        missing = [k for k in range(len(documents)) if k not in reused]
+        fresh = iter(embedding_fn([documents[k] for k in missing]) if missing else [])
+        return [
+            reused[k] if k in reused else next(fresh) for k in range(len(documents))
+        ]
 
     def _delete_file_chunks(self, path: str, repo_name: str) -> int:
         """Delete existing chunks for a file path + repo."""
         try:
-            results = self.collection.get(
-                where={
+            return self._delete_where(
+                {
                     "$and": [
                         {"file_path": path},
                         {"repo": repo_name},
                     ]
-                },
+                }
             )
-            count = len(results["ids"])
-            if count > 0:
-                self.collection.delete(ids=results["ids"])
-            return count
         except Exception:
             return 0
 
+    def _delete_stale_chunks(self, path: str, repo_name: str, session_id: str) -> int:
+        """Delete a file's chunks other than those written by session_id."""
+        return self._delete_where(
+            {
+                "$and": [
+                    {"file_path": path},
+                    {"repo": repo_name},
+                    {"ingest_session_id": {"$ne": session_id}},
+                ]
+            }
+        )
+
+    def _iter_metadatas(self, where: dict | None = None) -> Iterator[dict]:
+        """Yield chunk metadata page by page, so a full scan never holds
+        the whole collection (or its documents) in memory at once."""
+        offset = 0
+        while True:
+            with metrics.CHROMA_SECONDS.time(op="get"):
+                page = self.collection.get(
+                    where=where,
+                    include=["metadatas"],
+                    limit=_SCAN_PAGE_SIZE,
+                    offset=offset,
+                )
+            yield from page["metadatas"]
+            if len(page["ids"]) < _SCAN_PAGE_SIZE:
+                return
+            offset += _SCAN_PAGE_SIZE
+
+    def _delete_where(self, where: dict) -> int:
+        """Delete matching chunks a page of ids at a time. Returns count."""
+        count = 0
+        while True:
+            with self.write_lock:
+                with metrics.CHROMA_SECONDS.time(op="get"):
+                    page = self.collection.get(
+                        where=where, include=[], limit=_SCAN_PAGE_SIZE
+                    )
+                if not page["ids"]:
+                    return count
+                with metrics.CHROMA_SECONDS.time(op="delete"):
+                    delete_chunks(self.collection, self.rerank_store, page["ids"])
+                    if self._mirror is not None:
+                        delete_chunks(self._mirror[0], self.rerank_store, page["ids"])
+                self.signatures.delete(page["ids"])
+                self.symbols.delete(page["ids"])
+                self.paths.delete(page["ids"])
+            count += len(page["ids"])
+
+    def _chunk_content(self, content: str, suffix: str) -> list[dict]:
+        """Choose a chunking strategy by file suffix."""
+        if suffix == ".md":
+            return self._chunk_markdown(content)
+        if suffix in _LANGUAGE_MAP:
+            return self._chunk_code(content, _LANGUAGE_MAP[suffix])
+        if suffix in _CODE_EXTENSIONS:
+            return self._chunk_code(content)
+        return self._chunk_generic(content)
+
     def _chunk_markdown(self, text: str) -> list[dict]:
         """Split markdown by headers, then by size if needed."""
+        from langchain_text_splitters import (
+            MarkdownHeaderTextSplitter,
+            RecursiveCharacterTextSplitter,
+        )
+
         header_splitter = MarkdownHeaderTextSplitter(
             headers_to_split_on=_MD_HEADERS,
             strip_headers=False,
@@ -504,14 +1422,26 @@ class Ingestion:
                 )
         return chunks
 
-    def _chunk_code(self, text: str, language: Language | None = None) -> list[dict]:
-        """Split code by language-aware boundaries."""
+    def _chunk_code(self, text: str, language: str | None = None) -> list[dict]:
+        """Split code into one chunk per symbol, or by language-aware boundaries.
+
+        Symbol chunks do not overlap; the character splitter is the fallback
+        for other languages and for source that does not parse.
+        """
+        if language in SYMBOL_LANGUAGES:
+            chunks = chunk_code(text, language, _CODE_CHUNK_SIZE)
+            if chunks is not None:
+                return chunks
+            logger.debug("No symbol chunking for unparsable %s source", language)
+
+        from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
         if language:
             splitter = RecursiveCharacterTextSplitter(
                 chunk_size=_CODE_CHUNK_SIZE,
                 chunk_overlap=_CODE_CHUNK_OVERLAP,
                 separators=RecursiveCharacterTextSplitter.get_separators_for_language(
-                    language
+                    Language(language)
                 ),
             )
         else:
@@ -525,6 +1455,8 @@ class Ingestion:
 
     def _chunk_generic(self, text: str) -> list[dict]:
         """Generic text splitting for config files, etc."""
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
         splitter = RecursiveCharacterTextSplitter(
             chunk_size=_MD_CHUNK_SIZE,
             chunk_overlap=_MD_CHUNK_OVERLAP,
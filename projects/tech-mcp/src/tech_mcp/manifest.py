@@ -0,0 +1,165 @@
+"""Ingest several repos in one process from a manifest.
+
+A manifest is JSON shaped like relationships.json: repo name to an entry
+with a "path" and, optionally, "related_repos" and "extensions".
+relationships.json itself works as a manifest; its repos without a
+"path" are left out. All repos share one Ingestion, so Ollama is checked
+and Chroma opened once, and up to `jobs` repos are ingested at a time.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from tech_mcp import metrics
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.relationships import RelationshipGraph
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    repo: str
+    path: str
+    related_repos: list[str] | None = None
+    extensions: list[str] | None = None
+
+
+def load_manifest(
+    path: str, graph: RelationshipGraph, require_path: bool = True
+) -> list[ManifestEntry]:
+    """Read a manifest, checking each repo against the relationship graph.
+
+    With require_path False, entries without a "path" are skipped instead
+    of rejected, which is how relationships.json is read.
+    """
+    data = json.loads(Path(path).read_text())
+    if not isinstance(data, dict):
+        msg = f"Manifest {path} must be a JSON object of repo name to entry"
+        raise ValueError(msg)
+    entries = []
+    for repo, entry in data.items():
+        if not entry.get("path"):
+            if require_path:
+                msg = f"Manifest entry '{repo}' has no \"path\""
+                raise ValueError(msg)
+            continue
+        graph.validate_repo(repo)
+        entries.append(
+            ManifestEntry(
+                repo=repo,
+                path=entry["path"],
+                related_repos=entry.get("related_repos"),
+                extensions=entry.get("extensions"),
+            )
+        )
+    return entries
+
+
+def ingest_manifest(
+    ingestion: Ingestion,
+    entries: list[ManifestEntry],
+    jobs: int = 2,
+    resume: bool = True,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Ingest every entry, `jobs` repos at a time. Returns an aggregate report.
+
+    A repo that fails is reported with its error; the others carry on.
+    progress, if given, is called with a totals dict after each file.
+    """
+    if jobs < 1:
+        msg = f"jobs must be >= 1, got {jobs}"
+        raise ValueError(msg)
+    lock = threading.Lock()
+    state = {e.repo: {"files_done": 0, "files_found": 0, "chunks": 0} for e in entries}
+    repos_done = 0
+    start = time.monotonic()
+    unchanged = metrics.CHUNKS_UNCHANGED.value()
+    near_duplicates = metrics.NEAR_DUPLICATES.value(embedding="reused")
+
+    def totals() -> dict:
+        elapsed = time.monotonic() - start
+        chunks = sum(s["chunks"] for s in state.values())
+        return {
+            "repos_done": repos_done,
+            "repos_total": len(entries),
+            "files_done": sum(s["files_done"] for s in state.values()),
+            "files_found": sum(s["files_found"] for s in state.values()),
+            "chunks": chunks,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": _rate(chunks, elapsed),
+        }
+
+    def run(entry: ManifestEntry) -> dict:
+        nonlocal repos_done
+
+        def on_file(files_done: int, files_found: int, chunks: int) -> None:
+            with lock:
+                state[entry.repo].update(
+                    files_done=files_done, files_found=files_found, chunks=chunks
+                )
+                if progress is not None:
+                    progress(totals())
+
+        repo_start = time.monotonic()
+        try:
+            summary = ingestion.ingest_directory(
+                entry.path,
+                entry.repo,
+                entry.related_repos,
+                entry.extensions,
+                resume=resume,
+                progress=on_file,
+            )
+        except Exception as exc:
+            logger.exception("Failed to ingest %s from %s", entry.repo, entry.path)
+            summary = {"error": str(exc)}
+        elapsed = time.monotonic() - repo_start
+        chunks = summary.get("chunks_created", 0)
+        with lock:
+            repos_done += 1
+            if progress is not None:
+                progress(totals())
+        return {
+            "repo": entry.repo,
+            "path": entry.path,
+            **summary,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": _rate(chunks, elapsed),
+        }
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="manifest") as pool:
+        repos = list(pool.map(run, entries))
+
+    elapsed = time.monotonic() - start
+    files = sum(r.get("files_ingested", 0) for r in repos)
+    chunks = sum(r.get("chunks_created", 0) for r in repos)
+    reused = (
+        metrics.CHUNKS_UNCHANGED.value()
+        - unchanged
+        + metrics.NEAR_DUPLICATES.value(embedding="reused")
+        - near_duplicates
+    )
+    return {
+        "repos": repos,
+        "repos_failed": sum("error" in r for r in repos),
+        "files_found": sum(r.get("files_found", 0) for r in repos),
+        "files_ingested": files,
+        "files_failed": sum(r.get("files_failed", 0) for r in repos),
+        "chunks_created": chunks,
+        "embeddings_reused": int(reused),
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": _rate(files, elapsed),
+        "chunks_per_second": _rate(chunks, elapsed),
+    }
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else 0.0
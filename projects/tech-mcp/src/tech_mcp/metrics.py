@@ -0,0 +1,329 @@
+"""Minimal Prometheus-style metrics.
+
+Counters, gauges and histograms are plain dicts behind a lock, so recording
+costs a dict lookup and an addition. Everything is rendered in the
+Prometheus text exposition format by the /metrics route.
+"""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, str]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: _LabelKey, extra: tuple[str, str] | None = None) -> str:
+    pairs = list(key)
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """Sample lines in exposition format, without HELP and TYPE."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._values: dict[_LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or computed at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._values: dict[_LabelKey, float] = {}
+        self._fn: Callable[[], float | None] | None = None
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float | None]) -> None:
+        """Compute the (unlabelled) value at scrape time. None skips it."""
+        self._fn = fn
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+        if self._fn is not None:
+            try:
+                value = self._fn()
+            except Exception:
+                value = None
+            if value is not None:
+                lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed observations with running sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text)
+        self._buckets = tuple(sorted(buckets))
+        # label key → [per-bucket counts..., +Inf count, sum]
+        self._values: dict[_LabelKey, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = [0.0] * (len(self._buckets) + 2)
+                self._values[key] = row
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the with-block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            row = self._values.get(_label_key(labels))
+            return int(sum(row[:-1])) if row else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            cumulative = 0.0
+            for bound, n in zip(self._buckets, row, strict=False):
+                cumulative += n
+                le = ("le", _format_value(bound))
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            cumulative += row[len(self._buckets)]
+            inf = ("le", "+Inf")
+            lines.append(
+                f"{self.name}_bucket{_format_labels(key, inf)} "
+                f"{_format_value(cumulative)}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {row[-1]!r}")
+            lines.append(
+                f"{self.name}_count{_format_labels(key)} {_format_value(cumulative)}"
+            )
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register[M: _Metric](self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ── Ollama ───────────────────────────────────────────────────────────────────
+
+EMBED_REQUESTS = REGISTRY.register(
+    Counter(
+        "tech_mcp_embed_requests_total",
+        "Ollama /api/embed HTTP attempts by outcome.",
+    )
+)
+EMBED_RETRIES = REGISTRY.register(
+    Counter("tech_mcp_embed_retries_total", "Ollama embed attempts that were retried.")
+)
+EMBED_FAILURES = REGISTRY.register(
+    Counter(
+        "tech_mcp_embed_failures_total",
+        "Ollama embed batches that failed after all retries.",
+    )
+)
+EMBED_SECONDS = REGISTRY.register(
+    Histogram("tech_mcp_embed_seconds", "Latency of successful Ollama embed calls.")
+)
+EMBED_COALESCED = REGISTRY.register(
+    Counter(
+        "tech_mcp_embed_coalesced_total",
+        "Texts not sent to Ollama because an identical text was being embedded.",
+    )
+)
+EMBED_HOST_EJECTIONS = REGISTRY.register(
+    Counter(
+        "tech_mcp_embed_host_ejections_total",
+        "Times an Ollama host was taken out of rotation after a failure.",
+    )
+)
+EMBED_HOST_UP = REGISTRY.register(
+    Gauge("tech_mcp_embed_host_up", "1 if an Ollama host is in rotation, else 0.")
+)
+EMBED_BATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "tech_mcp_embed_batch_size",
+        "Texts per Ollama embed call.",
+        buckets=SIZE_BUCKETS,
+    )
+)
+
+# ── Chroma ───────────────────────────────────────────────────────────────────
+
+CHROMA_SECONDS = REGISTRY.register(
+    Histogram("tech_mcp_chroma_seconds", "Latency of Chroma operations by op.")
+)
+COLLECTION_CHUNKS = REGISTRY.register(
+    Gauge("tech_mcp_collection_chunks", "Chunks stored in the active collection.")
+)
+
+# ── Tools and ingestion ──────────────────────────────────────────────────────
+
+TOOL_SECONDS = REGISTRY.register(
+    Histogram(
+        "tech_mcp_tool_seconds",
+        "MCP tool latency, including executor queueing, by tool and outcome.",
+    )
+)
+CHUNKS_INGESTED = REGISTRY.register(
+    Counter(
+        "tech_mcp_chunks_ingested_total",
+        "Chunks written to the knowledge base by source type.",
+    )
+)
+NEAR_DUPLICATES = REGISTRY.register(
+    Counter(
+        "tech_mcp_near_duplicate_chunks_total",
+        "Chunks linked to a near-identical stored chunk, by whether its "
+        "embedding was reused.",
+    )
+)
+CHUNKS_UNCHANGED = REGISTRY.register(
+    Counter(
+        "tech_mcp_chunks_unchanged_total",
+        "Re-ingested chunks whose text was unchanged, so the stored embedding "
+        "was kept.",
+    )
+)
+GENERATED_SKIPPED = REGISTRY.register(
+    Counter(
+        "tech_mcp_generated_files_skipped_total",
+        "Files not ingested because they look generated, by reason.",
+    )
+)
+
+WATCH_FILES = REGISTRY.register(
+    Counter(
+        "tech_mcp_watch_files_total",
+        "Files synced by the directory watcher, by outcome.",
+    )
+)
+WATCH_PENDING = REGISTRY.register(
+    Gauge(
+        "tech_mcp_watch_pending",
+        "Changed files waiting out the debounce interval or the rate limit.",
+    )
+)
+
+# ── Caches ───────────────────────────────────────────────────────────────────
+
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "tech_mcp_cache_requests_total",
+        "Cache lookups by cache and result (hit or miss).",
+    )
+)
@@ -0,0 +1,504 @@
+"""Embedding model migration through a shadow collection.
+
+Vectors from different models cannot share an index, so the knowledge base
+records which collection is active and which model embedded it, in
+kb_state.json inside the Chroma persist dir. Changing OLLAMA_EMBED_MODEL
+alone does not change that; a migration does:
+
+1. A shadow collection is created for the new model. From then on,
+   Ingestion mirrors every write into it, embedded with the new model.
+2. A background job pages through the active collection and re-embeds
+   documents into the shadow, throttled to migration_rate chunks/s.
+3. Catch-up passes copy anything the paging missed. The last one runs
+   under Ingestion.write_lock, and the switch happens under the same lock:
+   Ingestion and Retrieval move to the shadow collection together.
+4. The old collection becomes the mirror, so rollback stays lossless until
+   the migration is finalized and the old collection is dropped.
+"""
+
+import contextlib
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, replace
+from datetime import UTC, datetime
+from pathlib import Path
+
+import chromadb.errors
+
+from tech_mcp.config import Settings
+from tech_mcp.embeddings import OllamaEmbeddingFunction
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.retrieval import Retrieval
+from tech_mcp.vectors import StorageMode, write_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "knowledge_base"
+_STATE_FILE = "kb_state.json"
+
+# Chunks read from the active collection per re-embed step
+_PAGE_SIZE = 100
+# Catch-up passes before taking the write lock for the final one
+_MAX_CATCH_UP_PASSES = 3
+
+EmbeddingFactory = Callable[[str], OllamaEmbeddingFunction]
+
+
+@dataclass(frozen=True)
+class KBState:
+    """Which collection is live, and any migration's other collection."""
+
+    collection: str
+    model: str
+    # Set after a switch until finalize: the collection rollback returns to
+    previous_collection: str = ""
+    previous_model: str = ""
+    # Set while a migration runs: the shadow collection being filled
+    pending_collection: str = ""
+    pending_model: str = ""
+
+
+def load_state(settings: Settings) -> KBState:
+    """Read kb_state.json. Without one, the KB predates migrations."""
+    path = Path(settings.chroma_persist_dir) / _STATE_FILE
+    if not path.exists():
+        return KBState(collection=DEFAULT_COLLECTION, model=settings.ollama_embed_model)
+    return KBState(**json.loads(path.read_text()))
+
+
+def save_state(settings: Settings, state: KBState) -> None:
+    path = Path(settings.chroma_persist_dir) / _STATE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(asdict(state), indent=2) + "\n")
+    tmp.replace(path)
+
+
+def ollama_embedding_factory(settings: Settings) -> EmbeddingFactory:
+    """Return a model name → OllamaEmbeddingFunction factory for settings."""
+
+    def make(model: str) -> OllamaEmbeddingFunction:
+        return OllamaEmbeddingFunction(
+            host=settings.ollama_host,
+            model=model,
+            batch_size=settings.embed_batch_size,
+            keep_alive=settings.ollama_keep_alive,
+        )
+
+    return make
+
+
+def open_ingestion(
+    settings: Settings,
+    graph: RelationshipGraph,
+    make_embedding_fn: EmbeddingFactory | None = None,
+) -> Ingestion:
+    """Build Ingestion for the active collection, using its recorded model.
+
+    If a migration is running or awaiting finalize, writes are mirrored into
+    the other collection too, so CLI ingestion keeps both in sync.
+    """
+    make_embedding_fn = make_embedding_fn or ollama_embedding_factory(settings)
+    state = load_state(settings)
+    ingestion = Ingestion(
+        settings, graph, make_embedding_fn(state.model), state.collection
+    )
+    if state.previous_collection:
+        ingestion.set_mirror(
+            state.previous_collection, make_embedding_fn(state.previous_model)
+        )
+    elif state.pending_collection:
+        ingestion.set_mirror(
+            state.pending_collection, make_embedding_fn(state.pending_model)
+        )
+    return ingestion
+
+
+def _collection_name(model: str) -> str:
+    # Chroma names allow [a-zA-Z0-9._-] and must end alphanumeric
+    slug = re.sub(r"[^a-zA-Z0-9._-]+", "-", model).strip("-._")
+    return f"{DEFAULT_COLLECTION}-{slug}-{int(time.time())}"
+
+
+class _CancelledError(Exception):
+    """Raised inside the migration job when rollback cancels it."""
+
+
+class EmbeddingMigration:
+    """Re-embeds the KB with a new model and switches over without downtime.
+
+    Job status moves through: idle → running → switched | failed |
+    cancelled; a switched migration can then be rolled_back or finalized.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        ingestion: Ingestion,
+        retrieval: Retrieval,
+        make_embedding_fn: EmbeddingFactory,
+    ) -> None:
+        self._settings = settings
+        self._ingestion = ingestion
+        self._retrieval = retrieval
+        self._make_embedding_fn = make_embedding_fn
+        self._state = load_state(settings)
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._job: dict = {"status": "idle"}
+
+    @property
+    def state(self) -> KBState:
+        return self._state
+
+    def recover(self) -> None:
+        """Drop the shadow of a migration interrupted by a restart.
+
+        Only the server calls this: a CLI process must not discard a
+        migration the server is running.
+        """
+        pending = self._state.pending_collection
+        if not pending or self._running():
+            return
+        logger.warning(
+            "Embedding migration to '%s' was interrupted; dropping '%s'. "
+            "Run migrate_embedding_model again to restart it.",
+            self._state.pending_model,
+            pending,
+        )
+        self._discard_pending()
+
+    # ── Commands ─────────────────────────────────────────────────────────
+
+    def start(self, model: str) -> dict:
+        """Start re-embedding into a shadow collection for model.
+
+        The shadow is created in the configured storage mode, so migrating
+        to the same model applies a new EMBED_DIMENSIONS or RERANK_DTYPE.
+        """
+        with self._lock:
+            if self._running():
+                msg = "An embedding migration is already running"
+                raise ValueError(msg)
+            state = self._state
+            current_mode = StorageMode.from_collection(self._ingestion.collection)
+            target_mode = StorageMode.from_settings(self._settings)
+            if model == state.model and current_mode == target_mode:
+                msg = (
+                    f"The knowledge base is already embedded with '{model}' "
+                    f"in this storage mode"
+                )
+                raise ValueError(msg)
+            if state.previous_collection:
+                msg = (
+                    f"Finalize the migration between '{state.previous_model}' "
+                    f"and '{state.model}' before starting another"
+                )
+                raise ValueError(msg)
+
+            embedding_fn = self._make_embedding_fn(model)
+            # Fail now, not in the background, if the model is unavailable
+            dimensions = len(embedding_fn(["migration check"])[0])
+
+            shadow = _collection_name(model)
+            self._set_state(
+                replace(state, pending_collection=shadow, pending_model=model)
+            )
+            self._ingestion.set_mirror(shadow, embedding_fn)
+            self._cancel.clear()
+            self._job = {
+                "status": "running",
+                "from_model": state.model,
+                "to_model": model,
+                "shadow_collection": shadow,
+                "dimensions": dimensions,
+                "stored_dimensions": target_mode.dimensions or dimensions,
+                "total": self._ingestion.collection.count(),
+                "processed": 0,
+                "copied": 0,
+                "started_at": datetime.now(UTC).isoformat(),
+                "_started": time.monotonic(),
+            }
+            self._thread = threading.Thread(
+                target=self._worker,
+                args=(shadow, embedding_fn),
+                name="tech-mcp-migration",
+                daemon=True,
+            )
+            self._thread.start()
+        logger.info("Embedding migration started: %s → %s", state.model, model)
+        return self.status()
+
+    def status(self) -> dict:
+        """Return job progress plus the persisted collection state."""
+        with self._lock:
+            job = dict(self._job)
+        started = job.pop("_started", None)
+        if job["status"] == "running" and started is not None:
+            elapsed = time.monotonic() - started
+            total = max(job["total"], 1)
+            job["percent"] = round(min(100.0, 100 * job["processed"] / total), 1)
+            rate = job["processed"] / elapsed if elapsed > 0 else 0.0
+            job["chunks_per_second"] = round(rate, 2)
+            remaining = max(job["total"] - job["processed"], 0)
+            job["eta_seconds"] = round(remaining / rate) if rate else None
+        return {**job, "state": asdict(self._state)}
+
+    def rollback(self) -> dict:
+        """Cancel a running migration, or switch back after a completed one."""
+        thread = self._thread
+        if self._running() and thread is not None:
+            self._cancel.set()
+            thread.join()
+            return self.status()
+
+        with self._lock:
+            state = self._state
+            if not state.previous_collection:
+                msg = "No embedding migration to roll back"
+                raise ValueError(msg)
+            previous_fn = self._make_embedding_fn(state.previous_model)
+            current_fn = self._ingestion.embedding_fn
+            self._switch(
+                KBState(
+                    collection=state.previous_collection,
+                    model=state.previous_model,
+                    previous_collection=state.collection,
+                    previous_model=state.model,
+                ),
+                previous_fn,
+                current_fn,
+            )
+            self._job = {
+                "status": "rolled_back",
+                "from_model": state.model,
+                "to_model": state.previous_model,
+                "finished_at": datetime.now(UTC).isoformat(),
+            }
+        logger.info(
+            "Rolled back embedding model: %s → %s",
+            state.model,
+            state.previous_model,
+        )
+        return self.status()
+
+    def finalize(self) -> dict:
+        """Stop mirroring into the previous collection and delete it."""
+        with self._lock:
+            state = self._state
+            if not state.previous_collection or self._running():
+                msg = "No completed embedding migration to finalize"
+                raise ValueError(msg)
+            self._ingestion.set_mirror(None)
+            self._set_state(replace(state, previous_collection="", previous_model=""))
+            self._drop_collection(state.previous_collection)
+            self._job = {
+                "status": "finalized",
+                "model": state.model,
+                "dropped_collection": state.previous_collection,
+                "finished_at": datetime.now(UTC).isoformat(),
+            }
+        logger.info("Finalized embedding model '%s'", state.model)
+        return self.status()
+
+    # ── Background job ───────────────────────────────────────────────────
+
+    def _worker(self, shadow_name: str, embedding_fn: OllamaEmbeddingFunction) -> None:
+        try:
+            source = self._ingestion.collection
+            shadow = self._ingestion.open_collection(shadow_name, embedding_fn)
+            self._backfill(source, shadow, embedding_fn)
+            for _ in range(_MAX_CATCH_UP_PASSES):
+                missing = self._missing_ids(source, shadow)
+                if len(missing) <= _PAGE_SIZE:
+                    break
+                self._copy_ids(source, shadow, embedding_fn, missing)
+            with self._ingestion.write_lock:
+                # No writes land while this holds, so the shadow ends up
+                # with exactly the active collection's chunks
+                self._copy_ids(
+                    source,
+                    shadow,
+                    embedding_fn,
+                    self._missing_ids(source, shadow),
+                )
+                if shadow.count() != source.count():
+                    msg = (
+                        f"Shadow has {shadow.count()} chunks, "
+                        f"active has {source.count()}"
+                    )
+                    raise RuntimeError(msg)
+                self._complete(shadow_name, embedding_fn)
+        except _CancelledError:
+            self._abort("cancelled")
+        except Exception as exc:
+            logger.exception("Embedding migration failed")
+            self._abort("failed", str(exc))
+
+    def _backfill(self, source, shadow, embedding_fn) -> None:
+        offset = 0
+        while True:
+            page = source.get(
+                include=["documents"],
+                limit=_PAGE_SIZE,
+                offset=offset,
+            )
+            if not page["ids"]:
+                return
+            self._copy(source, shadow, embedding_fn, page["ids"], page["documents"])
+            offset += len(page["ids"])
+
+    def _copy_ids(self, source, shadow, embedding_fn, ids: list[str]) -> None:
+        for i in range(0, len(ids), _PAGE_SIZE):
+            page = source.get(ids=ids[i : i + _PAGE_SIZE], include=["documents"])
+            self._copy(source, shadow, embedding_fn, page["ids"], page["documents"])
+
+    def _copy(
+        self,
+        source,
+        shadow,
+        embedding_fn: OllamaEmbeddingFunction,
+        ids: list[str],
+        documents: list[str],
+    ) -> None:
+        """Re-embed chunks missing from the shadow and add them.
+
+        Embedding happens without the write lock. Under it, a chunk is
+        added only if the active collection still holds the same document
+        and the mirrored writes have not already put it in the shadow.
+        """
+        if self._cancel.is_set():
+            raise _CancelledError
+        present = set(shadow.get(ids=ids, include=[])["ids"])
+        todo = [i for i, id_ in enumerate(ids) if id_ not in present]
+        start = time.monotonic()
+        copied = 0
+        if todo:
+            todo_ids = [ids[i] for i in todo]
+            todo_docs = [documents[i] for i in todo]
+            embeddings = embedding_fn(todo_docs)
+            with self._ingestion.write_lock:
+                current = source.get(ids=todo_ids, include=["documents", "metadatas"])
+                rows = {
+                    id_: (doc, meta)
+                    for id_, doc, meta in zip(
+                        current["ids"],
+                        current["documents"],
+                        current["metadatas"],
+                        strict=True,
+                    )
+                }
+                present = set(shadow.get(ids=todo_ids, include=[])["ids"])
+                keep = [
+                    j
+                    for j, id_ in enumerate(todo_ids)
+                    if id_ not in present
+                    and id_ in rows
+                    and rows[id_][0] == todo_docs[j]
+                ]
+                if keep:
+                    write_chunks(
+                        shadow,
+                        self._ingestion.rerank_store,
+                        ids=[todo_ids[j] for j in keep],
+                        embeddings=[embeddings[j] for j in keep],
+                        documents=[todo_docs[j] for j in keep],
+                        metadatas=[rows[todo_ids[j]][1] for j in keep],
+                    )
+                    copied = len(keep)
+        with self._lock:
+            self._job["processed"] += len(ids)
+            self._job["copied"] += copied
+        self._throttle(len(todo), time.monotonic() - start)
+
+    def _missing_ids(self, source, shadow) -> list[str]:
+        missing: list[str] = []
+        offset = 0
+        while True:
+            page = source.get(include=[], limit=_PAGE_SIZE * 10, offset=offset)
+            if not page["ids"]:
+                return missing
+            present = set(shadow.get(ids=page["ids"], include=[])["ids"])
+            missing.extend(id_ for id_ in page["ids"] if id_ not in present)
+            offset += len(page["ids"])
+
+    def _throttle(self, embedded: int, elapsed: float) -> None:
+        rate = self._settings.migration_rate
+        if rate <= 0 or embedded == 0:
+            return
+        # Wake early on cancel rather than sleeping out the whole delay
+        if self._cancel.wait(max(0.0, embedded / rate - elapsed)):
+            raise _CancelledError
+
+    def _complete(
+        self, shadow_name: str, embedding_fn: OllamaEmbeddingFunction
+    ) -> None:
+        with self._lock:
+            state = self._state
+            self._switch(
+                KBState(
+                    collection=shadow_name,
+                    model=state.pending_model,
+                    previous_collection=state.collection,
+                    previous_model=state.model,
+                ),
+                embedding_fn,
+                self._ingestion.embedding_fn,
+            )
+            self._job.update(
+                status="switched",
+                processed=self._job["total"],
+                finished_at=datetime.now(UTC).isoformat(),
+            )
+        logger.info(
+            "Embedding migration complete: now serving '%s' from '%s'",
+            state.pending_model,
+            shadow_name,
+        )
+
+    def _abort(self, status: str, error: str = "") -> None:
+        with self._lock:
+            self._discard_pending()
+            self._job.update(status=status, finished_at=datetime.now(UTC).isoformat())
+            if error:
+                self._job["error"] = error
+
+    # ── Helpers ──────────────────────────────────────────────────────────
+
+    def _switch(
+        self,
+        state: KBState,
+        embedding_fn: OllamaEmbeddingFunction,
+        previous_fn: OllamaEmbeddingFunction,
+    ) -> None:
+        """Persist state, then move Ingestion and Retrieval to its collection."""
+        with self._ingestion.write_lock:
+            self._set_state(state)
+            self._ingestion.switch_collection(state.collection, embedding_fn)
+            self._ingestion.set_mirror(state.previous_collection, previous_fn)
+            self._retrieval.switch_collection(state.collection, embedding_fn)
+
+    def _discard_pending(self) -> None:
+        pending = self._state.pending_collection
+        self._ingestion.set_mirror(None)
+        self._set_state(replace(self._state, pending_collection="", pending_model=""))
+        if pending:
+            self._drop_collection(pending)
+
+    def _drop_collection(self, name: str) -> None:
+        with contextlib.suppress(chromadb.errors.NotFoundError):
+            self._ingestion.client.delete_collection(name)
+        self._ingestion.rerank_store.drop(name)
+
+    def _set_state(self, state: KBState) -> None:
+        save_state(self._settings, state)
+        self._state = state
+
+    def _running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
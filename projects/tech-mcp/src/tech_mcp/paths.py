@@ -0,0 +1,249 @@
+"""File path index for scoping searches by path prefix or glob.
+
+Chroma's where filters compare whole metadata values, so "only under
+internal/auth/" or "only *.yaml" cannot be asked of Chroma directly. The
+index keeps one row per chunk (chunk id, repo, source, file_path) in a
+SQLite sidecar (paths.sqlite3) next to Chroma's data, and resolves a scope
+to the ids of the chunks it covers.
+
+Rows are keyed by chunk id like the symbol index, so they are replaced and
+deleted together with the chunks and shared by every collection. A KB
+built before the index existed is indexed from Chroma's metadata the
+first time a scoped search runs. A row left behind for a deleted chunk is
+harmless: its id matches nothing in the collection.
+
+Scopes follow .gitignore conventions. A relative prefix or glob matches at
+any directory boundary, so "internal/auth/" works against absolute
+ingest paths and archive members alike; one starting with "/" is matched
+from the start of the path. A glob without "/" matches the file name. "*"
+and "?" stay within one path segment and "**" spans any number.
+"""
+
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+_SIDECAR_FILE = "paths.sqlite3"
+_SQL_BATCH = 500
+_SCAN_PAGE_SIZE = 1000
+# PRAGMA user_version once every chunk in the collection has a row
+_BUILT = 1
+# Resolved scopes kept; agents tend to repeat a scope across searches
+_CACHE_SIZE = 64
+
+_GLOB_TOKEN_RE = re.compile(r"\*\*/|\*\*|\*|\?|[^*?]+")
+
+
+def glob_regex(glob: str) -> re.Pattern[str]:
+    """Compile a path glob to a regex matched against whole file paths."""
+    if not glob.startswith("/"):
+        glob = "**/" + glob
+    parts = []
+    for token in _GLOB_TOKEN_RE.findall(glob):
+        if token == "**/":
+            parts.append("(?:.*/)?")
+        elif token == "**":
+            parts.append(".*")
+        elif token == "*":
+            parts.append("[^/]*")
+        elif token == "?":
+            parts.append("[^/]")
+        else:
+            parts.append(re.escape(token))
+    return re.compile("".join(parts))
+
+
+def _literal(glob: str) -> str:
+    """Longest wildcard-free run of glob; every match contains it."""
+    return max(re.split(r"[*?]+", glob), key=len)
+
+
+class PathIndex:
+    """Chunk id → file path, for resolving path scopes to chunk ids.
+
+    Like the other sidecars, the database is created on the first write.
+    Resolved scopes are cached until the index changes, which SQLite's
+    data_version reports for writes from other connections too.
+    """
+
+    def __init__(self, persist_dir: str) -> None:
+        self._path = Path(persist_dir) / _SIDECAR_FILE
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._cache: OrderedDict[tuple, list[str]] = OrderedDict()
+        self._count: int | None = None
+        self._version: int | None = None
+
+    def put(self, chunk_ids: Sequence[str], metadatas: Sequence[dict]) -> None:
+        """Record the file of each chunk; chunks without a file are skipped."""
+        rows = [
+            (id_, meta.get("repo", ""), meta.get("source", ""), meta["file_path"])
+            for id_, meta in zip(chunk_ids, metadatas, strict=True)
+            if meta.get("file_path")
+        ]
+        with self._lock:
+            conn = self._connect(create=bool(rows))
+            if conn is None:
+                return
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)", rows
+                )
+            self._invalidate()
+
+    def delete(self, chunk_ids: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                for i in range(0, len(chunk_ids), _SQL_BATCH):
+                    batch = list(chunk_ids[i : i + _SQL_BATCH])
+                    marks = ",".join("?" * len(batch))
+                    conn.execute(
+                        f"DELETE FROM chunks WHERE chunk_id IN ({marks})", batch
+                    )
+            self._invalidate()
+
+    def ensure_built(self, collection: Any) -> None:
+        """Index the collection's existing chunks, once per KB."""
+        with self._lock:
+            conn = self._connect(create=True)
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= _BUILT:
+                return
+            offset = 0
+            while True:
+                page = collection.get(
+                    include=["metadatas"], limit=_SCAN_PAGE_SIZE, offset=offset
+                )
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)",
+                        [
+                            (id_, meta.get("repo", ""), meta.get("source", ""), path)
+                            for id_, meta in zip(
+                                page["ids"], page["metadatas"], strict=True
+                            )
+                            if (path := meta.get("file_path"))
+                        ],
+                    )
+                if len(page["ids"]) < _SCAN_PAGE_SIZE:
+                    break
+                offset += _SCAN_PAGE_SIZE
+            conn.execute(f"PRAGMA user_version = {_BUILT}")
+            self._invalidate()
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return 0
+            self._check_version(conn)
+            if self._count is None:
+                self._count = conn.execute("SELECT count(*) FROM chunks").fetchone()[0]
+            return self._count
+
+    def chunk_ids(
+        self,
+        prefix: str | None = None,
+        glob: str | None = None,
+        repos: list[str] | None = None,
+        source_type: str | None = None,
+    ) -> list[str]:
+        """Ids of the chunks whose file matches prefix and glob.
+
+        The list may be cached and shared, so callers must not modify it.
+        """
+        if not prefix and not glob:
+            msg = "A path scope needs a prefix or a glob"
+            raise ValueError(msg)
+        filters, params = [], []
+        if repos:
+            filters.append(f"repo IN ({','.join('?' * len(repos))})")
+            params.extend(repos)
+        if source_type:
+            filters.append("source = ?")
+            params.append(source_type)
+        where, where_params = list(filters), list(params)
+        if prefix:
+            if prefix.startswith("/"):
+                where.append("substr(file_path, 1, length(?)) = ?")
+                where_params.extend([prefix, prefix])
+            else:
+                where.append(
+                    "(substr(file_path, 1, length(?)) = ? OR instr(file_path, ?))"
+                )
+                where_params.extend([prefix, prefix, "/" + prefix])
+        pattern = None
+        if glob:
+            pattern = glob_regex(glob)
+            # Cheap prefilter in SQLite before the regex runs per path
+            where.append("instr(file_path, ?)")
+            where_params.append(_literal(glob))
+
+        key = (prefix, glob, tuple(repos or ()), source_type)
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return []
+            self._check_version(conn)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            paths = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT file_path FROM chunks WHERE "
+                    + " AND ".join(where),
+                    where_params,
+                )
+            ]
+            if pattern is not None:
+                paths = [path for path in paths if pattern.fullmatch(path)]
+            # The same path can be stored under several repos
+            narrow = "".join(f" AND {clause}" for clause in filters)
+            ids: list[str] = []
+            for i in range(0, len(paths), _SQL_BATCH):
+                batch = paths[i : i + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                sql = f"SELECT chunk_id FROM chunks WHERE file_path IN ({marks})"
+                cursor = conn.execute(sql + narrow, [*batch, *params])
+                ids.extend(row[0] for row in cursor)
+            self._cache[key] = ids
+            while len(self._cache) > _CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return ids
+
+    def _check_version(self, conn: sqlite3.Connection) -> None:
+        # data_version changes when another connection commits
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._version:
+            self._version = version
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._cache.clear()
+        self._count = None
+
+    def _connect(self, create: bool) -> sqlite3.Connection | None:
+        if self._conn is None:
+            if not create and not self._path.exists():
+                return None
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks (chunk_id TEXT PRIMARY KEY, "
+                "repo TEXT NOT NULL, source TEXT NOT NULL, file_path TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunks_path ON chunks (file_path, repo)"
+            )
+            self._conn = conn
+        return self._conn
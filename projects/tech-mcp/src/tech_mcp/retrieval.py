@@ -1,14 +1,76 @@
 import json
 import logging
+import logging.handlers
+import math
+import threading
+from collections import OrderedDict
+from datetime import UTC, datetime
+from pathlib import Path
 
 import chromadb
+import numpy as np
+from chromadb.api.types import Embedding
 
+from tech_mcp import metrics
 from tech_mcp.config import Settings
 from tech_mcp.embeddings import OllamaEmbeddingFunction
+from tech_mcp.paths import PathIndex
 from tech_mcp.relationships import RelationshipGraph
+from tech_mcp.symbols import SymbolIndex
+from tech_mcp.timing import StageTimer
+from tech_mcp.vectors import RerankStore, StorageMode, rerank
 
 logger = logging.getLogger(__name__)
 
+_SLOW_LOG_MAX_BYTES = 5 * 1024 * 1024
+_SLOW_LOG_BACKUPS = 3
+_COLLAPSE_OVERFETCH = 3
+# Path scopes up to this many chunks are searched by brute force over their
+# stored vectors. Above it, Chroma's id-filtered query is quicker (~20 ms
+# on a 20k-chunk KB, whatever the scope size).
+_EXACT_SCOPE_MAX = 150
+# Most ids an unfiltered query fetches to be filtered to a scope; 500 ids
+# and distances cost about half an id-filtered query
+_SHORTLIST_MAX = 500
+
+
+class SlowQueryLog:
+    """Rotating JSON-lines log of searches slower than a threshold.
+
+    The file is opened on the first slow query, so nothing is created on
+    disk while searches stay fast. A threshold of 0 disables the log.
+    """
+
+    def __init__(self, path: str, threshold_ms: float) -> None:
+        self._path = Path(path)
+        self._threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+        self._logger: logging.Logger | None = None
+
+    def maybe_log(self, timing: dict, **fields: object) -> bool:
+        """Write a record if timing["total_ms"] exceeds the threshold."""
+        if self._threshold_ms <= 0 or timing["total_ms"] < self._threshold_ms:
+            return False
+        record = {"ts": datetime.now(UTC).isoformat(), **fields, "timing": timing}
+        self._get_logger().info(json.dumps(record))
+        return True
+
+    def _get_logger(self) -> logging.Logger:
+        with self._lock:
+            if self._logger is None:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    self._path,
+                    maxBytes=_SLOW_LOG_MAX_BYTES,
+                    backupCount=_SLOW_LOG_BACKUPS,
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                # Standalone logger: not registered globally, never propagates
+                slow_logger = logging.Logger("tech_mcp.slow_queries", logging.INFO)
+                slow_logger.addHandler(handler)
+                self._logger = slow_logger
+            return self._logger
+
 
 class Retrieval:
     """Semantic search across the knowledge base."""
@@ -18,12 +80,24 @@ class Retrieval:
         settings: Settings,
         graph: RelationshipGraph,
         embedding_fn: OllamaEmbeddingFunction,
+        collection_name: str = "knowledge_base",
     ) -> None:
         self._settings = settings
         self._graph = graph
         self._embedding_fn = embedding_fn
+        self._collection_name = collection_name
         self._client: chromadb.ClientAPI | None = None
         self._collection: chromadb.Collection | None = None
+        # LRU of query text → embedding; agents repeat queries a lot
+        self._query_cache: OrderedDict[str, Embedding] = OrderedDict()
+        # Guards the query cache and the (collection, embedding_fn) pair,
+        # which switch_collection replaces together
+        self._lock = threading.Lock()
+        self._slow_log = SlowQueryLog(settings.slow_query_log, settings.slow_query_ms)
+        self._rerank_store = RerankStore(settings.chroma_persist_dir)
+        self._symbols = SymbolIndex(settings.chroma_persist_dir)
+        self._paths = PathIndex(settings.chroma_persist_dir)
+        self._storage_mode = StorageMode.from_settings(settings)
 
     @property
     def client(self) -> chromadb.ClientAPI:
@@ -36,13 +110,39 @@ class Retrieval:
 
     @property
     def collection(self) -> chromadb.Collection:
-        if self._collection is None:
-            self._collection = self.client.get_or_create_collection(
-                name="knowledge_base",
-                embedding_function=self._embedding_fn,
-                metadata={"hnsw:space": "cosine"},
-            )
-        return self._collection
+        return self._active()[0]
+
+    def switch_collection(
+        self, name: str, embedding_fn: OllamaEmbeddingFunction
+    ) -> None:
+        """Search another collection from the next query on.
+
+        The collection and its embedding function change together, so no
+        search embeds with one model and queries the other's index.
+        """
+        collection = self._open_collection(name, embedding_fn)
+        with self._lock:
+            self._collection = collection
+            self._collection_name = name
+            self._embedding_fn = embedding_fn
+            self._query_cache.clear()
+
+    def _active(self) -> tuple[chromadb.Collection, OllamaEmbeddingFunction]:
+        with self._lock:
+            if self._collection is None:
+                self._collection = self._open_collection(
+                    self._collection_name, self._embedding_fn
+                )
+            return self._collection, self._embedding_fn
+
+    def _open_collection(
+        self, name: str, embedding_fn: OllamaEmbeddingFunction
+    ) -> chromadb.Collection:
+        return self.client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_fn,
+            metadata={"hnsw:space": "cosine", **self._storage_mode.metadata()},
+        )
 
     def search_kb(
         self,
@@ -50,57 +150,495 @@ class Retrieval:
         repos: list[str] | None = None,
         source_type: str | None = None,
         limit: int = 5,
+        debug_timing: bool = False,
+        timer: StageTimer | None = None,
+        collapse_duplicates: bool = False,
+        path_prefix: str | None = None,
+        path_glob: str | None = None,
     ) -> str:
-        """Semantic search across the full knowledge base."""
-        where_clauses: list[dict] = []
-        if repos:
-            if len(repos) == 1:
-                where_clauses.append({"repo": repos[0]})
-            else:
-                where_clauses.append({"repo": {"$in": repos}})
-        if source_type:
-            where_clauses.append({"source": source_type})
+        """Semantic search across the full knowledge base.
 
-        where = None
-        if len(where_clauses) == 1:
-            where = where_clauses[0]
-        elif len(where_clauses) > 1:
-            where = {"$and": where_clauses}
+        With debug_timing, the response includes a per-stage breakdown
+        under "timing". Searches slower than slow_query_ms are logged to
+        the slow-query log either way. With collapse_duplicates, hits
+        linked through "duplicate_of" fold into the best of them.
+        path_prefix and path_glob limit the search to matching files (see
+        tech_mcp.paths).
+        """
+        timer = timer or StageTimer()
+        cache_hit = False
+        # Collapsing folds hits together, so fetch extra to still fill limit
+        keep = limit * _COLLAPSE_OVERFETCH if collapse_duplicates else limit
 
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=limit,
-                where=where,
-                include=["documents", "metadatas", "distances"],
+            collection, embedding_fn = self._active()
+            scope = self._scope(
+                collection, path_prefix, path_glob, repos, source_type, timer
             )
+            if scope == []:
+                results = {"ids": [[]]}
+            else:
+                with timer.stage("embed"):
+                    query_embedding, cache_hit = self._embed_query(query, embedding_fn)
+                where = None if scope is not None else _search_where(repos, source_type)
+                results = self._nearest(
+                    collection, query_embedding, keep, where, scope, timer
+                )
         except Exception as exc:
             logger.exception("Search failed")
             return json.dumps({"error": str(exc)})
 
-        return self._format_results(results)
+        with timer.stage("format"):
+            payload = self._format_results(results, collapse_duplicates, limit)
+
+        timing = timer.as_ms()
+        timing["embed_cache_hit"] = cache_hit
+        self._slow_log.maybe_log(
+            timing,
+            query=query,
+            repos=repos,
+            source_type=source_type,
+            path_prefix=path_prefix,
+            path_glob=path_glob,
+            limit=limit,
+            result_count=payload["count"],
+        )
+        if debug_timing:
+            payload["timing"] = timing
+        return json.dumps(payload, indent=2 if payload["count"] else None)
 
     def search_related(
         self,
         query: str,
         repo: str,
         limit: int = 5,
+        debug_timing: bool = False,
+        collapse_duplicates: bool = False,
+        path_prefix: str | None = None,
+        path_glob: str | None = None,
     ) -> str:
         """Search a repo and its related repos."""
-        self._graph.validate_repo(repo)
-        related = self._graph.get_related_repos(repo)
+        timer = StageTimer()
+        with timer.stage("expand"):
+            self._graph.validate_repo(repo)
+            related = self._graph.get_related_repos(repo)
         all_repos = [repo, *related]
 
-        return self.search_kb(query=query, repos=all_repos, limit=limit)
+        return self.search_kb(
+            query=query,
+            repos=all_repos,
+            limit=limit,
+            debug_timing=debug_timing,
+            timer=timer,
+            collapse_duplicates=collapse_duplicates,
+            path_prefix=path_prefix,
+            path_glob=path_glob,
+        )
+
+    def search_similar(
+        self,
+        chunk_id: str | None = None,
+        file_path: str | None = None,
+        repos: list[str] | None = None,
+        source_type: str | None = None,
+        limit: int = 5,
+        debug_timing: bool = False,
+        collapse_duplicates: bool = False,
+        path_prefix: str | None = None,
+        path_glob: str | None = None,
+    ) -> str:
+        """Find chunks similar to a stored chunk, or to a whole file.
+
+        Queries with the stored embedding instead of embedding text, so
+        Ollama is never called. A file is represented by the mean of its
+        chunks' vectors. Chunks from the same file (or, for a session
+        chunk, the same session) are excluded from the results.
+        """
+        if (chunk_id is None) == (file_path is None):
+            return json.dumps({"error": "Pass exactly one of chunk_id or file_path"})
+        timer = StageTimer()
+        try:
+            collection = self.collection
+            with timer.stage("source"):
+                source = self._source_vector(collection, chunk_id, file_path)
+            if source is None:
+                missing = f"chunk '{chunk_id}'" if chunk_id else f"file '{file_path}'"
+                return json.dumps({"error": f"No stored {missing}"})
+            query_embedding, full, exclude = source
+            scope = self._scope(
+                collection, path_prefix, path_glob, repos, source_type, timer
+            )
+            if scope == []:
+                results = {"ids": [[]]}
+            else:
+                where = (
+                    exclude
+                    if scope is not None
+                    else _search_where(repos, source_type, exclude)
+                )
+                keep = limit * _COLLAPSE_OVERFETCH if collapse_duplicates else limit
+                results = self._nearest(
+                    collection, query_embedding, keep, where, scope, timer, full
+                )
+        except Exception as exc:
+            logger.exception("Similarity search failed")
+            return json.dumps({"error": str(exc)})
+
+        with timer.stage("format"):
+            payload = self._format_results(results, collapse_duplicates, limit)
+
+        timing = timer.as_ms()
+        self._slow_log.maybe_log(
+            timing,
+            chunk_id=chunk_id,
+            file_path=file_path,
+            repos=repos,
+            source_type=source_type,
+            path_prefix=path_prefix,
+            path_glob=path_glob,
+            limit=limit,
+            result_count=payload["count"],
+        )
+        if debug_timing:
+            payload["timing"] = timing
+        return json.dumps(payload, indent=2 if payload["count"] else None)
+
+    def _source_vector(
+        self,
+        collection: chromadb.Collection,
+        chunk_id: str | None,
+        file_path: str | None,
+    ) -> tuple[list[float], bool, dict] | None:
+        """Query vector for search_similar, from stored embeddings.
+
+        Returns (vector, is_full_vector, where clause excluding the source),
+        or None if nothing is stored under chunk_id or file_path. On a
+        reduced index the full vectors are used when all are available.
+        """
+        with metrics.CHROMA_SECONDS.time(op="get"):
+            if chunk_id is not None:
+                got = collection.get(
+                    ids=[chunk_id], include=["embeddings", "metadatas"]
+                )
+            else:
+                got = collection.get(
+                    where={"file_path": file_path},
+                    include=["embeddings", "metadatas"],
+                )
+        ids = got["ids"]
+        if not ids:
+            return None
+
+        mode = StorageMode.from_collection(collection)
+        vectors = got["embeddings"]
+        full = not mode.reduced
+        if mode.reranks:
+            stored = self._rerank_store.get(collection.name, ids)
+            if all(id_ in stored for id_ in ids):
+                vectors = [stored[id_] for id_ in ids]
+                full = True
+        centroid = [float(sum(col)) / len(ids) for col in zip(*vectors, strict=True)]
 
-    def _format_results(self, results: dict) -> str:
-        """Format ChromaDB results into a readable JSON string."""
+        meta = got["metadatas"][0]
+        if meta.get("file_path"):
+            exclude = {"file_path": {"$ne": meta["file_path"]}}
+        else:
+            exclude = {"ingest_session_id": {"$ne": meta["ingest_session_id"]}}
+        return centroid, full, exclude
+
+    def lookup_symbol(
+        self,
+        name: str,
+        repos: list[str] | None = None,
+        kind: str | None = None,
+        limit: int = 20,
+        include_content: bool = False,
+    ) -> str:
+        """Find where a symbol is defined, from the symbol index.
+
+        No embedding or vector search is involved. With include_content,
+        each result carries its chunk's text, fetched from Chroma by id.
+        """
+        results = self._symbols.lookup(name, repos, kind, limit)
+        if include_content and results:
+            chunk_ids = list(dict.fromkeys(r["chunk_id"] for r in results))
+            try:
+                with metrics.CHROMA_SECONDS.time(op="get"):
+                    got = self.collection.get(ids=chunk_ids, include=["documents"])
+            except Exception as exc:
+                logger.exception("Symbol content fetch failed")
+                return json.dumps({"error": str(exc)})
+            documents = dict(zip(got["ids"], got["documents"], strict=True))
+            for result in results:
+                result["content"] = documents.get(result["chunk_id"], "")
+        payload = {"results": results, "count": len(results)}
+        return json.dumps(payload, indent=2 if results else None)
+
+    def warm_up(self) -> dict:
+        """Open the collection, preload the embedding model and touch the index.
+
+        Returns a dict describing what was warmed. Embedding failures are
+        reported rather than raised so the index still gets loaded.
+        """
+        collection, embedding_fn = self._active()
+        count = collection.count()
+        report: dict = {"chunks": count, "model_loaded": False, "index_loaded": False}
+
+        try:
+            embedding_fn(["warmup"])
+            report["model_loaded"] = True
+        except Exception as exc:
+            logger.warning("Warmup embed failed: %s", exc)
+            report["model_error"] = str(exc)
+
+        if count > 0:
+            # Query with a stored vector so the HNSW segment loads even when
+            # Ollama is down (or serving a different dimension).
+            stored = collection.peek(limit=1)["embeddings"][0]
+            collection.query(query_embeddings=[stored], n_results=1)
+            report["index_loaded"] = True
+        return report
+
+    def _embed_query(
+        self, query: str, embedding_fn: OllamaEmbeddingFunction
+    ) -> tuple[Embedding, bool]:
+        """Embed a query, serving repeats from the LRU cache.
+
+        Returns (embedding, cache_hit).
+        """
+        max_size = self._settings.query_cache_size
+        if max_size > 0:
+            with self._lock:
+                cached = self._query_cache.get(query)
+                if cached is not None:
+                    self._query_cache.move_to_end(query)
+            if cached is not None:
+                metrics.CACHE_REQUESTS.inc(cache="query_embedding", result="hit")
+                return cached, True
+            metrics.CACHE_REQUESTS.inc(cache="query_embedding", result="miss")
+
+        embedding = embedding_fn([query])[0]
+        # Skip caching if the collection was switched while embedding
+        if max_size > 0:
+            with self._lock:
+                if embedding_fn is not self._embedding_fn:
+                    return embedding, False
+                self._query_cache[query] = embedding
+                self._query_cache.move_to_end(query)
+                while len(self._query_cache) > max_size:
+                    self._query_cache.popitem(last=False)
+        return embedding, False
+
+    def _scope(
+        self,
+        collection: chromadb.Collection,
+        prefix: str | None,
+        glob: str | None,
+        repos: list[str] | None,
+        source_type: str | None,
+        timer: StageTimer,
+    ) -> list[str] | None:
+        """Ids of the chunks in a path scope, or None if there is no scope.
+
+        The repo and source filters are applied to the ids too.
+        """
+        if not prefix and not glob:
+            return None
+        with timer.stage("scope"):
+            self._paths.ensure_built(collection)
+            return self._paths.chunk_ids(prefix, glob, repos, source_type)
+
+    def _nearest(
+        self,
+        collection: chromadb.Collection,
+        query_embedding: Embedding,
+        keep: int,
+        where: dict | None,
+        scope: list[str] | None,
+        timer: StageTimer,
+        full: bool = True,
+    ) -> dict:
+        """The keep chunks closest to query_embedding, as query() results.
+
+        full says whether query_embedding has every dimension; only then
+        can a reduced index be reranked. With a scope, the cheapest of
+        three plans is used. A small scope is searched exactly. A scope
+        that is a large share of the KB is filtered out of an unfiltered
+        index query for ids only. Anything else is an index query limited
+        to the scope's ids, which Chroma answers more slowly than either.
+        """
+        mode = StorageMode.from_collection(collection)
+        if scope is not None and len(scope) <= _EXACT_SCOPE_MAX:
+            with timer.stage("query"):
+                return self._exact(
+                    collection, mode, query_embedding, keep, where, scope, full
+                )
+        # A reduced index only shortlists; full vectors pick the top results
+        reranks = mode.reranks and full
+        n_results = keep * self._settings.rerank_candidates if reranks else keep
+        results = None
+        with timer.stage("query"):
+            if scope is not None and where is None:
+                results = self._shortlist(
+                    collection, mode, query_embedding, n_results, scope
+                )
+            if results is None:
+                with metrics.CHROMA_SECONDS.time(op="query"):
+                    results = collection.query(
+                        query_embeddings=mode.reduce([query_embedding]),
+                        n_results=n_results,
+                        where=where,
+                        ids=scope,
+                        include=["documents", "metadatas", "distances"],
+                    )
+        if reranks:
+            with timer.stage("rerank"):
+                results = self._rerank(collection, query_embedding, results, keep)
+        return results
+
+    def _exact(
+        self,
+        collection: chromadb.Collection,
+        mode: StorageMode,
+        query_embedding: Embedding,
+        keep: int,
+        where: dict | None,
+        ids: list[str],
+        full: bool,
+    ) -> dict:
+        """Brute-force nearest of ids by cosine distance to their stored vectors.
+
+        On a reduced index the full vectors are used when all are stored.
+        """
+        with metrics.CHROMA_SECONDS.time(op="get"):
+            got = collection.get(ids=ids, where=where, include=["embeddings"])
+        candidates = got["ids"]
+        if not candidates:
+            return {"ids": [[]]}
+        vectors = got["embeddings"]
+        query = mode.reduce([query_embedding])[0]
+        if mode.reranks and full:
+            stored = self._rerank_store.get(collection.name, candidates)
+            if len(stored) == len(candidates):
+                vectors = [stored[id_] for id_ in candidates]
+                query = query_embedding
+        matrix = np.asarray(vectors, dtype=np.float64)
+        query = np.asarray(query, dtype=np.float64)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        # A zero vector is at distance 1 from everything, as in cosine_distance
+        distances = 1.0 - (matrix @ query) / np.where(norms == 0, np.inf, norms)
+        top = np.argsort(distances, kind="stable")[:keep]
+        return self._fetch(
+            collection, [candidates[i] for i in top], [float(distances[i]) for i in top]
+        )
+
+    def _shortlist(
+        self,
+        collection: chromadb.Collection,
+        mode: StorageMode,
+        query_embedding: Embedding,
+        n_results: int,
+        scope: list[str],
+    ) -> dict | None:
+        """Nearest n_results of scope from an unfiltered index query.
+
+        Fetches enough ids and distances that scope should fill n_results
+        about twice over, going by its share of the indexed chunks. Returns
+        None if that is too many, or if the scope did not fill n_results.
+        """
+        fetch = math.ceil(n_results * self._paths.count() / len(scope) * 2)
+        if fetch > _SHORTLIST_MAX:
+            return None
+        with metrics.CHROMA_SECONDS.time(op="query"):
+            got = collection.query(
+                query_embeddings=mode.reduce([query_embedding]),
+                n_results=fetch,
+                include=["distances"],
+            )
+        in_scope = set(scope)
+        hits = [
+            (id_, distance)
+            for id_, distance in zip(got["ids"][0], got["distances"][0], strict=True)
+            if id_ in in_scope
+        ][:n_results]
+        # Fewer results than fetched means the whole KB was seen
+        if len(hits) < n_results and len(got["ids"][0]) == fetch:
+            return None
+        return self._fetch(
+            collection, [id_ for id_, _ in hits], [distance for _, distance in hits]
+        )
+
+    def _fetch(
+        self, collection: chromadb.Collection, ids: list[str], distances: list[float]
+    ) -> dict:
+        """query()-shaped results for ids, in order, with their distances."""
+        if not ids:
+            return {"ids": [[]]}
+        with metrics.CHROMA_SECONDS.time(op="get"):
+            got = collection.get(ids=ids, include=["documents", "metadatas"])
+        # get() does not return ids in the order asked for
+        order = {id_: i for i, id_ in enumerate(got["ids"])}
+        return {
+            "ids": [ids],
+            "documents": [[got["documents"][order[id_]] for id_ in ids]],
+            "metadatas": [[got["metadatas"][order[id_]] for id_ in ids]],
+            "distances": [distances],
+        }
+
+    def _rerank(
+        self,
+        collection: chromadb.Collection,
+        query_embedding: Embedding,
+        results: dict,
+        limit: int,
+    ) -> dict:
+        """Reorder candidates by full-vector distance and keep the top limit.
+
+        Falls back to index order when some candidate has no stored full
+        vector, e.g. chunks restored from a snapshot.
+        """
+        ids = results["ids"][0]
+        stored = self._rerank_store.get(collection.name, ids)
+        order = rerank(query_embedding, ids, stored)
+        if order is None:
+            logger.debug("Rerank skipped: %d candidates lack full vectors", len(ids))
+            order = list(enumerate(results["distances"][0]))
+        order = order[:limit]
+        return {
+            "ids": [[ids[i] for i, _ in order]],
+            "documents": [[results["documents"][0][i] for i, _ in order]],
+            "metadatas": [[results["metadatas"][0][i] for i, _ in order]],
+            "distances": [[distance for _, distance in order]],
+        }
+
+    def _format_results(
+        self, results: dict, collapse: bool = False, limit: int | None = None
+    ) -> dict:
+        """Format ChromaDB results into a JSON-ready response payload.
+
+        With collapse, a hit whose chunk is a near-duplicate of an earlier
+        (closer) hit is listed under that hit's "duplicates" instead.
+        """
         if not results["ids"] or not results["ids"][0]:
-            return json.dumps({"results": [], "count": 0})
+            return {"results": [], "count": 0}
 
         formatted = []
+        groups: dict[str, dict] = {}
         for i, doc_id in enumerate(results["ids"][0]):
             meta = results["metadatas"][0][i]
+            if collapse:
+                group = meta.get("duplicate_of") or doc_id
+                best = groups.get(group)
+                if best is not None:
+                    best["duplicates"].append(
+                        {
+                            "id": doc_id,
+                            "repo": meta.get("repo", ""),
+                            "file_path": meta.get("file_path", ""),
+                            "distance": results["distances"][0][i],
+                        }
+                    )
+                    continue
             entry = {
                 "id": doc_id,
                 "content": results["documents"][0][i],
@@ -111,9 +649,33 @@ class Retrieval:
                 "heading_context": meta.get("heading_context", ""),
                 "tags": meta.get("tags", ""),
             }
+            if meta.get("ref"):
+                entry["ref"] = meta["ref"]
+            if collapse:
+                entry["duplicates"] = []
+                groups[group] = entry
             formatted.append(entry)
 
-        return json.dumps(
-            {"results": formatted, "count": len(formatted)},
-            indent=2,
-        )
+        formatted = formatted[:limit]
+        return {"results": formatted, "count": len(formatted)}
+
+
+def _search_where(
+    repos: list[str] | None, source_type: str | None, *extra: dict
+) -> dict | None:
+    """Chroma where filter for the repo/source filters plus extra clauses."""
+    where_clauses: list[dict] = []
+    if repos:
+        if len(repos) == 1:
+            where_clauses.append({"repo": repos[0]})
+        else:
+            where_clauses.append({"repo": {"$in": repos}})
+    if source_type:
+        where_clauses.append({"source": source_type})
+    where_clauses.extend(extra)
+
+    if not where_clauses:
+        return None
+    if len(where_clauses) == 1:
+        return where_clauses[0]
+    return {"$and": where_clauses}
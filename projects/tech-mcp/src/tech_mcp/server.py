@@ -1,13 +1,28 @@
+import asyncio
+import functools
 import json
 import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
 
+from tech_mcp import metrics, snapshot
 from tech_mcp.config import _load_settings
-from tech_mcp.embeddings import OllamaEmbeddingFunction, check_ollama
-from tech_mcp.ingestion import Ingestion
-from tech_mcp.relationships import RelationshipGraph
-from tech_mcp.retrieval import Retrieval
+from tech_mcp.executor import INGEST, MAINTENANCE, SEARCH, ToolExecutor
+from tech_mcp.warmup import Warmup
+
+if TYPE_CHECKING:
+    from tech_mcp.ingestion import Ingestion
+    from tech_mcp.migration import EmbeddingMigration
+    from tech_mcp.relationships import RelationshipGraph
+    from tech_mcp.retrieval import Retrieval
+    from tech_mcp.watch import RepoWatcher
 
 settings = _load_settings()
 
@@ -17,58 +32,261 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Check Ollama connectivity at startup (warn, don't crash)
-_ollama_ok = check_ollama(settings.ollama_host, settings.ollama_embed_model)
 
-mcp = FastMCP(
+@asynccontextmanager
+async def _session_lifespan(_server: FastMCP) -> AsyncIterator[None]:
+    # Entered per session: once, as the transport comes up, for stdio
+    start_background_tasks()
+    yield
+
+
+def _start_with_app(app: Starlette) -> Starlette:
+    """Start background tasks from an HTTP app's lifespan, at server start
+    rather than when the first client opens a session."""
+    inner = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[Any]:
+        start_background_tasks()
+        async with inner(app) as state:
+            yield state
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+class _FastMCP(FastMCP):
+    """FastMCP whose HTTP apps start background tasks on startup."""
+
+    def streamable_http_app(self) -> Starlette:
+        return _start_with_app(super().streamable_http_app())
+
+    def sse_app(self, mount_path: str | None = None) -> Starlette:
+        return _start_with_app(super().sse_app(mount_path))
+
+
+mcp = _FastMCP(
     "tech-mcp",
     host=settings.mcp_host,
     port=settings.port,
+    lifespan=_session_lifespan,
 )
 
-# Shared dependencies
-_embedding_fn = OllamaEmbeddingFunction(
-    host=settings.ollama_host,
-    model=settings.ollama_embed_model,
-    batch_size=settings.embed_batch_size,
-)
-_graph = RelationshipGraph(settings.relationships_file)
-_ingestion = Ingestion(settings, _graph, _embedding_fn)
-_retrieval = Retrieval(settings, _graph, _embedding_fn)
+# Tool bodies block on Chroma, Ollama and the filesystem, so they run on
+# per-lane thread pools instead of the event loop.
+_executor = ToolExecutor(settings)
+
+
+# ── Shared dependencies ──────────────────────────────────────────────────────
+
+# chromadb and langchain dominate import time, so nothing that pulls them in
+# is imported or constructed until the first tool call needs it.
+
+
+@dataclass(frozen=True)
+class _Dependencies:
+    graph: "RelationshipGraph"
+    ingestion: "Ingestion"
+    retrieval: "Retrieval"
+    migration: "EmbeddingMigration"
+
+
+_deps: _Dependencies | None = None
+_deps_lock = threading.Lock()
+
+
+def _get_deps() -> _Dependencies:
+    """Build shared dependencies on first use. Blocking — call off the loop."""
+    global _deps
+    if _deps is None:
+        with _deps_lock:
+            if _deps is None:
+                _deps = _build_deps()
+    return _deps
+
+
+def _build_deps() -> _Dependencies:
+    from tech_mcp.migration import (
+        EmbeddingMigration,
+        ollama_embedding_factory,
+        open_ingestion,
+    )
+    from tech_mcp.relationships import RelationshipGraph
+    from tech_mcp.retrieval import Retrieval
+
+    make_embedding_fn = ollama_embedding_factory(settings)
+    graph = RelationshipGraph(settings.relationships_file)
+    # The KB's recorded model wins over OLLAMA_EMBED_MODEL, so changing the
+    # env var never mixes vector spaces; a migration switches models.
+    ingestion = open_ingestion(settings, graph, make_embedding_fn)
+    retrieval = Retrieval(
+        settings, graph, ingestion.embedding_fn, ingestion.collection_name
+    )
+    migration = EmbeddingMigration(settings, ingestion, retrieval, make_embedding_fn)
+    migration.recover()
+    if migration.state.model != settings.ollama_embed_model:
+        logger.warning(
+            "Knowledge base is embedded with '%s'; OLLAMA_EMBED_MODEL='%s' "
+            "takes effect after migrate_embedding_model",
+            migration.state.model,
+            settings.ollama_embed_model,
+        )
+    return _Dependencies(
+        graph=graph,
+        ingestion=ingestion,
+        retrieval=retrieval,
+        migration=migration,
+    )
+
+
+async def _call(lane: str, fn: Callable[[_Dependencies], Any]) -> Any:
+    """Run fn(deps) on the given executor lane."""
+    return await _executor.run(lane, lambda: fn(_get_deps()))
+
+
+def _timed(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Record tool latency in metrics. Apply beneath @mcp.tool()."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await fn(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            metrics.TOOL_SECONDS.observe(
+                time.perf_counter() - start, tool=fn.__name__, outcome=outcome
+            )
+
+    return wrapper
+
+
+def _collection_size() -> int | None:
+    # Only report once dependencies exist; a scrape must not build them
+    if _deps is None:
+        return None
+    return _deps.retrieval.collection.count()
+
+
+metrics.COLLECTION_CHUNKS.set_function(_collection_size)
+
+
+def log_ollama_status() -> None:
+    """Warn if Ollama is unreachable or the model is missing. Blocking."""
+    from tech_mcp.embeddings import check_ollama
+
+    check_ollama(settings.ollama_host, settings.ollama_embed_model)
+
+
+# Opens the collection, preloads the embedding model and touches the HNSW
+# index so the first search after a restart is not the slow one.
+_warmup = Warmup(settings.warmup_enabled, lambda: _get_deps().retrieval.warm_up())
+
+
+_watcher: "RepoWatcher | None" = None
+
+
+def start_watcher() -> None:
+    """Watch repos that have a "path" in relationships.json. Blocking."""
+    global _watcher
+    from tech_mcp.watch import RepoWatcher, watched_repos
+
+    deps = _get_deps()
+    repos = watched_repos(deps.graph)
+    if not repos:
+        logger.warning('WATCH_ENABLED is set but no repo has a "path" to watch')
+        return
+    _watcher = RepoWatcher(
+        deps.ingestion,
+        repos,
+        debounce_ms=settings.watch_debounce_ms,
+        rate=settings.watch_rate,
+        polling=settings.watch_polling,
+        poll_seconds=settings.watch_poll_seconds,
+    )
+    _watcher.start()
+
+
+def _watch_status() -> dict:
+    if not settings.watch_enabled:
+        return {"status": "disabled"}
+    if _watcher is None:
+        return {"status": "pending"}
+    return {"status": "running", **_watcher.status()}
+
 
+_background_started = threading.Event()
 
-# ── Health endpoint ──────────────────────────────────────────────────────────
+
+def start_background_tasks() -> None:
+    """Start startup work that must not delay the transport. Runs once."""
+    if _background_started.is_set():
+        return
+    _background_started.set()
+    threading.Thread(target=log_ollama_status, daemon=True).start()
+    _warmup.start()
+    if settings.watch_enabled:
+        threading.Thread(target=start_watcher, daemon=True).start()
+
+
+# ── Health and metrics endpoints ─────────────────────────────────────────────
 
 
 @mcp.custom_route("/health", methods=["GET"])
 async def health(request):
     from starlette.responses import JSONResponse
 
-    ollama_ok = check_ollama(settings.ollama_host, settings.ollama_embed_model)
-    try:
-        _ingestion.client.heartbeat()
-        chroma_ok = True
-    except Exception:
-        chroma_ok = False
+    ollama_ok, chroma_ok = await asyncio.to_thread(_check_backends)
 
     return JSONResponse(
         {
             "status": "ok",
             "ollama": ollama_ok,
             "chroma": chroma_ok,
+            "warmup": _warmup.status(),
+            "watch": _watch_status(),
         }
     )
 
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request):
+    from starlette.responses import PlainTextResponse
+
+    # Rendering may call collection.count(), so keep it off the event loop
+    body = await asyncio.to_thread(metrics.REGISTRY.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+def _check_backends() -> tuple[bool, bool]:
+    """Return (ollama_ok, chroma_ok). Blocking — call off the event loop."""
+    from tech_mcp.embeddings import check_ollama
+
+    ollama_ok = check_ollama(settings.ollama_host, settings.ollama_embed_model)
+    try:
+        _get_deps().ingestion.client.heartbeat()
+        chroma_ok = True
+    except Exception:
+        chroma_ok = False
+    return ollama_ok, chroma_ok
+
+
 # ── Search Tools ─────────────────────────────────────────────────────────────
 
 
 @mcp.tool()
-def search_kb(
+@_timed
+async def search_kb(
     query: str,
     repos: list[str] | None = None,
     source_type: str | None = None,
     limit: int = 5,
+    debug_timing: bool = False,
+    collapse_duplicates: bool = False,
+    path_prefix: str | None = None,
+    path_glob: str | None = None,
 ) -> str:
     """Semantic search across the full knowledge base.
 
@@ -77,15 +295,41 @@ def search_kb(
         repos: Optional list of repo names to restrict search to.
         source_type: Optional filter — "doc", "code", or "session".
         limit: Maximum number of results to return.
+        debug_timing: Include a per-stage timing breakdown (ms) in the
+            response.
+        collapse_duplicates: Fold near-duplicate chunks (the same LICENSE
+            or boilerplate in several repos) into one result that lists
+            the others under "duplicates".
+        path_prefix: Optional path prefix, e.g. "internal/auth/". A
+            relative prefix matches at any directory boundary.
+        path_glob: Optional path glob, e.g. "*.yaml" or "deploy/**/*.yml".
+            "*" stays within a directory; "**" spans any number.
     """
-    return _retrieval.search_kb(query, repos, source_type, limit)
+    return await _call(
+        SEARCH,
+        lambda d: d.retrieval.search_kb(
+            query,
+            repos,
+            source_type,
+            limit,
+            debug_timing=debug_timing,
+            collapse_duplicates=collapse_duplicates,
+            path_prefix=path_prefix,
+            path_glob=path_glob,
+        ),
+    )
 
 
 @mcp.tool()
-def search_related(
+@_timed
+async def search_related(
     query: str,
     repo: str,
     limit: int = 5,
+    debug_timing: bool = False,
+    collapse_duplicates: bool = False,
+    path_prefix: str | None = None,
+    path_glob: str | None = None,
 ) -> str:
     """Expand search to include related repos via the relationship graph.
 
@@ -95,15 +339,111 @@ def search_related(
         query: Natural language search query.
         repo: Starting repo — related repos are included automatically.
         limit: Maximum number of results to return.
+        debug_timing: Include a per-stage timing breakdown (ms) in the
+            response.
+        collapse_duplicates: Fold near-duplicate chunks into one result.
+        path_prefix: Optional path prefix, as for search_kb.
+        path_glob: Optional path glob, as for search_kb.
+    """
+    return await _call(
+        SEARCH,
+        lambda d: d.retrieval.search_related(
+            query,
+            repo,
+            limit,
+            debug_timing=debug_timing,
+            collapse_duplicates=collapse_duplicates,
+            path_prefix=path_prefix,
+            path_glob=path_glob,
+        ),
+    )
+
+
+@mcp.tool()
+@_timed
+async def search_similar(
+    chunk_id: str | None = None,
+    file_path: str | None = None,
+    repos: list[str] | None = None,
+    source_type: str | None = None,
+    limit: int = 5,
+    debug_timing: bool = False,
+    collapse_duplicates: bool = False,
+    path_prefix: str | None = None,
+    path_glob: str | None = None,
+) -> str:
+    """Find chunks similar to one already in the knowledge base.
+
+    Searches with the stored embedding of a chunk (or the mean of a
+    file's chunks) instead of re-embedding its text, so it works while
+    Ollama is down. Chunks from the same file are left out.
+
+    Args:
+        chunk_id: Id of a chunk from an earlier result ("id" field).
+        file_path: Path of an ingested file, instead of chunk_id.
+        repos: Optional list of repo names to restrict search to.
+        source_type: Optional filter — "doc", "code", or "session".
+        limit: Maximum number of results to return.
+        debug_timing: Include a per-stage timing breakdown (ms) in the
+            response.
+        collapse_duplicates: Fold near-duplicate chunks into one result.
+        path_prefix: Optional path prefix, as for search_kb.
+        path_glob: Optional path glob, as for search_kb.
     """
-    return _retrieval.search_related(query, repo, limit)
+    return await _call(
+        SEARCH,
+        lambda d: d.retrieval.search_similar(
+            chunk_id,
+            file_path,
+            repos,
+            source_type,
+            limit,
+            debug_timing=debug_timing,
+            collapse_duplicates=collapse_duplicates,
+            path_prefix=path_prefix,
+            path_glob=path_glob,
+        ),
+    )
+
+
+@mcp.tool()
+@_timed
+async def lookup_symbol(
+    name: str,
+    repos: list[str] | None = None,
+    kind: str | None = None,
+    limit: int = 20,
+    include_content: bool = False,
+) -> str:
+    """Find where a function, class, type or env var is defined.
+
+    Exact lookup in the symbol index built while ingesting code — faster
+    and more precise than search_kb for "where is X defined". Matches the
+    full name ("HostPool.acquire") or its last part ("acquire"), ignoring
+    case.
+
+    Args:
+        name: Symbol or environment variable name.
+        repos: Optional list of repo names to restrict the lookup to.
+        kind: Optional filter — "function", "method", "class", "type",
+            "interface", "enum", "const", "env", ...
+        limit: Maximum number of results to return.
+        include_content: Include the text of each defining chunk.
+    """
+    return await _call(
+        SEARCH,
+        lambda d: d.retrieval.lookup_symbol(
+            name, repos, kind, limit, include_content=include_content
+        ),
+    )
 
 
 # ── Session Ingestion Tools ──────────────────────────────────────────────────
 
 
 @mcp.tool()
-def ingest_session(
+@_timed
+async def ingest_session(
     problem: str,
     attempts: list[dict[str, str]],
     root_cause: str,
@@ -126,17 +466,49 @@ def ingest_session(
         tags: Optional tags for categorisation (e.g. "caddy", "502",
             "docker").
     """
-    session_id = _ingestion.ingest_session(
-        problem, attempts, root_cause, solution, repos, tags
+    session_id = await _call(
+        INGEST,
+        lambda d: d.ingestion.ingest_session(
+            problem, attempts, root_cause, solution, repos, tags
+        ),
     )
     return json.dumps({"ingest_session_id": session_id})
 
 
+@mcp.tool()
+@_timed
+async def ingest_sessions(path: str) -> str:
+    """Ingest many debugging sessions from a JSONL file in one call.
+
+    Each line is one session with the ingest_session fields (problem,
+    attempts, root_cause, solution, repos, optional tags) and an optional
+    ISO "date" for when it happened. Every line is validated first; if any
+    is invalid, nothing is ingested and the error lists the bad lines.
+    Chunks from all sessions are embedded and written in large batches.
+    Re-ingesting the same file replaces its sessions rather than adding
+    copies.
+
+    Args:
+        path: Absolute path to the JSONL file on the server.
+    """
+    summary = await _call(INGEST, lambda d: _ingest_sessions_file(d, path))
+    return json.dumps(summary)
+
+
+def _ingest_sessions_file(deps: _Dependencies, path: str) -> dict:
+    from tech_mcp.sessions import parse_sessions
+
+    with open(path) as fh:
+        sessions = parse_sessions(fh, deps.graph)
+    return deps.ingestion.ingest_sessions(sessions)
+
+
 # ── Document Ingestion Tools ─────────────────────────────────────────────────
 
 
 @mcp.tool()
-def ingest_file(
+@_timed
+async def ingest_file(
     path: str,
     repo_name: str,
     related_repos: list[str] | None = None,
@@ -150,30 +522,83 @@ def ingest_file(
         repo_name: Repo name (must exist in relationships.json).
         related_repos: Optional list of related repo names.
     """
-    count, session_id = _ingestion.ingest_file(path, repo_name, related_repos)
+    count, session_id = await _call(
+        INGEST, lambda d: d.ingestion.ingest_file(path, repo_name, related_repos)
+    )
     return json.dumps({"chunk_count": count, "ingest_session_id": session_id})
 
 
 @mcp.tool()
-def ingest_directory(
+@_timed
+async def ingest_directory(
     path: str,
     repo_name: str,
     related_repos: list[str] | None = None,
     extensions: list[str] | None = None,
+    resume: bool = True,
 ) -> str:
     """Ingest all supported files in a directory.
 
     Skips: node_modules, vendor, .git, __pycache__, dist, build, .venv.
 
+    Generated files (lockfiles, minified bundles, "DO NOT EDIT" output) are
+    skipped and totalled under generated_skipped, unless GENERATED_FILES or
+    the repo's "generated" entry in relationships.json says otherwise.
+
     Default extensions: .md, .py, .go, .js, .ts, .yaml, .yml, .toml
 
+    If an earlier run over the same directory was interrupted or had failed
+    files, the files it finished are skipped (when unchanged since).
+
     Args:
         path: Absolute path to the directory.
         repo_name: Repo name (must exist in relationships.json).
         related_repos: Optional list of related repo names.
         extensions: Optional list of file extensions to include.
+        resume: Pick up an unfinished earlier run (default True). False
+            re-ingests every file.
     """
-    summary = _ingestion.ingest_directory(path, repo_name, related_repos, extensions)
+    summary = await _call(
+        INGEST,
+        lambda d: d.ingestion.ingest_directory(
+            path, repo_name, related_repos, extensions, resume
+        ),
+    )
+    return json.dumps(summary)
+
+
+@mcp.tool()
+@_timed
+async def ingest_archive(
+    source: str,
+    repo_name: str,
+    ref: str | None = None,
+    related_repos: list[str] | None = None,
+    extensions: list[str] | None = None,
+) -> str:
+    """Ingest files from a tar/zip archive, or a git repository at a ref.
+
+    Files are read straight from the archive (or `git archive` output), so
+    nothing is checked out or extracted. They are stored as
+    "<source>@<ref>/<path>" with the ref in their metadata; files stored
+    under that prefix before but missing now are removed. Same filters and
+    generated-file handling as ingest_directory.
+
+    Args:
+        source: Absolute path to a .tar, .tar.gz, .tgz, .tar.xz or .zip file,
+            or to a git repository when ref is given.
+        repo_name: Repo name (must exist in relationships.json).
+        ref: Git branch, tag or commit to ingest; for an archive, an
+            optional label such as its release tag.
+        related_repos: Optional list of related repo names.
+        extensions: Optional list of file extensions to include.
+    """
+    summary = await _call(
+        INGEST,
+        lambda d: d.ingestion.ingest_archive(
+            source, repo_name, ref, related_repos, extensions
+        ),
+    )
     return json.dumps(summary)
 
 
@@ -181,7 +606,8 @@ def ingest_directory(
 
 
 @mcp.tool()
-def list_recent_ingestions(limit: int = 20) -> str:
+@_timed
+async def list_recent_ingestions(limit: int = 20) -> str:
     """List recent ingestion sessions.
 
     Shows: ingest_session_id, timestamp, source type, repo, chunk count.
@@ -189,35 +615,44 @@ def list_recent_ingestions(limit: int = 20) -> str:
     Args:
         limit: Maximum number of sessions to return.
     """
-    sessions = _ingestion.list_recent_ingestions(limit)
+    sessions = await _call(
+        MAINTENANCE, lambda d: d.ingestion.list_recent_ingestions(limit)
+    )
     return json.dumps(sessions, indent=2)
 
 
 @mcp.tool()
-def forget_session(ingest_session_id: str) -> str:
+@_timed
+async def forget_session(ingest_session_id: str) -> str:
     """Delete all chunks from a specific ingestion session.
 
     Args:
         ingest_session_id: The UUID returned by an ingestion tool.
     """
-    count = _ingestion.delete_by_session(ingest_session_id)
+    count = await _call(
+        MAINTENANCE, lambda d: d.ingestion.delete_by_session(ingest_session_id)
+    )
     return json.dumps({"deleted_chunks": count})
 
 
 @mcp.tool()
-def forget_file(path: str, repo_name: str) -> str:
+@_timed
+async def forget_file(path: str, repo_name: str) -> str:
     """Delete all chunks for a specific file.
 
     Args:
         path: The file path used during ingestion.
         repo_name: The repo name used during ingestion.
     """
-    count = _ingestion.delete_by_file(path, repo_name)
+    count = await _call(
+        MAINTENANCE, lambda d: d.ingestion.delete_by_file(path, repo_name)
+    )
     return json.dumps({"deleted_chunks": count})
 
 
 @mcp.tool()
-def forget_repo(repo_name: str, confirm: bool = False) -> str:
+@_timed
+async def forget_repo(repo_name: str, confirm: bool = False) -> str:
     """Delete ALL chunks for a repo.
 
     Requires confirm=True to prevent accidents.
@@ -230,7 +665,7 @@ def forget_repo(repo_name: str, confirm: bool = False) -> str:
         return json.dumps(
             {"error": "Set confirm=True to delete all chunks for this repo."}
         )
-    count = _ingestion.delete_by_repo(repo_name)
+    count = await _call(MAINTENANCE, lambda d: d.ingestion.delete_by_repo(repo_name))
     return json.dumps({"deleted_chunks": count})
 
 
@@ -238,13 +673,15 @@ def forget_repo(repo_name: str, confirm: bool = False) -> str:
 
 
 @mcp.tool()
-def list_repos() -> str:
+@_timed
+async def list_repos() -> str:
     """List all repos from the relationship graph with chunk counts.
 
     Flags which repos are MCP servers.
     """
-    repos = _graph.list_repos()
-    stats = _ingestion.get_stats()
+    repos, stats = await _call(
+        MAINTENANCE, lambda d: (d.graph.list_repos(), d.ingestion.get_stats())
+    )
 
     result = []
     for name, info in sorted(repos.items()):
@@ -261,14 +698,17 @@ def list_repos() -> str:
 
 
 @mcp.tool()
-def get_repo_relationships(repo_name: str) -> str:
+@_timed
+async def get_repo_relationships(repo_name: str) -> str:
     """Show full relationship context for a repo.
 
     Args:
         repo_name: Repo to inspect.
     """
-    info = _graph.get_repo(repo_name)
-    related = _graph.get_related_repos(repo_name)
+    info, related = await _call(
+        MAINTENANCE,
+        lambda d: (d.graph.get_repo(repo_name), d.graph.get_related_repos(repo_name)),
+    )
     return json.dumps(
         {
             "repo": repo_name,
@@ -283,21 +723,15 @@ def get_repo_relationships(repo_name: str) -> str:
 
 
 @mcp.tool()
-def get_kb_stats() -> str:
+@_timed
+async def get_kb_stats() -> str:
     """Get knowledge base statistics.
 
     Returns chunk counts by repo and source type, Ollama connectivity,
     and ChromaDB status.
     """
-    stats = _ingestion.get_stats()
-
-    ollama_ok = check_ollama(settings.ollama_host, settings.ollama_embed_model)
-
-    try:
-        _ingestion.client.heartbeat()
-        chroma_ok = True
-    except Exception:
-        chroma_ok = False
+    stats = await _call(MAINTENANCE, lambda d: d.ingestion.get_stats())
+    ollama_ok, chroma_ok = await _executor.run(MAINTENANCE, _check_backends)
 
     total_chunks = sum(
         count for repo_stats in stats.values() for count in repo_stats.values()
@@ -319,3 +753,141 @@ def get_kb_stats() -> str:
         },
         indent=2,
     )
+
+
+@mcp.tool()
+@_timed
+async def rebuild_symbol_index(repos: list[str] | None = None) -> str:
+    """Rebuild the lookup_symbol index for code already in the knowledge base.
+
+    Use when lookup_symbol finds nothing for code ingested before the index
+    existed, or restored from a snapshot without symbols. Source files are
+    read again from their paths, and each symbol goes to the stored chunk
+    holding its definition; nothing is re-embedded. Files no longer there,
+    or changed since they were ingested, need re-ingesting.
+
+    Args:
+        repos: Optional list of repos to rebuild. Defaults to all.
+    """
+    summary = await _call(MAINTENANCE, lambda d: d.ingestion.rebuild_symbols(repos))
+    return json.dumps(summary)
+
+
+# ── Snapshot Tools ───────────────────────────────────────────────────────────
+
+
+@mcp.tool()
+@_timed
+async def export_kb(
+    path: str,
+    repos: list[str] | None = None,
+    compress: bool = True,
+) -> str:
+    """Export chunks and their embeddings to a snapshot file.
+
+    Use to move the knowledge base to another host or keep a backup that
+    can be restored without re-embedding.
+
+    Args:
+        path: Absolute path of the snapshot file to write (on the server).
+        repos: Optional list of repos to export. Defaults to all.
+        compress: Compress blocks with zlib.
+    """
+    summary = await _call(
+        MAINTENANCE,
+        lambda d: snapshot.export_snapshot(
+            d.ingestion.collection,
+            d.ingestion.rerank_store,
+            path,
+            d.migration.state.model,
+            repos,
+            compress,
+            symbols=d.ingestion.symbols,
+        ),
+    )
+    return json.dumps(summary)
+
+
+@mcp.tool()
+@_timed
+async def import_kb(
+    path: str,
+    repos: list[str] | None = None,
+    force: bool = False,
+) -> str:
+    """Import a snapshot file, reusing its embeddings instead of calling Ollama.
+
+    Chunks with the same id are replaced. During an embedding migration, or
+    before it is finalized, the other collection gets them too, embedded
+    with its own model, so a rollback keeps them.
+
+    Args:
+        path: Absolute path of the snapshot file (on the server).
+        repos: Optional list of repos to import. Defaults to all.
+        force: Import even if the snapshot used a different embedding model.
+    """
+    summary = await _call(
+        INGEST,
+        lambda d: snapshot.import_snapshot(
+            d.ingestion, path, d.migration.state.model, repos, force
+        ),
+    )
+    return json.dumps(summary)
+
+
+# ── Embedding Model Migration Tools ──────────────────────────────────────────
+
+
+@mcp.tool()
+@_timed
+async def migrate_embedding_model(model: str | None = None) -> str:
+    """Re-embed the knowledge base with a new model, without downtime.
+
+    Runs in the background: search keeps using the current model until the
+    new collection is complete, then switches over. Poll
+    get_migration_status for progress.
+
+    Args:
+        model: Ollama embedding model. Defaults to OLLAMA_EMBED_MODEL.
+    """
+    target = model or settings.ollama_embed_model
+    status = await _call(MAINTENANCE, lambda d: d.migration.start(target))
+    return json.dumps(status, indent=2)
+
+
+@mcp.tool()
+@_timed
+async def get_migration_status() -> str:
+    """Get embedding migration progress and the active collection and model."""
+    status = await _call(MAINTENANCE, lambda d: d.migration.status())
+    return json.dumps(status, indent=2)
+
+
+@mcp.tool()
+@_timed
+async def rollback_embedding_model() -> str:
+    """Cancel a running migration, or switch back to the previous model.
+
+    After a completed migration the previous collection is kept up to date,
+    so rolling back loses nothing. Rolling back twice switches forward again.
+    """
+    status = await _call(MAINTENANCE, lambda d: d.migration.rollback())
+    return json.dumps(status, indent=2)
+
+
+@mcp.tool()
+@_timed
+async def finalize_embedding_model(confirm: bool = False) -> str:
+    """Delete the previous model's collection. Rollback is no longer possible.
+
+    Until this runs, every ingest is embedded by both models.
+
+    Args:
+        confirm: Must be True to proceed.
+    """
+    if not confirm:
+        return json.dumps(
+            {"error": "Set confirm=True to delete the previous collection."}
+        )
+    status = await _call(MAINTENANCE, lambda d: d.migration.finalize())
+    return json.dumps(status, indent=2)
@@ -0,0 +1,126 @@
+"""Debugging-session documents, and JSONL parsing for bulk ingestion.
+
+A bulk file holds one session per line, shaped like the ingest_session
+arguments (see tests/fixtures/debug_session.json), plus an optional ISO
+"date" for sessions recorded earlier. Every line is checked before any is
+ingested, so a bad line never leaves a backfill half done.
+"""
+
+import hashlib
+import json
+import uuid
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from tech_mcp.relationships import RelationshipGraph
+
+_REQUIRED = {"problem": str, "attempts": list, "root_cause": str, "solution": str}
+_ATTEMPT_KEYS = frozenset({"action", "outcome", "why_failed"})
+_KEYS = frozenset({*_REQUIRED, "repos", "tags", "date"})
+
+# Invalid lines listed in the error before the rest are summarised
+_MAX_REPORTED = 20
+
+
+def format_session(
+    problem: str,
+    attempts: list[dict[str, str]],
+    root_cause: str,
+    solution: str,
+    repos: list[str],
+    tags: list[str] | None,
+    date: str,
+) -> str:
+    """Render a session as the Markdown document that gets chunked."""
+    attempts_text = ""
+    for i, attempt in enumerate(attempts, 1):
+        action = attempt.get("action", "")
+        outcome = attempt.get("outcome", "")
+        why_failed = attempt.get("why_failed", "")
+        attempts_text += (
+            f"{i}. **Action:** {action}\n"
+            f"   **Outcome:** {outcome}\n"
+            f"   **Why it failed:** {why_failed}\n\n"
+        )
+
+    return (
+        f"# Session: {problem}\n\n"
+        f"**Repos:** {','.join(repos)}\n"
+        f"**Date:** {date[:10]}\n"
+        f"**Tags:** {','.join(tags) if tags else ''}\n\n"
+        f"## Problem\n\n{problem}\n\n"
+        f"## What Was Tried\n\n{attempts_text}"
+        f"## Root Cause\n\n{root_cause}\n\n"
+        f"## Solution\n\n{solution}\n\n"
+        f"## Key Signals\n\n"
+        f"What to look for next time this pattern appears.\n"
+    )
+
+
+def parse_sessions(lines: Iterable[str], graph: RelationshipGraph) -> list[dict]:
+    """Parse and check JSONL sessions; raise ValueError listing bad lines."""
+    sessions = []
+    errors = []
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            errors.append(f"line {n}: invalid JSON ({exc.msg})")
+            continue
+        problems = check_session(record, graph)
+        if problems:
+            errors.append(f"line {n}: {'; '.join(problems)}")
+        else:
+            sessions.append(record)
+    if errors:
+        shown = errors[:_MAX_REPORTED]
+        if len(errors) > len(shown):
+            shown.append(f"... and {len(errors) - len(shown)} more")
+        msg = f"{len(errors)} invalid sessions, none ingested:\n" + "\n".join(shown)
+        raise ValueError(msg)
+    return sessions
+
+
+def check_session(record: object, graph: RelationshipGraph) -> list[str]:
+    """Problems that would stop a session from being ingested."""
+    if not isinstance(record, dict):
+        return ["not a JSON object"]
+    problems = [f"unknown key '{key}'" for key in sorted(record.keys() - _KEYS)]
+    for key, kind in _REQUIRED.items():
+        if not isinstance(record.get(key), kind):
+            problems.append(f"'{key}' must be a {kind.__name__}")
+    attempts = record.get("attempts")
+    for i, attempt in enumerate(attempts if isinstance(attempts, list) else [], 1):
+        if not isinstance(attempt, dict) or not attempt.keys() <= _ATTEMPT_KEYS:
+            problems.append(f"attempt {i} must have only {sorted(_ATTEMPT_KEYS)}")
+    repos = record.get("repos")
+    if not isinstance(repos, list) or not repos:
+        problems.append("'repos' must be a non-empty list")
+    else:
+        known = graph.list_repos()
+        problems.extend(f"unknown repo '{r}'" for r in repos if r not in known)
+    tags = record.get("tags")
+    if tags is not None and not isinstance(tags, list):
+        problems.append("'tags' must be a list")
+    if "date" in record:
+        try:
+            session_date(record["date"])
+        except (TypeError, ValueError):
+            problems.append("'date' must be an ISO 8601 date")
+    return problems
+
+
+def session_date(value: str) -> str:
+    """An ISO date or timestamp as a full timestamp, UTC if no zone given."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.isoformat()
+
+
+def stable_session_id(record: dict) -> str:
+    """Stable id for a session's content, so a re-run replaces it."""
+    digest = hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+    return str(uuid.UUID(digest[:32]))
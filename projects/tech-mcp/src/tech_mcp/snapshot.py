@@ -0,0 +1,376 @@
+"""Knowledge-base snapshots: export and import chunks with their embeddings.
+
+A snapshot carries ids, documents, metadata and embeddings, so a KB can be
+moved between hosts or rebuilt after a corrupted persist dir without
+re-embedding everything through Ollama.
+
+A reduced-dimension KB that reranks exports the full vectors from its
+rerank sidecar, so the snapshot can be restored into any storage mode.
+One that keeps no full vectors exports its truncated index vectors, and
+the header says so (full_vectors: false); such a snapshot can only be
+restored into a KB that indexes at most that many dimensions and does
+not rerank.
+
+Given the symbol index, export adds each chunk's symbol rows to the block,
+and import restores them, so lookup_symbol works on the restored KB.
+Snapshots without them (symbols: false) leave the index to
+rebuild_symbol_index.
+
+File layout (integers are little-endian uint32):
+
+    b"TKBSNAP1"
+    header length, header JSON   {version, model, dimensions, full_vectors, ...}
+    block*                       length, payload (zlib-compressed if enabled)
+    0                            end-of-blocks marker
+    footer length, footer JSON   {chunks}
+
+Each block is columnar: a JSON length and a JSON object holding the ids,
+documents, metadatas and (optionally) symbols columns, followed by the embeddings as one
+contiguous float32 array (rows x dimensions). Export and import handle one
+block at a time, so memory stays bounded by the block size.
+"""
+
+import json
+import logging
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from tech_mcp import metrics
+from tech_mcp.symbols import SymbolIndex
+from tech_mcp.vectors import RerankStore, StorageMode
+
+if TYPE_CHECKING:
+    from tech_mcp.ingestion import Ingestion
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TKBSNAP1"
+FORMAT_VERSION = 1
+
+# Chunks per block; also the page size for reading the collection
+_BLOCK_SIZE = 1000
+_U32 = struct.Struct("<I")
+# Spare header bytes, so the dimensions can be filled in after the fact
+_HEADER_SLACK = 32
+
+
+class SnapshotError(ValueError):
+    """Raised for unreadable, truncated or incompatible snapshot files."""
+
+
+def _repo_filter(repos: list[str] | None) -> dict | None:
+    if not repos:
+        return None
+    if len(repos) == 1:
+        return {"repo": repos[0]}
+    return {"repo": {"$in": repos}}
+
+
+def _pack_embeddings(embeddings: Any) -> tuple[int, bytes]:
+    """Pack rows into little-endian float32 bytes. Returns (dimensions, bytes)."""
+    buf = array("f")
+    dimensions = 0
+    for row in embeddings:
+        dimensions = len(row)
+        try:
+            view = memoryview(row)
+        except TypeError:
+            view = None
+        # Chroma returns numpy float32 rows: copy the buffer instead of
+        # converting element by element
+        if view is not None and view.format == "f" and view.c_contiguous:
+            buf.frombytes(view.cast("B"))
+        else:
+            buf.extend(row)
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return dimensions, buf.tobytes()
+
+
+def _unpack_embeddings(data: bytes, rows: int) -> list[list[float]]:
+    buf = array("f")
+    buf.frombytes(data)
+    if sys.byteorder == "big":
+        buf.byteswap()
+    if rows == 0:
+        return []
+    dimensions = len(buf) // rows
+    return [buf[i * dimensions : (i + 1) * dimensions].tolist() for i in range(rows)]
+
+
+def _write_frame(fh: BinaryIO, payload: bytes) -> None:
+    fh.write(_U32.pack(len(payload)))
+    fh.write(payload)
+
+
+def _read_exact(fh: BinaryIO, size: int) -> bytes:
+    data = fh.read(size)
+    if len(data) != size:
+        msg = "Snapshot is truncated"
+        raise SnapshotError(msg)
+    return data
+
+
+def _read_frame(fh: BinaryIO) -> bytes:
+    (size,) = _U32.unpack(_read_exact(fh, _U32.size))
+    return _read_exact(fh, size) if size else b""
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+
+
+def _iter_pages(collection, where: dict | None) -> Iterator[dict]:
+    offset = 0
+    while True:
+        with metrics.CHROMA_SECONDS.time(op="get"):
+            page = collection.get(
+                where=where,
+                include=["documents", "metadatas", "embeddings"],
+                limit=_BLOCK_SIZE,
+                offset=offset,
+            )
+        if len(page["ids"]):
+            yield page
+        if len(page["ids"]) < _BLOCK_SIZE:
+            return
+        offset += _BLOCK_SIZE
+
+
+def _full_embeddings(collection, store: RerankStore, ids: list[str]) -> list:
+    """Full vectors of ids from the rerank sidecar."""
+    full = store.get(collection.name, ids)
+    missing = [id_ for id_ in ids if id_ not in full]
+    if missing:
+        msg = (
+            f"{len(missing)} chunks (e.g. {missing[0]}) have no full vector in "
+            "the rerank sidecar. Re-embed them (migrate_embedding_model) "
+            "before exporting."
+        )
+        raise SnapshotError(msg)
+    return [full[id_] for id_ in ids]
+
+
+def export_snapshot(
+    collection,
+    store: RerankStore,
+    path: str,
+    model: str,
+    repos: list[str] | None = None,
+    compress: bool = True,
+    symbols: SymbolIndex | None = None,
+) -> dict:
+    """Write the collection (optionally only some repos) to a snapshot file.
+
+    The file is written next to its destination and renamed into place, so
+    a failed export never leaves a partial snapshot behind. Symbol rows
+    are included if symbols is given.
+    """
+    mode = StorageMode.from_collection(collection)
+    full_vectors = mode.reranks or not mode.reduced
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    chunks = 0
+    dimensions = 0
+    try:
+        with tmp.open("wb") as fh:
+            fh.write(MAGIC)
+            header_at = fh.tell()
+            # Dimensions are known after the first block; reserve a fixed-size
+            # header and rewrite it at the end
+            header = {
+                "version": FORMAT_VERSION,
+                "model": model,
+                "dimensions": 0,
+                "full_vectors": full_vectors,
+                "symbols": symbols is not None,
+                "compression": "zlib" if compress else "none",
+                "repos": repos or [],
+                "created_at": datetime.now(UTC).isoformat(),
+            }
+            header_size = len(json.dumps(header)) + _HEADER_SLACK
+            _write_frame(fh, json.dumps(header).encode().ljust(header_size))
+
+            for page in _iter_pages(collection, _repo_filter(repos)):
+                embeddings = page["embeddings"]
+                if mode.reranks:
+                    embeddings = _full_embeddings(collection, store, page["ids"])
+                dims, vectors = _pack_embeddings(embeddings)
+                dimensions = dimensions or dims
+                if dims != dimensions:
+                    msg = f"Mixed embedding dimensions ({dimensions} and {dims})"
+                    raise SnapshotError(msg)
+                columns = {
+                    "ids": page["ids"],
+                    "documents": page["documents"],
+                    "metadatas": page["metadatas"],
+                }
+                if symbols is not None:
+                    rows = symbols.rows(page["ids"])
+                    columns["symbols"] = [rows.get(id_, []) for id_ in page["ids"]]
+                encoded = json.dumps(columns).encode()
+                payload = _U32.pack(len(encoded)) + encoded + vectors
+                _write_frame(fh, zlib.compress(payload) if compress else payload)
+                chunks += len(page["ids"])
+
+            fh.write(_U32.pack(0))
+            _write_frame(fh, json.dumps({"chunks": chunks}).encode())
+
+            header["dimensions"] = dimensions
+            fh.seek(header_at)
+            _write_frame(fh, json.dumps(header).encode().ljust(header_size))
+        tmp.replace(target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    summary = {
+        "path": str(target),
+        "chunks": chunks,
+        "dimensions": dimensions,
+        "full_vectors": full_vectors,
+        "bytes": target.stat().st_size,
+        "compression": header["compression"],
+    }
+    logger.info("Exported snapshot: %s", summary)
+    return summary
+
+
+# ── Import ───────────────────────────────────────────────────────────────────
+
+
+def read_header(fh: BinaryIO) -> dict:
+    if fh.read(len(MAGIC)) != MAGIC:
+        msg = "Not a tech-mcp snapshot (bad magic bytes)"
+        raise SnapshotError(msg)
+    header = json.loads(_read_frame(fh))
+    if header.get("version") != FORMAT_VERSION:
+        msg = f"Unsupported snapshot version: {header.get('version')}"
+        raise SnapshotError(msg)
+    return header
+
+
+def iter_blocks(fh: BinaryIO, header: dict) -> Iterator[dict]:
+    """Yield blocks as {ids, documents, metadatas, embeddings} column dicts."""
+    compressed = header["compression"] == "zlib"
+    while True:
+        frame = _read_frame(fh)
+        if not frame:
+            return
+        payload = zlib.decompress(frame) if compressed else frame
+        (columns_len,) = _U32.unpack_from(payload)
+        start = _U32.size
+        columns = json.loads(payload[start : start + columns_len])
+        columns["embeddings"] = _unpack_embeddings(
+            payload[start + columns_len :], len(columns["ids"])
+        )
+        yield columns
+
+
+def _check_dimensions(collection, header: dict) -> None:
+    """Refuse a snapshot whose vectors cannot fill the collection's index."""
+    mode = StorageMode.from_collection(collection)
+    dimensions = header["dimensions"]
+    full_vectors = header.get("full_vectors", True)
+    if not dimensions:
+        return
+    if mode.reduced and dimensions < mode.dimensions:
+        msg = (
+            f"Snapshot vectors have {dimensions} dimensions but this KB "
+            f"indexes {mode.dimensions}"
+        )
+        raise SnapshotError(msg)
+    if not full_vectors and (mode.reranks or not mode.reduced):
+        msg = (
+            f"Snapshot holds only the first {dimensions} dimensions of each "
+            "vector, but this KB needs full vectors. Re-embed instead."
+        )
+        raise SnapshotError(msg)
+    if not mode.reduced:
+        existing = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        if len(existing) and len(existing[0]) != dimensions:
+            msg = (
+                f"Snapshot vectors have {dimensions} dimensions but this KB "
+                f"stores {len(existing[0])}"
+            )
+            raise SnapshotError(msg)
+
+
+def import_snapshot(
+    ingestion: "Ingestion",
+    path: str,
+    model: str,
+    repos: list[str] | None = None,
+    force: bool = False,
+) -> dict:
+    """Upsert chunks from a snapshot, using the stored embeddings as-is.
+
+    Importing a snapshot made with a different embedding model would mix
+    incompatible vectors, so that is refused unless force=True. Vectors are
+    written in the collection's storage mode, truncated for a reduced index
+    with the full ones kept in the rerank sidecar; a snapshot too narrow for
+    that mode is refused before anything is written. Blocks go through
+    Ingestion.import_chunks, so they update the path, signature and symbol
+    indexes, and reach a migration's other collection too. Only that
+    collection needs the documents embedded (with its own model).
+    """
+    wanted = set(repos or [])
+    chunks = skipped = symbol_rows = 0
+    embedding_fn = ingestion.embedding_fn
+    with Path(path).open("rb") as fh:
+        header = read_header(fh)
+        if header["model"] != model and not force:
+            msg = (
+                f"Snapshot was embedded with '{header['model']}' but this KB "
+                f"uses '{model}'. Re-embed instead, or pass force to import."
+            )
+            raise SnapshotError(msg)
+        _check_dimensions(ingestion.collection, header)
+
+        for block in iter_blocks(fh, header):
+            keep = [
+                i
+                for i, meta in enumerate(block["metadatas"])
+                if not wanted or meta.get("repo") in wanted
+            ]
+            skipped += len(block["ids"]) - len(keep)
+            if not keep:
+                continue
+            ids = [block["ids"][i] for i in keep]
+            metadatas = [block["metadatas"][i] for i in keep]
+            rows = None
+            if "symbols" in block:
+                rows = [
+                    (name, kind, meta["repo"], meta["file_path"], id_, line)
+                    for i, id_, meta in zip(keep, ids, metadatas, strict=True)
+                    for name, kind, line in block["symbols"][i]
+                ]
+                symbol_rows += len(rows)
+            ingestion.import_chunks(
+                ids,
+                [block["embeddings"][i] for i in keep],
+                [block["documents"][i] for i in keep],
+                metadatas,
+                embedding_fn,
+                symbols=rows,
+            )
+            chunks += len(keep)
+
+        footer = json.loads(_read_frame(fh))
+
+    summary = {
+        "path": path,
+        "chunks_imported": chunks,
+        "chunks_skipped": skipped,
+        "symbols_imported": symbol_rows if header.get("symbols") else None,
+        "snapshot_chunks": footer["chunks"],
+        "model": header["model"],
+        "dimensions": header["dimensions"],
+    }
+    logger.info("Imported snapshot: %s", summary)
+    return summary
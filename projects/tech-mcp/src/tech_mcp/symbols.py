@@ -0,0 +1,576 @@
+"""Symbol-aware chunking for Python, Go and TypeScript/JavaScript.
+
+Fixed-size windows cut functions mid-body and repeat 20% of every file in
+the overlap. Here each top-level symbol (function, class, type, ...) is one
+chunk, and heading_context holds its qualified name ("Ingestion.ingest_file",
+"Server.Start"). Code between symbols (imports, constants, main blocks) is
+kept together in module-level chunks with an empty heading. Chunks do not
+overlap.
+
+A symbol larger than the chunk size is split: a class into its header and
+its methods, anything else into line windows that break at blank lines.
+Python is parsed with the ast module. Go and TS/JS use a small scanner
+that tracks bracket depth outside strings and comments and recognizes
+declarations at depth 0. Source that does not parse returns None, and the
+caller falls back to character windows.
+
+The same pass records which chunk defines each symbol, and which chunks
+read which environment variables. SymbolIndex keeps that in
+symbols.sqlite3 so "where is X defined" is an indexed SQLite lookup rather
+than an embedding call and a vector search.
+"""
+
+import ast
+import re
+import sqlite3
+import threading
+from bisect import bisect_right
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+SYMBOL_LANGUAGES = ("python", "go", "ts", "js")
+
+_INDEX_FILE = "symbols.sqlite3"
+_SQL_BATCH = 500
+
+# Only "\n" ends a line, as for the scanner; splitlines() also splits on
+# form feeds and other separators that would shift line numbers
+_LINE_RE = re.compile(r"[^\n]*\n|[^\n]+\Z")
+
+
+@dataclass(frozen=True)
+class Span:
+    """A symbol's lines, 0-based and end-exclusive, with nested symbols.
+
+    start includes decorators and the comment block above the definition,
+    which is on line.
+    """
+
+    name: str
+    kind: str
+    start: int
+    end: int
+    line: int
+    children: tuple["Span", ...] = ()
+
+
+def chunk_code(text: str, language: str, max_chars: int) -> list[dict] | None:
+    """Chunks of at most max_chars, one per symbol, or None if unparsable.
+
+    Besides "text" and "heading_context", each chunk has "lines", its first
+    and last line (1-based), and "symbols", the (name, kind, line) entries
+    it defines for the symbol index. Environment variables the code reads
+    are listed with kind "env".
+    """
+    spans = find_spans(text, language)
+    if spans is None:
+        return None
+    lines = _split_lines(text)
+    chunks = _pack(_emit(lines, spans, 0, len(lines), "", max_chars), max_chars)
+    _add_env_vars(chunks, text, language)
+    return chunks
+
+
+def _split_lines(text: str) -> list[str]:
+    return _LINE_RE.findall(text)
+
+
+def find_spans(text: str, language: str) -> list[Span] | None:
+    """Top-level symbols of the source, or None if it cannot be parsed."""
+    if language == "python":
+        return _python_spans(text)
+    if language == "go":
+        return _scan_spans(text, _GO_DECL, _go_name, member=None)
+    if language in ("ts", "js"):
+        return _scan_spans(text, _TS_DECL, _ts_name, member=_TS_MEMBER)
+    return None
+
+
+# ── Emitting ─────────────────────────────────────────────────────────────────
+
+
+def _emit(
+    lines: list[str],
+    spans: list[Span],
+    lo: int,
+    hi: int,
+    owner: str,
+    max_chars: int,
+) -> list[dict]:
+    """Chunk lines[lo:hi]; code outside spans belongs to owner."""
+    chunks: list[dict] = []
+    cursor = lo
+    for span in spans:
+        chunks.extend(_window(lines, cursor, span.start, owner, max_chars))
+        text = "".join(lines[span.start : span.end])
+        if len(text) <= max_chars:
+            parts = _window(lines, span.start, span.end, span.name, max_chars)
+            defined = _flatten(span)
+        elif span.children:
+            parts = _emit(
+                lines, list(span.children), span.start, span.end, span.name, max_chars
+            )
+            defined = [span]
+        else:
+            parts = _window(lines, span.start, span.end, span.name, max_chars)
+            defined = [span]
+        if parts:
+            parts[0]["symbols"][:0] = [(s.name, s.kind, s.line + 1) for s in defined]
+        chunks.extend(parts)
+        cursor = span.end
+    chunks.extend(_window(lines, cursor, hi, owner, max_chars))
+    return chunks
+
+
+def _flatten(span: Span) -> list[Span]:
+    return [span] + [s for child in span.children for s in _flatten(child)]
+
+
+def _pack(chunks: list[dict], max_chars: int) -> list[dict]:
+    """Merge runs of small neighbouring chunks; a symbol is never split."""
+    packed: list[dict] = []
+    names: list[list[str]] = []
+    for chunk in chunks:
+        if packed and len(packed[-1]["text"]) + 2 + len(chunk["text"]) <= max_chars:
+            last = packed[-1]
+            last["text"] += "\n\n" + chunk["text"]
+            last["lines"] = (last["lines"][0], chunk["lines"][1])
+            last["symbols"].extend(chunk["symbols"])
+            names[-1].append(chunk["heading_context"])
+        else:
+            packed.append(chunk)
+            names.append([chunk["heading_context"]])
+    for chunk, group in zip(packed, names, strict=True):
+        chunk["heading_context"] = ", ".join(dict.fromkeys(n for n in group if n))
+    return packed
+
+
+def _window(
+    lines: list[str], lo: int, hi: int, heading: str, max_chars: int
+) -> list[dict]:
+    """Pack lines[lo:hi] into chunks, preferring to break at blank lines."""
+    chunks: list[dict] = []
+    buffer: list[str] = []
+    first = lo
+    size = 0
+    blank = -1
+
+    def flush(upto: int) -> None:
+        nonlocal buffer, first, size, blank
+        text = "".join(buffer[:upto]).strip("\n")
+        if text.strip():
+            chunks.append(
+                {
+                    "text": text,
+                    "heading_context": heading,
+                    "lines": (first + 1, first + upto),
+                    "symbols": [],
+                }
+            )
+        buffer = buffer[upto:]
+        first += upto
+        size = sum(len(line) for line in buffer)
+        blank = -1
+
+    for line in lines[lo:hi]:
+        while len(line) > max_chars:
+            flush(len(buffer))
+            buffer.append(line[:max_chars])
+            flush(1)
+            # The rest is still on the same line
+            first -= 1
+            line = line[max_chars:]
+        # Break at the last blank line unless that leaves a tiny chunk
+        if size + len(line) > max_chars and blank * 2 >= len(buffer):
+            flush(blank + 1)
+        if size + len(line) > max_chars:
+            flush(len(buffer))
+        if not line.strip():
+            blank = len(buffer)
+        buffer.append(line)
+        size += len(line)
+    flush(len(buffer))
+    return chunks
+
+
+def _attach_comments(
+    lines: list[str], start: int, floor: int, prefix: str | tuple[str, ...]
+) -> int:
+    """Move start up over the comment block directly above a symbol."""
+    while start > floor and lines[start - 1].lstrip().startswith(prefix):
+        start -= 1
+    return start
+
+
+# ── Python ───────────────────────────────────────────────────────────────────
+
+
+def _python_spans(text: str) -> list[Span] | None:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    lines = _split_lines(text)
+    return _python_body(tree.body, lines, "", 0)
+
+
+def _python_body(
+    body: list[ast.stmt], lines: list[str], prefix: str, floor: int
+) -> list[Span]:
+    spans = []
+    for node in body:
+        if not isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+            floor = node.end_lineno or floor
+            continue
+        name = prefix + node.name
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+        start = _attach_comments(lines, start, floor, "#")
+        end = node.end_lineno or node.lineno
+        if isinstance(node, ast.ClassDef):
+            kind = "class"
+            children = _python_body(node.body, lines, name + ".", node.lineno)
+        else:
+            kind = "function" if not prefix else "method"
+            children = []
+        spans.append(Span(name, kind, start, end, node.lineno - 1, tuple(children)))
+        floor = end
+    return spans
+
+
+# ── Go and TypeScript/JavaScript ─────────────────────────────────────────────
+
+_GO_DECL = re.compile(
+    r"^func\s+(?:\(\s*(?:\w+\s+)?\*?\s*(?P<recv>\w+)(?:\[[^\]]*\])?\s*\)\s*)?"
+    r"(?P<func>\w+)"
+    r"|^type\s+(?P<type>\w+)"
+)
+_TS_DECL = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?"
+    r"(?P<kind>function\*?|class|interface|type|enum|namespace|const|let|var)"
+    r"(?:\s+(?P<name>[A-Za-z_$][\w$]*))?"
+)
+_TS_MEMBER = re.compile(
+    r"^\s+(?:(?:public|private|protected|static|readonly|override|abstract|async"
+    r"|get|set)\s+)*\*?(?P<name>#?[A-Za-z_$][\w$]*)\s*[(<=:]"
+)
+_TS_NOT_MEMBERS = {"if", "for", "while", "switch", "return", "catch", "super"}
+_C_COMMENTS = ("//", "/*", "*")
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORD = re.compile(r"\b(?:return|typeof|case|yield|await|in|of)\s*$")
+_OPEN = "([{"
+_CLOSE = ")]}"
+
+
+def _go_name(match: re.Match) -> tuple[str, str] | None:
+    if match["type"]:
+        return match["type"], "type"
+    if match["recv"]:
+        return f"{match['recv']}.{match['func']}", "method"
+    return match["func"], "function"
+
+
+def _ts_name(match: re.Match) -> tuple[str, str] | None:
+    kind = match["kind"].rstrip("*")
+    if match["name"]:
+        return match["name"], kind
+    # export default function/class; a nameless const is destructuring
+    return ("default", kind) if kind in ("function", "class") else None
+
+
+def _scan_spans(
+    text: str,
+    decl: re.Pattern,
+    name_of: Callable[[re.Match], tuple[str, str] | None],
+    member: re.Pattern | None,
+) -> list[Span] | None:
+    lines = _split_lines(text)
+    depths = _line_depths(text, len(lines))
+    if depths is None:
+        return None
+    spans = []
+    floor = 0
+    for i, line in enumerate(lines):
+        if i < floor or depths[i] != 0:
+            continue
+        match = decl.match(line)
+        if match is None:
+            continue
+        end = _statement_end(depths, i)
+        named = name_of(match)
+        # One-liners (type aliases, short consts) stay with module code
+        if end - i == 1 or named is None:
+            continue
+        name, kind = named
+        children = ()
+        if member is not None and kind == "class":
+            children = _scan_members(lines, depths, i + 1, end - 1, name, member)
+        start = _attach_comments(lines, i, floor, _C_COMMENTS)
+        spans.append(Span(name, kind, start, end, i, children))
+        floor = end
+    return spans
+
+
+def _scan_members(
+    lines: list[str],
+    depths: list[int | None],
+    lo: int,
+    hi: int,
+    owner: str,
+    member: re.Pattern,
+) -> tuple[Span, ...]:
+    spans = []
+    floor = lo
+    for i in range(lo, hi):
+        if i < floor or depths[i] != 1:
+            continue
+        match = member.match(lines[i])
+        if match is None or match["name"] in _TS_NOT_MEMBERS:
+            continue
+        end = min(_statement_end(depths, i, level=1), hi)
+        if end - i == 1:
+            continue
+        start = _attach_comments(lines, i, floor, _C_COMMENTS)
+        spans.append(Span(f"{owner}.{match['name']}", "method", start, end, i))
+        floor = end
+    return tuple(spans)
+
+
+def _statement_end(depths: list[int | None], start: int, level: int = 0) -> int:
+    """Line index after a declaration: where depth falls back to level."""
+    for i in range(start + 1, len(depths)):
+        if depths[i] is not None and depths[i] <= level:
+            return i
+    return len(depths)
+
+
+def _starts_regex(text: str, i: int, prev: str) -> bool:
+    """Whether the "/" at i opens a regex literal rather than dividing."""
+    if not prev or prev in _REGEX_PRECEDERS:
+        return True
+    return prev.isalpha() and _REGEX_KEYWORD.search(text, max(0, i - 12), i) is not None
+
+
+def _line_depths(text: str, count: int) -> list[int | None] | None:
+    """Bracket depth at the start of each line, plus one entry for the end.
+
+    None marks a line that starts inside a string or block comment. Returns
+    None when brackets do not balance.
+    """
+    depths: list[int | None] = [0]
+    depth = 0
+    # The open string delimiter; "/" is a JS regex literal
+    quote = ""
+    in_class = block_comment = line_comment = False
+    # Last significant character, to tell a regex literal from division
+    prev = ""
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == "\n":
+            line_comment = False
+            if quote in ("'", '"', "/"):
+                quote = ""
+            depths.append(None if quote or block_comment else depth)
+        elif line_comment:
+            pass
+        elif block_comment:
+            if text.startswith("*/", i):
+                block_comment = False
+                i += 1
+        elif quote:
+            if c == "\\":
+                i += 1
+            elif quote == "/" and c in "[]":
+                in_class = c == "["
+            elif c == quote and not in_class:
+                quote = ""
+                prev = c
+        elif c in "'\"`":
+            quote = c
+        elif text.startswith("//", i):
+            line_comment = True
+        elif text.startswith("/*", i):
+            block_comment = True
+            i += 1
+        elif c == "/" and _starts_regex(text, i, prev):
+            quote = "/"
+        elif c in _OPEN:
+            depth += 1
+        elif c in _CLOSE:
+            depth -= 1
+            if depth < 0:
+                return None
+        if not (quote or block_comment or line_comment or c.isspace()):
+            prev = c
+        i += 1
+    if depth != 0 or quote == "`" or block_comment:
+        return None
+    # A trailing newline already appended the end entry
+    while len(depths) < count + 1:
+        depths.append(depth)
+    return depths[: count + 1]
+
+
+# ── Environment variables ────────────────────────────────────────────────────
+
+_ENV_RE = {
+    "python": re.compile(
+        r"(?:environ(?:\.get|\.setdefault|\.pop)?\s*[\[(]|getenv\s*\()"
+        r"\s*[\"'](?P<name>[A-Za-z_]\w*)[\"']"
+    ),
+    "go": re.compile(r"os\.(?:Getenv|LookupEnv)\(\s*\"(?P<name>[A-Za-z_]\w*)\""),
+    "ts": re.compile(
+        r"process\.env(?:\.(?P<name>[A-Za-z_]\w*)|\[\s*[\"'`](?P<quoted>[A-Za-z_]\w*))"
+    ),
+}
+_ENV_RE["js"] = _ENV_RE["ts"]
+
+
+def _add_env_vars(chunks: list[dict], text: str, language: str) -> None:
+    """List the environment variables read in each chunk as "env" symbols."""
+    pattern = _ENV_RE[language]
+    starts = [chunk["lines"][0] for chunk in chunks]
+    seen: set[tuple[int, str]] = set()
+    line, pos = 1, 0
+    for match in pattern.finditer(text):
+        name = match["name"] or match.groupdict().get("quoted")
+        line += text.count("\n", pos, match.start())
+        pos = match.start()
+        k = bisect_right(starts, line) - 1
+        if k < 0 or (k, name) in seen:
+            continue
+        seen.add((k, name))
+        chunks[k]["symbols"].append((name, "env", line))
+
+
+# ── Index ────────────────────────────────────────────────────────────────────
+
+
+class SymbolIndex:
+    """Symbol name → chunk, in SQLite next to Chroma's data.
+
+    Rows are keyed by chunk id like the MinHash signatures, so they are
+    replaced and deleted together with the chunks and shared by every
+    collection. The database is created on the first write.
+    """
+
+    def __init__(self, persist_dir: str) -> None:
+        self._path = Path(persist_dir) / _INDEX_FILE
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def put(
+        self,
+        chunk_ids: Sequence[str],
+        rows: Sequence[tuple[str, str, str, str, str, int]],
+    ) -> None:
+        """Replace the rows of chunk_ids with (name, kind, repo, file_path,
+        chunk_id, line) rows."""
+        with self._lock:
+            conn = self._connect(create=bool(rows))
+            if conn is None:
+                return
+            with conn:
+                self._delete(conn, chunk_ids)
+                conn.executemany(
+                    "INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(name.rsplit(".", 1)[-1], name, *rest) for name, *rest in rows],
+                )
+
+    def delete(self, chunk_ids: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                self._delete(conn, chunk_ids)
+
+    def _delete(self, conn: sqlite3.Connection, chunk_ids: Sequence[str]) -> None:
+        for i in range(0, len(chunk_ids), _SQL_BATCH):
+            batch = list(chunk_ids[i : i + _SQL_BATCH])
+            marks = ",".join("?" * len(batch))
+            conn.execute(f"DELETE FROM symbols WHERE chunk_id IN ({marks})", batch)
+
+    def rows(self, chunk_ids: Sequence[str]) -> dict[str, list[tuple[str, str, int]]]:
+        """(name, kind, line) rows of the chunk_ids that have any."""
+        found: dict[str, list[tuple[str, str, int]]] = {}
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return found
+            for i in range(0, len(chunk_ids), _SQL_BATCH):
+                batch = list(chunk_ids[i : i + _SQL_BATCH])
+                marks = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    "SELECT chunk_id, name, kind, line FROM symbols "
+                    f"WHERE chunk_id IN ({marks}) ORDER BY rowid",
+                    batch,
+                )
+                for chunk_id, name, kind, line in cursor:
+                    found.setdefault(chunk_id, []).append((name, kind, line))
+        return found
+
+    def lookup(
+        self,
+        name: str,
+        repos: list[str] | None = None,
+        kind: str | None = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """Definitions named name, or whose last dotted part is name.
+
+        Matching ignores case; exact-case and fully qualified matches come
+        first.
+        """
+        sql = (
+            "SELECT name, kind, repo, file_path, chunk_id, line FROM symbols "
+            "WHERE (short = ? COLLATE NOCASE OR name = ? COLLATE NOCASE)"
+        )
+        params: list = [name.rsplit(".", 1)[-1], name]
+        if repos:
+            sql += f" AND repo IN ({','.join('?' * len(repos))})"
+            params.extend(repos)
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += (
+            " ORDER BY name = ? DESC, short = ? DESC, kind = 'env', repo, file_path,"
+            " line LIMIT ?"
+        )
+        params.extend([name, name, limit])
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return []
+            rows = conn.execute(sql, params).fetchall()
+        keys = ("name", "kind", "repo", "file_path", "chunk_id", "line")
+        return [dict(zip(keys, row, strict=True)) for row in rows]
+
+    def _connect(self, create: bool) -> sqlite3.Connection | None:
+        if self._conn is None:
+            if not create and not self._path.exists():
+                return None
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS symbols (short TEXT NOT NULL, "
+                "name TEXT NOT NULL, kind TEXT NOT NULL, repo TEXT NOT NULL, "
+                "file_path TEXT NOT NULL, chunk_id TEXT NOT NULL, "
+                "line INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS symbols_short "
+                "ON symbols (short COLLATE NOCASE)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS symbols_name "
+                "ON symbols (name COLLATE NOCASE)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS symbols_chunk ON symbols (chunk_id)"
+            )
+            self._conn = conn
+        return self._conn
@@ -0,0 +1,36 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Accumulates wall-clock time per named stage of a single operation."""
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the with-block, adding to any earlier time for the same stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def merge(self, other: "StageTimer") -> None:
+        """Add another timer's stage durations, e.g. from a worker thread."""
+        for name, secs in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + secs
+
+    def total(self) -> float:
+        """Seconds since the timer was created."""
+        return time.perf_counter() - self._start
+
+    def as_ms(self) -> dict[str, float]:
+        """Stage durations plus total, in milliseconds, keyed '<stage>_ms'."""
+        result = {f"{name}_ms": round(s * 1000, 3) for name, s in self.stages.items()}
+        result["total_ms"] = round(self.total() * 1000, 3)
+        return result
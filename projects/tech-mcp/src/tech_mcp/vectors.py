@@ -0,0 +1,272 @@
+"""Reduced-dimension vector storage with full-dimension reranking.
+
+Chroma's HNSW index keeps every vector in memory as float32, so its size is
+chunks x dimensions x 4 bytes plus graph links. With EMBED_DIMENSIONS set,
+only the first N dimensions go into the index. That works for Matryoshka
+models such as nomic-embed-text, whose leading dimensions carry most of
+the signal. The full vectors are kept on disk in a SQLite sidecar at
+reduced precision (RERANK_DTYPE: float32, float16 or int8). A search
+fetches RERANK_CANDIDATES x limit candidates from the index, then reorders
+them by cosine distance to the full query vector.
+
+The storage mode is recorded in each collection's metadata when the
+collection is created, so changing the settings never mixes dimensions in
+one index. An existing KB moves to a new mode through an embedding
+migration.
+"""
+
+import math
+import sqlite3
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from tech_mcp.config import Settings
+
+RERANK_DTYPES = ("float32", "float16", "int8", "none")
+
+_DIMENSIONS_KEY = "tech_mcp:dimensions"
+_RERANK_DTYPE_KEY = "tech_mcp:rerank_dtype"
+_SIDECAR_FILE = "rerank_vectors.sqlite3"
+# SQLite's default limit on host parameters per statement is 999 or more
+_SQL_BATCH = 500
+
+
+@dataclass(frozen=True)
+class StorageMode:
+    """How a collection stores vectors. dimensions=0 means full vectors."""
+
+    dimensions: int = 0
+    rerank_dtype: str = "none"
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "StorageMode":
+        if settings.rerank_dtype not in RERANK_DTYPES:
+            msg = (
+                f"RERANK_DTYPE must be one of {', '.join(RERANK_DTYPES)}, "
+                f"got '{settings.rerank_dtype}'"
+            )
+            raise ValueError(msg)
+        if settings.embed_dimensions <= 0:
+            return cls()
+        return cls(settings.embed_dimensions, settings.rerank_dtype)
+
+    @classmethod
+    def from_collection(cls, collection: Any) -> "StorageMode":
+        meta = collection.metadata or {}
+        return cls(
+            int(meta.get(_DIMENSIONS_KEY, 0)),
+            str(meta.get(_RERANK_DTYPE_KEY, "none")),
+        )
+
+    @property
+    def reduced(self) -> bool:
+        return self.dimensions > 0
+
+    @property
+    def reranks(self) -> bool:
+        return self.reduced and self.rerank_dtype != "none"
+
+    def metadata(self) -> dict:
+        """Collection metadata entries recording this mode."""
+        if not self.reduced:
+            return {}
+        return {
+            _DIMENSIONS_KEY: self.dimensions,
+            _RERANK_DTYPE_KEY: self.rerank_dtype,
+        }
+
+    def reduce(self, embeddings: Sequence) -> list:
+        """Truncate embeddings to the stored dimensions."""
+        if not self.reduced:
+            return list(embeddings)
+        return [embedding[: self.dimensions] for embedding in embeddings]
+
+
+# ── Encoding ─────────────────────────────────────────────────────────────────
+
+
+def encode(vector: Sequence[float], dtype: str) -> bytes:
+    """Pack a vector as little-endian float32, float16 or scaled int8."""
+    if dtype == "float32":
+        buf = array("f", vector)
+        if sys.byteorder == "big":
+            buf.byteswap()
+        return buf.tobytes()
+    if dtype == "float16":
+        return struct.pack(f"<{len(vector)}e", *vector)
+    if dtype == "int8":
+        # Symmetric per-vector scale; the scale leads as a float32
+        scale = max((abs(float(v)) for v in vector), default=0.0) / 127 or 1.0
+        quantized = array("b", (round(float(v) / scale) for v in vector))
+        return struct.pack("<f", scale) + quantized.tobytes()
+    msg = f"Unknown vector dtype: {dtype}"
+    raise ValueError(msg)
+
+
+def decode(data: bytes, dtype: str) -> list[float]:
+    if dtype == "float32":
+        buf = array("f")
+        buf.frombytes(data)
+        if sys.byteorder == "big":
+            buf.byteswap()
+        return buf.tolist()
+    if dtype == "float16":
+        return list(struct.unpack(f"<{len(data) // 2}e", data))
+    if dtype == "int8":
+        (scale,) = struct.unpack_from("<f", data)
+        quantized = array("b")
+        quantized.frombytes(data[4:])
+        return [q * scale for q in quantized]
+    msg = f"Unknown vector dtype: {dtype}"
+    raise ValueError(msg)
+
+
+def cosine_distance(a: Sequence[float], b: Sequence[float]) -> float:
+    # float(): numpy rows make sumprod return numpy scalars
+    norms = math.sqrt(float(math.sumprod(a, a)) * float(math.sumprod(b, b)))
+    if norms == 0:
+        return 1.0
+    return 1.0 - float(math.sumprod(a, b)) / norms
+
+
+# ── Sidecar ──────────────────────────────────────────────────────────────────
+
+
+class RerankStore:
+    """Full-dimension vectors for reranking, in SQLite next to Chroma's data.
+
+    The database is created on the first write, so KBs that keep full
+    vectors in the index never get one.
+    """
+
+    def __init__(self, persist_dir: str) -> None:
+        self._path = Path(persist_dir) / _SIDECAR_FILE
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def put(
+        self,
+        collection: str,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        dtype: str,
+    ) -> None:
+        rows = [
+            (collection, id_, dtype, encode(embedding, dtype))
+            for id_, embedding in zip(ids, embeddings, strict=True)
+        ]
+        with self._lock:
+            conn = self._connect(create=True)
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO vectors VALUES (?, ?, ?, ?)", rows
+                )
+
+    def get(self, collection: str, ids: Sequence[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return found
+            for i in range(0, len(ids), _SQL_BATCH):
+                batch = list(ids[i : i + _SQL_BATCH])
+                marks = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    "SELECT id, dtype, data FROM vectors "
+                    f"WHERE collection = ? AND id IN ({marks})",
+                    [collection, *batch],
+                )
+                for id_, dtype, data in cursor:
+                    found[id_] = decode(data, dtype)
+        return found
+
+    def delete(self, collection: str, ids: Sequence[str]) -> None:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                conn.executemany(
+                    "DELETE FROM vectors WHERE collection = ? AND id = ?",
+                    [(collection, id_) for id_ in ids],
+                )
+
+    def drop(self, collection: str) -> None:
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                conn.execute("DELETE FROM vectors WHERE collection = ?", (collection,))
+
+    def _connect(self, create: bool) -> sqlite3.Connection | None:
+        if self._conn is None:
+            if not create and not self._path.exists():
+                return None
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, dtype TEXT NOT NULL, "
+                "data BLOB NOT NULL, PRIMARY KEY (collection, id))"
+            )
+            self._conn = conn
+        return self._conn
+
+
+# ── Collection helpers ───────────────────────────────────────────────────────
+
+
+def write_chunks(
+    collection: Any,
+    store: RerankStore,
+    ids: list[str],
+    embeddings: Sequence[Sequence[float]],
+    documents: list[str],
+    metadatas: list[dict],
+    upsert: bool = False,
+) -> None:
+    """Add (or upsert) full embeddings in the collection's storage mode."""
+    mode = StorageMode.from_collection(collection)
+    write = collection.upsert if upsert else collection.add
+    write(
+        ids=ids,
+        embeddings=mode.reduce(embeddings),
+        documents=documents,
+        metadatas=metadatas,
+    )
+    if mode.reranks:
+        store.put(collection.name, ids, embeddings, mode.rerank_dtype)
+
+
+def delete_chunks(collection: Any, store: RerankStore, ids: list[str]) -> None:
+    collection.delete(ids=ids)
+    if StorageMode.from_collection(collection).reranks:
+        store.delete(collection.name, ids)
+
+
+def rerank(
+    query: Sequence[float],
+    ids: list[str],
+    stored: dict[str, list[float]],
+) -> list[tuple[int, float]] | None:
+    """Order candidates by full-vector cosine distance to query.
+
+    Returns (candidate index, distance) pairs, best first. Returns None if
+    any candidate lacks a stored vector (e.g. restored from a snapshot),
+    because index and full-vector distances are not comparable.
+    """
+    if any(id_ not in stored for id_ in ids):
+        return None
+    # Plain floats: sumprod over numpy scalars is an order of magnitude slower
+    query = [float(v) for v in query]
+    scored = [(i, cosine_distance(query, stored[id_])) for i, id_ in enumerate(ids)]
+    scored.sort(key=lambda pair: pair[1])
+    return scored
@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Runs a warmup callable once on a background thread and tracks status.
+
+    Status moves through: disabled | pending → running → ready | failed.
+    """
+
+    def __init__(self, enabled: bool, run: Callable[[], dict]) -> None:
+        self._run = run
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._status: dict = {"status": "pending" if enabled else "disabled"}
+
+    def start(self) -> None:
+        """Start warmup in a daemon thread. No-op if disabled or started."""
+        with self._lock:
+            if self._status["status"] != "pending" or self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._worker, name="tech-mcp-warmup", daemon=True
+            )
+            self._thread.start()
+
+    def status(self) -> dict:
+        """Return a copy of the current warmup status."""
+        with self._lock:
+            return dict(self._status)
+
+    def _worker(self) -> None:
+        started_at = datetime.now(UTC).isoformat()
+        self._set({"status": "running", "started_at": started_at})
+        start = time.monotonic()
+        try:
+            report = self._run()
+        except Exception as exc:
+            logger.exception("Warmup failed")
+            self._set(
+                {
+                    "status": "failed",
+                    "started_at": started_at,
+                    "duration_s": round(time.monotonic() - start, 3),
+                    "error": str(exc),
+                }
+            )
+            return
+        elapsed = time.monotonic() - start
+        logger.info("Warmup complete in %.2fs: %s", elapsed, report)
+        self._set(
+            {
+                "status": "ready",
+                "started_at": started_at,
+                "duration_s": round(elapsed, 3),
+                **report,
+            }
+        )
+
+    def _set(self, status: dict) -> None:
+        with self._lock:
+            self._status = status
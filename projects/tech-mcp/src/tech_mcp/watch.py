@@ -0,0 +1,251 @@
+"""Keep watched repo directories in sync with the knowledge base.
+
+Changes come from inotify (via the optional watchfiles package) or, without
+it, from polling file sizes and mtimes. Each changed path waits until it
+has been quiet for the debounce interval, so an editor's save burst or a
+large git checkout collapses into one ingest per file. Quiet paths are then
+re-ingested (or their chunks deleted, if the file is gone) one at a time,
+throttled to watch_rate chunks/s so Ollama sees a steady load.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+from tech_mcp import metrics
+from tech_mcp.generated import GeneratedFileError
+from tech_mcp.ingestion import (
+    _ALLOWED_EXTENSIONS,
+    _ALLOWED_FILENAMES,
+    _SKIP_DIRS,
+    Ingestion,
+)
+from tech_mcp.relationships import RelationshipGraph
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - depends on the environment
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+
+def watched_repos(graph: RelationshipGraph) -> dict[str, Path]:
+    """Repos with a "path" entry in relationships.json, by name."""
+    return {
+        name: Path(entry["path"])
+        for name, entry in graph.list_repos().items()
+        if entry.get("path")
+    }
+
+
+class RepoWatcher:
+    """Watches repo directories and re-ingests files as they change."""
+
+    def __init__(
+        self,
+        ingestion: Ingestion,
+        repos: dict[str, Path],
+        debounce_ms: int = 2000,
+        rate: float = 20.0,
+        polling: bool = False,
+        poll_seconds: float = 2.0,
+        extensions: Iterable[str] | None = None,
+    ) -> None:
+        self._ingestion = ingestion
+        # Chunks are stored under the path as given, so events (which arrive
+        # resolved) are mapped back onto it
+        self._roots = [
+            (name, root, root.resolve()) for name, root in sorted(repos.items())
+        ]
+        self._debounce = debounce_ms / 1000
+        self._rate = rate
+        self._polling = polling or watchfiles is None
+        self._poll_seconds = poll_seconds
+        self._extensions = set(extensions) if extensions else _ALLOWED_EXTENSIONS
+        self._due: dict[Path, tuple[str, float]] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._counts = {"ingested": 0, "deleted": 0, "skipped": 0, "failed": 0}
+        metrics.WATCH_PENDING.set_function(self.pending)
+
+    @property
+    def backend(self) -> str:
+        return "poll" if self._polling else "inotify"
+
+    def start(self) -> None:
+        """Start the event and ingest threads. No-op if already started."""
+        if self._threads or not self._roots:
+            return
+        source = self._poll if self._polling else self._listen
+        for target, name in [(source, "events"), (self._drain, "ingest")]:
+            thread = threading.Thread(
+                target=target, name=f"tech-mcp-watch-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            "Watching %d repos (%s): %s",
+            len(self._roots),
+            self.backend,
+            ", ".join(name for name, _, _ in self._roots),
+        )
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._due)
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "backend": self.backend,
+                "repos": [name for name, _, _ in self._roots],
+                "pending": len(self._due),
+                **self._counts,
+            }
+
+    def notify(self, path: str | Path) -> None:
+        """Queue a created, changed or deleted path."""
+        path = Path(path)
+        if path.is_dir():
+            for child in _walk(path):
+                self.notify(child)
+            return
+        match = self._match(path)
+        if match is None:
+            return
+        repo, file_path = match
+        due = time.monotonic() + self._debounce
+        with self._cond:
+            # A later event pushes the deadline back; the old heap entry is
+            # dropped when popped
+            self._due[file_path] = (repo, due)
+            heapq.heappush(self._heap, (due, str(file_path)))
+            self._cond.notify()
+
+    def _match(self, path: Path) -> tuple[str, Path] | None:
+        """The repo a path belongs to and its path as ingested, if wanted."""
+        absolute = Path(os.path.abspath(path))
+        for name, root, resolved in self._roots:
+            if not absolute.is_relative_to(resolved):
+                continue
+            rel = absolute.relative_to(resolved)
+            if any(part in _SKIP_DIRS for part in rel.parts):
+                return None
+            suffix_ok = path.suffix.lower() in self._extensions
+            if not suffix_ok and path.name not in _ALLOWED_FILENAMES:
+                return None
+            return name, root / rel
+        return None
+
+    # ── Event sources ────────────────────────────────────────────────────────
+
+    def _listen(self) -> None:
+        roots = [str(resolved) for _, _, resolved in self._roots]
+        try:
+            for changes in watchfiles.watch(
+                *roots, watch_filter=None, stop_event=self._stop
+            ):
+                for _, path in changes:
+                    self.notify(path)
+        except Exception:
+            logger.exception("inotify watch failed; falling back to polling")
+            self._polling = True
+            self._poll()
+
+    def _poll(self) -> None:
+        seen = self._scan()
+        while not self._stop.wait(self._poll_seconds):
+            current = self._scan()
+            for path in current.keys() | seen.keys():
+                if current.get(path) != seen.get(path):
+                    self.notify(path)
+            seen = current
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        stats = {}
+        for _, _, resolved in self._roots:
+            for path in _walk(resolved):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    # ── Ingest queue ─────────────────────────────────────────────────────────
+
+    def _drain(self) -> None:
+        while True:
+            item = self._next_due()
+            if item is None:
+                return
+            file_path, repo = item
+            start = time.monotonic()
+            chunks = self._sync(file_path, repo)
+            if self._rate > 0 and chunks:
+                # Wake early on stop rather than sleeping out the whole delay
+                delay = chunks / self._rate - (time.monotonic() - start)
+                if self._stop.wait(max(0.0, delay)):
+                    return
+
+    def _next_due(self) -> tuple[Path, str] | None:
+        """Block until a path has been quiet long enough; None on stop."""
+        with self._cond:
+            while not self._stop.is_set():
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, key = self._heap[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                file_path = Path(key)
+                entry = self._due.get(file_path)
+                if entry is None or entry[1] != due:
+                    continue
+                del self._due[file_path]
+                return file_path, entry[0]
+        return None
+
+    def _sync(self, file_path: Path, repo: str) -> int:
+        """Re-ingest or delete one file. Returns chunks written."""
+        chunks, outcome = 0, "ingested"
+        try:
+            if file_path.is_file() and file_path.stat().st_size:
+                chunks, _ = self._ingestion.ingest_file(str(file_path), repo)
+            else:
+                self._ingestion.delete_by_file(str(file_path), repo)
+                outcome = "deleted"
+        except GeneratedFileError:
+            outcome = "skipped"
+        except Exception:
+            logger.exception("Watch failed to sync %s", file_path)
+            outcome = "failed"
+        logger.info("Watch %s %s (%s, %d chunks)", outcome, file_path, repo, chunks)
+        metrics.WATCH_FILES.inc(outcome=outcome)
+        with self._cond:
+            self._counts[outcome] += 1
+        return chunks
+
+
+def _walk(root: Path) -> Iterable[Path]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+        for filename in filenames:
+            yield Path(dirpath, filename)
@@ -41,6 +41,7 @@ def settings(tmp_path):
         log_level="DEBUG",
         port=8091,
         mcp_host="0.0.0.0",
+        slow_query_log=str(tmp_path / "slow_queries.log"),
     )
 
 
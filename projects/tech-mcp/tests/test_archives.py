@@ -0,0 +1,117 @@
+import io
+import json
+import subprocess
+import tarfile
+import zipfile
+
+import pytest
+
+FILES = {
+    "docs/deploy.md": "# Deploy\n\nRun the playbook against production.\n",
+    "app/main.py": "def main():\n    return 'ok'\n",
+    "node_modules/left-pad/README.md": "# left-pad\n",
+    "package-lock.json": '{"lockfileVersion": 3}\n',
+    "logo.png": "not text",
+}
+
+
+def _write_tar(path, files):
+    with tarfile.open(path, "w:gz") as tar:
+        for name, text in files.items():
+            data = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1_700_000_000
+            tar.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+def _stored(ingestion):
+    metas = ingestion.collection.get()["metadatas"]
+    return {m["file_path"]: m for m in metas}
+
+
+def test_tarball_is_ingested_without_extracting(ingestion, tmp_path):
+    dist = tmp_path / "dist"
+    dist.mkdir()
+    archive = _write_tar(dist / "homelab-1.2.tar.gz", FILES)
+    summary = ingestion.ingest_archive(archive, "homelab", ref="v1.2")
+
+    assert summary["files_found"] == 3
+    assert summary["files_ingested"] == 2
+    assert summary["generated_skipped"]["by_reason"] == {"filename": 1}
+    stored = _stored(ingestion)
+    assert set(stored) == {
+        f"{archive}@v1.2/docs/deploy.md",
+        f"{archive}@v1.2/app/main.py",
+    }
+    meta = stored[f"{archive}@v1.2/docs/deploy.md"]
+    assert meta["ref"] == "v1.2"
+    assert meta["modified_at"].startswith("2023-11-14")
+    # Nothing was extracted next to the archive
+    assert list(dist.iterdir()) == [dist / "homelab-1.2.tar.gz"]
+
+
+def test_reingest_removes_files_gone_from_archive(ingestion, tmp_path):
+    archive = _write_tar(tmp_path / "docs.tgz", FILES)
+    ingestion.ingest_archive(archive, "homelab")
+    files = {k: v for k, v in FILES.items() if k != "app/main.py"}
+    summary = ingestion.ingest_archive(_write_tar(archive, files), "homelab")
+
+    assert summary["files_removed"] == 1
+    assert set(_stored(ingestion)) == {f"{archive}/docs/deploy.md"}
+    assert _stored(ingestion)[f"{archive}/docs/deploy.md"]["ref"] == ""
+
+
+def test_zip(ingestion, tmp_path):
+    archive = tmp_path / "site.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name, text in FILES.items():
+            zf.writestr(name, text)
+    summary = ingestion.ingest_archive(str(archive), "auth-web")
+    assert summary["files_ingested"] == 2
+
+
+def _git(repo, *args):
+    subprocess.run(
+        ["git", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        env={
+            "GIT_AUTHOR_NAME": "t",
+            "GIT_AUTHOR_EMAIL": "t@example.com",
+            "GIT_COMMITTER_NAME": "t",
+            "GIT_COMMITTER_EMAIL": "t@example.com",
+            "HOME": str(repo),
+        },
+    )
+
+
+@pytest.fixture()
+def git_repo(tmp_path):
+    repo = tmp_path / "auth-api"
+    (repo / "docs").mkdir(parents=True)
+    _git(repo, "init", "-q")
+    (repo / "docs" / "keys.md").write_text("# Keys\n\nRotate signing keys yearly.\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "v1")
+    _git(repo, "tag", "v1")
+    (repo / "docs" / "keys.md").write_text("# Keys\n\nRotate signing keys monthly.\n")
+    _git(repo, "commit", "-q", "-am", "v2")
+    return repo
+
+
+def test_git_ref(ingestion, retrieval, git_repo):
+    summary = ingestion.ingest_archive(str(git_repo), "auth-api", ref="v1")
+    assert summary["files_ingested"] == 1
+
+    docs = ingestion.collection.get()["documents"]
+    assert "yearly" in docs[0]
+    hit = json.loads(retrieval.search_kb("signing key rotation"))["results"][0]
+    assert hit["ref"] == "v1"
+    assert hit["file_path"] == f"{git_repo}@v1/docs/keys.md"
+
+    with pytest.raises(ValueError, match="Unknown git ref"):
+        ingestion.ingest_archive(str(git_repo), "auth-api", ref="v9")
+    with pytest.raises(ValueError, match="pass a git ref"):
+        ingestion.ingest_archive(str(git_repo), "auth-api")
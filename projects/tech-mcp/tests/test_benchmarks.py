@@ -0,0 +1,45 @@
+"""Smoke tests so the benchmark suites keep running as the code changes.
+
+Sizes here are tiny; real runs go through `python -m benchmarks.<name>`.
+"""
+
+import numpy as np
+from benchmarks import ingestion as ingestion_bench
+from benchmarks import quantization as quantization_bench
+from benchmarks import retrieval as retrieval_bench
+from benchmarks.fake_ollama import FakeOllamaConfig
+from benchmarks.synthetic import base_vectors, expand
+
+from tests.conftest import FakeEmbeddingFunction
+
+
+def test_vectorized_embeddings_match_fake():
+    texts = ["alpha", "beta gamma"]
+    expected = np.asarray(FakeEmbeddingFunction()(texts), dtype=np.float32)
+    np.testing.assert_allclose(expand(base_vectors(texts)), expected, atol=1e-6)
+
+
+def test_retrieval_benchmark_smoke():
+    result = retrieval_bench.run_size(size=300, queries=5, k=5, seed=0)
+    assert result["chunks"] == 300
+    assert result["search_kb"]["recall_at_k"] >= 0.8
+    assert result["search_related"]["recall_at_k"] >= 0.8
+    assert result["memory"]["persist_dir_bytes"] > 0
+
+
+def test_ingestion_benchmark_smoke():
+    config = FakeOllamaConfig(latency_ms=0, per_text_ms=0, jitter_ms=0)
+    result = ingestion_bench.run_scenario(8, "mixed", config, batch_size=10, cli=False)
+    inproc = result["in_process"]
+    assert inproc["files_ingested"] == 8
+    assert inproc["chunks"] > 0
+    assert inproc["ollama"]["texts"] == inproc["chunks"]
+    assert {"walk", "chunk", "embed", "write"} <= set(inproc["stage_s"])
+
+
+def test_quantization_benchmark_smoke():
+    dataset = quantization_bench.synthetic_dataset(300, 5, dimensions=128)
+    result = quantization_bench.run_mode(dataset, 32, "int8", k=5, candidates=4)
+    assert result["dimensions"] == 32
+    assert result["recall_at_k"] >= 0.8
+    assert result["sidecar_bytes"] > 0
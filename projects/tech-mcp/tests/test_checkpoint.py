@@ -0,0 +1,176 @@
+import pytest
+from tech_mcp.checkpoint import IngestCheckpoint
+from tech_mcp.ingestion import Ingestion
+
+from tests.conftest import FakeEmbeddingFunction
+from tests.test_dedup import CountingEmbeddingFunction
+
+SECTION = "## {n}\n\n" + "Paragraph about deploying service {n} safely. " * 12 + "\n\n"
+
+
+@pytest.fixture()
+def docs_repo(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    for name in ["a.md", "b.md", "c.md"]:
+        (root / name).write_text(SECTION.format(n=name))
+    return root
+
+
+class FlakyEmbeddingFunction(FakeEmbeddingFunction):
+    down = False
+
+    def __call__(self, input):  # noqa: A002
+        if self.down:
+            msg = "Ollama went away"
+            raise ConnectionError(msg)
+        return super().__call__(input)
+
+
+def _files(ingestion):
+    return {m["file_path"] for m in ingestion.collection.get()["metadatas"]}
+
+
+def test_failed_run_resumes(ingestion, settings, docs_repo, monkeypatch):
+    real = ingestion.ingest_file
+
+    def flaky(path, *args, **kwargs):
+        if path.endswith("b.md"):
+            msg = "Ollama went away"
+            raise ConnectionError(msg)
+        return real(path, *args, **kwargs)
+
+    monkeypatch.setattr(ingestion, "ingest_file", flaky)
+    first = ingestion.ingest_directory(str(docs_repo), "auth-api")
+    assert first["files_failed"] == 1
+    checkpoint = IngestCheckpoint(settings.chroma_persist_dir, "auth-api", docs_repo)
+    assert checkpoint.path.exists()
+
+    monkeypatch.setattr(ingestion, "ingest_file", real)
+    second = ingestion.ingest_directory(str(docs_repo), "auth-api")
+    assert second["files_resumed"] == 2
+    assert second["files_ingested"] == 1
+    assert second["files_failed"] == 0
+    assert not checkpoint.path.exists()
+    assert _files(ingestion) == {str(docs_repo / n) for n in ["a.md", "b.md", "c.md"]}
+
+    # A file edited since the checkpoint was written is not skipped
+    monkeypatch.setattr(ingestion, "ingest_file", flaky)
+    ingestion.ingest_directory(str(docs_repo), "auth-api")
+    (docs_repo / "a.md").write_text(SECTION.format(n="edited"))
+    monkeypatch.setattr(ingestion, "ingest_file", real)
+    third = ingestion.ingest_directory(str(docs_repo), "auth-api")
+    assert third["files_resumed"] == 1
+    assert third["files_ingested"] == 2
+
+
+def test_no_resume_starts_over(ingestion, settings, docs_repo, monkeypatch):
+    real = ingestion.ingest_file
+    monkeypatch.setattr(
+        ingestion,
+        "ingest_file",
+        lambda path, *a, **kw: None if path.endswith("c.md") else real(path, *a, **kw),
+    )
+    assert ingestion.ingest_directory(str(docs_repo), "auth-api")["files_failed"] == 1
+
+    monkeypatch.setattr(ingestion, "ingest_file", real)
+    summary = ingestion.ingest_directory(str(docs_repo), "auth-api", resume=False)
+    assert summary["files_resumed"] == 0
+    assert summary["files_ingested"] == 3
+
+
+def test_torn_checkpoint_line_is_ignored(settings, docs_repo):
+    checkpoint = IngestCheckpoint(settings.chroma_persist_dir, "auth-api", docs_repo)
+    checkpoint.start()
+    checkpoint.mark_done(docs_repo / "a.md")
+    checkpoint.finish(complete=False)
+    with checkpoint.path.open("a") as fh:
+        fh.write('{"file": "b.m')
+
+    resumed = IngestCheckpoint(settings.chroma_persist_dir, "auth-api", docs_repo)
+    assert resumed.start() == 1
+    resumed.mark_done(docs_repo / "c.md")
+    resumed.finish(complete=False)
+    assert (
+        IngestCheckpoint(settings.chroma_persist_dir, "auth-api", docs_repo).start()
+        == 2
+    )
+
+
+def test_unchanged_chunks_keep_embeddings(settings, graph, docs_repo):
+    ef = CountingEmbeddingFunction()
+    ingestion = Ingestion(settings, graph, ef)
+    path = docs_repo / "a.md"
+    path.write_text(SECTION.format(n=1) + SECTION.format(n=2))
+    ingestion.ingest_file(str(path), "auth-api")
+    embedded = len(ef.texts)
+
+    ingestion.ingest_file(str(path), "auth-api")
+    assert len(ef.texts) == embedded
+
+    # Only the edited section is embedded again
+    path.write_text(SECTION.format(n=1) + SECTION.format(n=3))
+    ingestion.ingest_file(str(path), "auth-api")
+    assert 0 < len(ef.texts) - embedded < embedded
+
+
+def test_replacement_drops_stale_chunks(ingestion, docs_repo):
+    path = docs_repo / "a.md"
+    path.write_text("".join(SECTION.format(n=n) for n in range(6)))
+    before, _ = ingestion.ingest_file(str(path), "auth-api")
+
+    path.write_text(SECTION.format(n=0))
+    after, _ = ingestion.ingest_file(str(path), "auth-api")
+    assert after < before
+    metas = ingestion.collection.get(where={"file_path": str(path)})["metadatas"]
+    assert len(metas) == after
+    assert {m["total_chunks"] for m in metas} == {after}
+
+
+def test_failed_embedding_keeps_old_chunks(settings, graph, docs_repo):
+    ef = FlakyEmbeddingFunction()
+    ingestion = Ingestion(settings, graph, ef)
+    path = docs_repo / "a.md"
+    ingestion.ingest_file(str(path), "auth-api")
+    before = ingestion.collection.get(where={"file_path": str(path)})["documents"]
+
+    ef.down = True
+    path.write_text(SECTION.format(n="edited"))
+    with pytest.raises(ConnectionError):
+        ingestion.ingest_file(str(path), "auth-api")
+    after = ingestion.collection.get(where={"file_path": str(path)})["documents"]
+    assert after == before
+
+
+class DyingEmbeddingFunction(FakeEmbeddingFunction):
+    """Fails every call after the first `calls_left`."""
+
+    calls_left: int | None = None
+
+    def __call__(self, input):  # noqa: A002
+        if self.calls_left is not None:
+            if self.calls_left == 0:
+                msg = "Ollama went away"
+                raise ConnectionError(msg)
+            self.calls_left -= 1
+        return super().__call__(input)
+
+
+def test_failure_between_batches_keeps_old_version(settings, graph, docs_repo):
+    ef = DyingEmbeddingFunction()
+    ingestion = Ingestion(settings, graph, ef)
+    path = docs_repo / "a.md"
+    path.write_text("".join(SECTION.format(n=n) for n in range(300)))
+    count, _ = ingestion.ingest_file(str(path), "auth-api")
+    assert count > 200  # more than one write batch
+    before = ingestion.collection.get(where={"file_path": str(path)})
+
+    # The first batch of the new version is written, then embedding dies
+    path.write_text("".join(SECTION.format(n=f"v2-{n}") for n in range(300)))
+    ef.calls_left = 1
+    with pytest.raises(ConnectionError):
+        ingestion.ingest_file(str(path), "auth-api")
+    after = ingestion.collection.get(where={"file_path": str(path)})
+    assert sorted(after["ids"]) == sorted(before["ids"])
+    assert sorted(after["documents"]) == sorted(before["documents"])
+    assert {m["total_chunks"] for m in after["metadatas"]} == {count}
@@ -0,0 +1,122 @@
+import dataclasses
+import json
+
+from tech_mcp.dedup import SignatureIndex, signature, similarity
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.retrieval import Retrieval
+
+from tests.conftest import FakeEmbeddingFunction
+
+LICENSE = """MIT License
+
+Copyright (c) {year} Example Corp
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+class CountingEmbeddingFunction(FakeEmbeddingFunction):
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def __call__(self, input):  # noqa: A002
+        self.texts.extend(input)
+        return super().__call__(input)
+
+
+def _write_license(root, repo: str, year: int) -> str:
+    path = root / repo / "LICENSE.md"
+    path.parent.mkdir(parents=True)
+    path.write_text(LICENSE.format(year=year))
+    return str(path)
+
+
+def test_similarity_separates_near_copies():
+    a = signature(LICENSE.format(year=2023))
+    b = signature(LICENSE.format(year=2024))
+    other = signature("def add(a, b):\n    return a + b\n")
+    assert similarity(a, b) > 0.9
+    assert similarity(a, other) < 0.2
+    assert signature("  \n") is None
+
+
+def test_index_find_and_delete(tmp_path):
+    index = SignatureIndex(str(tmp_path))
+    sig = signature(LICENSE.format(year=2023))
+    assert index.find(sig, 0.9) is None
+
+    index.put(["a"], [sig])
+    match = index.find(signature(LICENSE.format(year=2024)), 0.9)
+    assert match is not None
+    assert match[0] == "a"
+
+    index.delete(["a"])
+    assert index.find(sig, 0.9) is None
+
+
+def test_near_duplicate_reuses_embedding(settings, graph, tmp_path):
+    ef = CountingEmbeddingFunction()
+    ingestion = Ingestion(settings, graph, ef)
+    first = _write_license(tmp_path, "auth-api", 2023)
+    second = _write_license(tmp_path, "auth-web", 2024)
+
+    ingestion.ingest_file(first, "auth-api")
+    embedded = len(ef.texts)
+    ingestion.ingest_file(second, "auth-web")
+
+    assert len(ef.texts) == embedded
+    got = ingestion.collection.get(include=["metadatas", "embeddings"])
+    by_repo = dict(zip([m["repo"] for m in got["metadatas"]], got["ids"], strict=True))
+    metas = {m["repo"]: m for m in got["metadatas"]}
+    assert metas["auth-api"]["duplicate_of"] == ""
+    assert metas["auth-web"]["duplicate_of"] == by_repo["auth-api"]
+
+    # Removing the copy drops its signature too
+    ingestion.delete_by_file(second, "auth-web")
+    assert ingestion.signatures.find(signature(LICENSE.format(year=2024)), 1.0) is None
+
+
+def test_collapse_duplicates_folds_hits(settings, graph, fake_ef, tmp_path):
+    ingestion = Ingestion(settings, graph, fake_ef)
+    for year, repo in enumerate(["auth-api", "auth-web", "homelab"], start=2020):
+        ingestion.ingest_file(_write_license(tmp_path, repo, year), repo)
+    retrieval = Retrieval(settings, graph, fake_ef)
+
+    plain = json.loads(retrieval.search_kb("MIT license permission", limit=5))
+    assert plain["count"] == 3
+    assert "duplicates" not in plain["results"][0]
+
+    collapsed = json.loads(
+        retrieval.search_kb("MIT license permission", limit=5, collapse_duplicates=True)
+    )
+    assert collapsed["count"] == 1
+    assert len(collapsed["results"][0]["duplicates"]) == 2
+
+
+def test_zero_threshold_disables(settings, graph, tmp_path):
+    ef = CountingEmbeddingFunction()
+    settings = dataclasses.replace(settings, dedup_threshold=0.0)
+    ingestion = Ingestion(settings, graph, ef)
+    ingestion.ingest_file(_write_license(tmp_path, "auth-api", 2023), "auth-api")
+    embedded = len(ef.texts)
+    ingestion.ingest_file(_write_license(tmp_path, "auth-web", 2024), "auth-web")
+
+    assert len(ef.texts) == 2 * embedded
+    metas = ingestion.collection.get()["metadatas"]
+    assert {m["duplicate_of"] for m in metas} == {""}
@@ -0,0 +1,167 @@
+import socket
+import threading
+import time
+
+import numpy as np
+from benchmarks.fake_ollama import FakeOllama, FakeOllamaConfig
+from tech_mcp import embeddings, metrics
+from tech_mcp.embeddings import HostPool, OllamaEmbeddingFunction, parse_hosts
+from tech_mcp.ingestion import Ingestion
+
+from tests.conftest import FIXTURES_DIR, FakeEmbeddingFunction
+
+
+def _config() -> FakeOllamaConfig:
+    return FakeOllamaConfig(latency_ms=5, per_text_ms=0, jitter_ms=0)
+
+
+def _dead_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_parse_hosts():
+    assert parse_hosts("http://a:11434/, http://b:11434,,") == [
+        "http://a:11434",
+        "http://b:11434",
+    ]
+
+
+def test_batches_spread_over_hosts():
+    texts = [f"text {i}" for i in range(40)]
+    with FakeOllama(_config()) as a, FakeOllama(_config()) as b:
+        ef = OllamaEmbeddingFunction(f"{a.url},{b.url}", "nomic-embed-text")
+        got = ef(texts)
+        assert a.stats.requests > 0
+        assert b.stats.requests > 0
+        assert a.stats.requests + b.stats.requests == 4
+    expected = FakeEmbeddingFunction()(texts)
+    np.testing.assert_allclose(np.asarray(got), np.asarray(expected), atol=1e-6)
+
+
+def test_failed_host_is_ejected(monkeypatch):
+    # Another host is available, so the retry must not back off
+    monkeypatch.setattr(embeddings, "_INITIAL_BACKOFF", 60.0)
+    dead = _dead_url()
+    before = metrics.EMBED_HOST_EJECTIONS.value(host=dead)
+    with FakeOllama(_config()) as live:
+        ef = OllamaEmbeddingFunction(f"{dead},{live.url}", "nomic-embed-text")
+        assert len(ef([f"text {i}" for i in range(30)])) == 30
+    assert metrics.EMBED_HOST_EJECTIONS.value(host=dead) == before + 1
+    status = {s["host"]: s["healthy"] for s in ef.host_status()}
+    assert status == {dead: False, live.url: True}
+
+
+def test_pool_picks_least_outstanding():
+    pool = HostPool(["a", "b"], lambda _url: True)
+    first, second = pool.acquire(), pool.acquire()
+    assert {first.url, second.url} == {"a", "b"}
+    pool.release(first, ok=True)
+    assert pool.acquire() is first
+
+
+def _wait_for(condition, timeout=2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_pool_readmits_after_health_check(monkeypatch):
+    monkeypatch.setattr(embeddings, "_EJECT_SECONDS", 0.01)
+    healthy = {"a": False}
+    probes: list[str] = []
+    release_probe = threading.Event()
+
+    def check(url):
+        probes.append(url)
+        release_probe.wait()
+        return healthy.get(url, True)
+
+    pool = HostPool(["a", "b"], check)
+    pool.release(pool.acquire(exclude={"b"}), ok=False)
+
+    # The probe runs in the background; callers never wait on it
+    assert _wait_for(lambda: probes)
+    start = time.monotonic()
+    assert pool.acquire().url == "b"
+    assert time.monotonic() - start < 0.1
+    assert pool.status()[0]["healthy"] is False
+
+    # Probe fails: ejected again, then probed again
+    release_probe.set()
+    assert _wait_for(lambda: len(probes) >= 2)
+    assert pool.status()[0]["healthy"] is False
+
+    healthy["a"] = True
+    assert _wait_for(lambda: pool.status()[0]["healthy"])
+    assert pool.acquire(exclude={"b"}).url == "a"
+
+
+def test_ingest_directory_over_pool(settings, graph, fake_ef):
+    repo = str(FIXTURES_DIR / "auth-api")
+    sequential = Ingestion(settings, graph, fake_ef).ingest_directory(repo, "auth-api")
+
+    with FakeOllama(_config()) as a, FakeOllama(_config()) as b:
+        ef = OllamaEmbeddingFunction(f"{a.url},{b.url}", "nomic-embed-text")
+        pooled = Ingestion(settings, graph, ef, "pooled").ingest_directory(
+            repo, "auth-api"
+        )
+    assert pooled["files_ingested"] == sequential["files_ingested"]
+    assert pooled["chunks_created"] == sequential["chunks_created"]
+
+
+def _slow_config() -> FakeOllamaConfig:
+    return FakeOllamaConfig(latency_ms=200, per_text_ms=0, jitter_ms=0)
+
+
+def test_duplicate_texts_embedded_once():
+    before = metrics.EMBED_COALESCED.value(kind="batch")
+    with FakeOllama(_config()) as fake:
+        ef = OllamaEmbeddingFunction(fake.url, "nomic-embed-text")
+        got = ef(["header", "body", "header", "header"])
+        assert fake.stats.texts == 2
+    np.testing.assert_array_equal(got[0], got[2])
+    assert metrics.EMBED_COALESCED.value(kind="batch") == before + 2
+
+
+def _call_concurrently(ef, texts: list[str]) -> list:
+    """Call ef twice, the second while the first is in flight."""
+    results: list = [None, None]
+
+    def call(i: int) -> None:
+        try:
+            results[i] = ef(texts)
+        except Exception as exc:
+            results[i] = exc
+
+    first = threading.Thread(target=call, args=(0,))
+    first.start()
+    time.sleep(0.05)
+    call(1)
+    first.join()
+    return results
+
+
+def test_concurrent_callers_share_in_flight_text():
+    before = metrics.EMBED_COALESCED.value(kind="in_flight")
+    with FakeOllama(_slow_config()) as fake:
+        ef = OllamaEmbeddingFunction(fake.url, "nomic-embed-text")
+        first, second = _call_concurrently(ef, ["same query"])
+        assert fake.stats.texts == 1
+    np.testing.assert_array_equal(first, second)
+    assert metrics.EMBED_COALESCED.value(kind="in_flight") == before + 1
+
+
+def test_waiters_see_owner_failure(monkeypatch):
+    monkeypatch.setattr(embeddings, "_INITIAL_BACKOFF", 0.1)
+    ef = OllamaEmbeddingFunction(_dead_url(), "nomic-embed-text")
+    first, second = _call_concurrently(ef, ["same query"])
+    assert isinstance(first, RuntimeError)
+    assert second is first
+    # Nothing left registered, so a later call tries again
+    assert not ef._in_flight
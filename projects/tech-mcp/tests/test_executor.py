@@ -0,0 +1,36 @@
+"""Lane isolation for the tool executor."""
+
+import asyncio
+import dataclasses
+import threading
+import time
+
+import pytest
+from tech_mcp.executor import INGEST, SEARCH, ToolExecutor
+
+
+def test_search_not_blocked_by_ingest(settings):
+    executor = ToolExecutor(dataclasses.replace(settings, ingest_concurrency=1))
+    release = threading.Event()
+
+    async def scenario() -> float:
+        slow = [
+            asyncio.ensure_future(executor.run(INGEST, release.wait, 5))
+            for _ in range(3)
+        ]
+        start = time.monotonic()
+        await executor.run(SEARCH, time.sleep, 0)
+        elapsed = time.monotonic() - start
+        release.set()
+        await asyncio.gather(*slow)
+        return elapsed
+
+    try:
+        assert asyncio.run(scenario()) < 1.0
+    finally:
+        executor.shutdown()
+
+
+def test_invalid_limit_rejected(settings):
+    with pytest.raises(ValueError, match="search"):
+        ToolExecutor(dataclasses.replace(settings, search_concurrency=0))
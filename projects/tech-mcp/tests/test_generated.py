@@ -0,0 +1,188 @@
+import base64
+import json
+import random
+
+import pytest
+from tech_mcp.generated import GeneratedFileError, GeneratedPolicy, classify
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.relationships import RelationshipGraph
+
+from tests.conftest import FIXTURES_DIR
+
+POLICY = GeneratedPolicy()
+
+
+def _lockfile() -> str:
+    packages = {
+        f"node_modules/pkg{i}": {
+            "version": "1.0.0",
+            "resolved": f"https://registry.npmjs.org/pkg{i}/-/pkg{i}-1.0.0.tgz",
+            "integrity": "sha512-" + "a" * 40,
+        }
+        for i in range(30)
+    }
+    return json.dumps({"name": "app", "packages": packages}, indent=2)
+
+
+def _base64_blob() -> str:
+    rng = random.Random(0)
+    data = base64.encodebytes(rng.randbytes(8000)).decode()
+    return f'BLOB = """\n{data}"""\n'
+
+
+@pytest.mark.parametrize(
+    ("path", "content", "reason"),
+    [
+        ("web/app.js", "var a=function(b){return b+1};" * 200, "minified"),
+        ("web/data.json", _lockfile(), "lockfile"),
+        ("api/db.go", "// Code generated by sqlc. DO NOT EDIT.\npackage db", "header"),
+        ("web/vendor.min.js", "x", "filename"),
+        ("api/pb/user.pb.go", "package pb\n", "filename"),
+        ("scripts/assets.py", _base64_blob(), "high-entropy"),
+    ],
+)
+def test_classify_generated(path, content, reason):
+    assert classify(path, content, POLICY) == reason
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        FIXTURES_DIR / "auth-api" / "README.md",
+        FIXTURES_DIR / "auth-web" / "README.md",
+        FIXTURES_DIR / "python-mcp" / "server.py",
+    ],
+)
+def test_classify_hand_written(path):
+    assert classify(str(path), path.read_text(), POLICY) is None
+
+
+@pytest.mark.parametrize(
+    ("path", "content", "reason"),
+    [
+        ("docs/billing.md", "# Billing\n\nInvoice numbers are auto-generated.\n", None),
+        ("app/config.py", "# Do not edit these defaults without updating docs\n", None),
+        ("docs/gen.md", "Code generated by hand. Do not edit the table below.\n", None),
+        ("ui/App.tsx", "/**\n * @generated SignedSource<<abc>>\n */\n", "header"),
+        ("Api/Client.cs", "// <auto-generated>\n// Tool version 1.0\n", "header"),
+        (
+            "db/schema.sql",
+            "-- This file was automatically generated by dbmate\n",
+            "header",
+        ),
+        ("api/db_pb2.pyi", "# Code generated by protoc. DO NOT EDIT.\n", "header"),
+    ],
+)
+def test_header_markers_need_a_comment(path, content, reason):
+    assert classify(path, content, POLICY) == reason
+
+
+_JAPANESE = (
+    "## 認証サービスの設計\n\n"
+    "認証サービスはアクセストークンを発行し、有効期限と署名を検証します。"
+    "各リクエストは入口のゲートウェイで確認され、失敗した場合は再試行せずに"
+    "エラーを返します。鍵は毎月ローテーションされ、古い鍵は一週間だけ残ります。"
+    "監視ダッシュボードでは遅延、失敗率、発行数を部署ごとに表示します。"
+    "障害が起きた時は当番の担当者が手順書に従って復旧作業を行い、"
+    "原因と対策を翌営業日までに記録します。\n\n"
+)
+# One long line without spaces, as Chinese paragraphs often are
+_CHINESE = (
+    "认证服务负责签发访问令牌并校验有效期与签名。每个请求都在网关处验证，"  # noqa: RUF001
+    "失败时直接返回错误而不重试。密钥每月轮换一次，旧密钥保留一周。"  # noqa: RUF001
+    "监控面板按部门显示延迟、失败率和签发数量。"
+) * 30
+_RUSSIAN = (
+    "Сервис аутентификации выдаёт токены доступа и проверяет срок их действия "
+    "и подпись. Каждый запрос проверяется на шлюзе; при ошибке он не "
+    "повторяется. Ключи меняются раз в месяц, старый ключ хранится неделю.\n"
+)
+_CODE_BLOCK = "```python\ndef verify(token):\n    return check(token)\n```\n\n"
+
+
+@pytest.mark.parametrize(
+    ("path", "content"),
+    [
+        ("docs/design.ja.md", _JAPANESE * 20),
+        ("docs/design.ja.md", (_JAPANESE + _CODE_BLOCK) * 15),
+        ("docs/design.zh.md", "# 设计\n\n" + _CHINESE + "\n"),
+        ("docs/design.ru.md", _RUSSIAN * 30),
+    ],
+    ids=["japanese", "japanese-with-code", "chinese", "russian"],
+)
+def test_non_latin_prose_is_hand_written(path, content):
+    assert classify(path, content, POLICY) is None
+
+
+def test_streamed_head_uses_file_size():
+    head = '{"rows": [1, 2, 3]}'
+    assert classify("data/dump.json", head, POLICY) is None
+    assert classify("data/dump.json", head, POLICY, size=2**21) == "large-data"
+
+
+def test_repo_policy_overrides():
+    entry = {"generated": {"patterns": ["*.snap"], "allow": ["*.min.js"]}}
+    policy = GeneratedPolicy.for_repo("skip", entry)
+    assert classify("ui/__snapshots__/a.snap", "ok", policy) == "pattern"
+    assert classify("ui/vendor.min.js", "x", policy) is None
+    assert classify("ui/vendor.min.js", "x", GeneratedPolicy(action="index")) is None
+    with pytest.raises(ValueError, match="must be one of"):
+        GeneratedPolicy.for_repo("drop", {})
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "web").mkdir(parents=True)
+    (root / "main.py").write_text("def main():\n    return 'hello'\n")
+    (root / "web" / "app.min.js").write_text("var a=1;" * 500)
+    (root / "web" / "bundle.js").write_text("var a=function(b){return b+1};" * 200)
+    (root / "package-lock.json").write_text(_lockfile())
+    return root
+
+
+def test_ingest_directory_skips_generated(ingestion, repo):
+    summary = ingestion.ingest_directory(str(repo), "auth-web")
+
+    assert summary["files_ingested"] == 1
+    skipped = summary["generated_skipped"]
+    assert skipped["files"] == 3
+    assert skipped["by_reason"] == {"filename": 2, "minified": 1}
+    assert skipped["bytes"] > 0
+    assert skipped["chunks"] >= 3
+    paths = {m["file_path"] for m in ingestion.collection.get()["metadatas"]}
+    assert paths == {str(repo / "main.py")}
+
+
+def test_file_that_became_generated_is_removed(ingestion, repo):
+    path = repo / "web" / "helpers.js"
+    path.write_text("export function add(a, b) {\n  return a + b;\n}\n")
+    count, _ = ingestion.ingest_file(str(path), "auth-web")
+    assert count > 0
+
+    path.write_text("// @generated by build.sh\nexport const add=(a,b)=>a+b;\n")
+    with pytest.raises(GeneratedFileError, match="header"):
+        ingestion.ingest_file(str(path), "auth-web")
+    assert ingestion.collection.count() == 0
+
+
+def test_mark_action_ingests_with_flag(settings, graph, fake_ef, repo):
+    repos = graph.list_repos()
+    repos["auth-web"] = {**repos["auth-web"], "generated": {"action": "mark"}}
+    path = settings.relationships_file
+    with open(path, "w") as fh:
+        json.dump(repos, fh)
+    ingestion = Ingestion(settings, RelationshipGraph(path), fake_ef)
+
+    summary = ingestion.ingest_directory(str(repo), "auth-web")
+
+    assert summary["files_ingested"] == 4
+    assert summary["generated_skipped"]["files"] == 0
+    metas = ingestion.collection.get()["metadatas"]
+    flags = {m["file_path"].rsplit("/", 1)[-1]: m["generated"] for m in metas}
+    assert flags == {
+        "main.py": "false",
+        "app.min.js": "true",
+        "bundle.js": "true",
+        "package-lock.json": "true",
+    }
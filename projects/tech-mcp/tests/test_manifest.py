@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from tech_mcp.manifest import ManifestEntry, ingest_manifest, load_manifest
+
+from tests.conftest import FIXTURES_DIR
+
+
+def test_load_manifest(graph, tmp_path):
+    manifest = tmp_path / "repos.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "auth-api": {"path": "/repos/auth-api", "extensions": [".go"]},
+                "homelab": {"path": "/repos/homelab"},
+            }
+        )
+    )
+    entries = load_manifest(str(manifest), graph)
+    assert entries == [
+        ManifestEntry("auth-api", "/repos/auth-api", extensions=[".go"]),
+        ManifestEntry("homelab", "/repos/homelab"),
+    ]
+
+    manifest.write_text(json.dumps({"auth-api": {}}))
+    with pytest.raises(ValueError, match='no "path"'):
+        load_manifest(str(manifest), graph)
+    # relationships.json entries without a path are simply not ingested
+    assert load_manifest(str(manifest), graph, require_path=False) == []
+
+    manifest.write_text(json.dumps({"unknown": {"path": "/repos/unknown"}}))
+    with pytest.raises(ValueError, match="not found in relationships"):
+        load_manifest(str(manifest), graph)
+
+
+def test_ingest_manifest_aggregates_repos(ingestion, tmp_path):
+    entries = [
+        ManifestEntry("auth-api", str(FIXTURES_DIR / "auth-api")),
+        ManifestEntry("auth-web", str(FIXTURES_DIR / "auth-web")),
+        ManifestEntry("homelab", str(tmp_path / "missing")),
+    ]
+    updates = []
+    report = ingest_manifest(ingestion, entries, jobs=2, progress=updates.append)
+
+    by_repo = {r["repo"]: r for r in report["repos"]}
+    assert by_repo["auth-api"]["files_ingested"] > 0
+    assert "Directory not found" in by_repo["homelab"]["error"]
+    assert report["repos_failed"] == 1
+    assert report["files_ingested"] == sum(
+        by_repo[r]["files_ingested"] for r in ["auth-api", "auth-web"]
+    )
+    assert report["chunks_created"] == ingestion.collection.count()
+    assert report["chunks_per_second"] > 0
+
+    assert updates[-1]["repos_done"] == 3
+    assert updates[-1]["files_done"] == report["files_found"]
+    assert updates[-1]["chunks"] == report["chunks_created"]
+
+    # A second pass re-embeds nothing
+    again = ingest_manifest(ingestion, entries[:2], jobs=2, resume=False)
+    assert again["embeddings_reused"] == again["chunks_created"]
@@ -0,0 +1,92 @@
+"""Peak-memory budgets for full-scan maintenance paths and file ingestion.
+
+The server runs under a 512m compose limit. Scans page through the
+collection, so peak memory should depend on the page size, not on how
+many chunks exist. The tests shrink the page size so a small synthetic KB
+spans many pages; a regression that loads every row shows up as a peak
+proportional to the KB. Sizes and budgets are overridable:
+MEMORY_KB_CHUNKS, MEMORY_FILE_MB and the MEMORY_*_BUDGET_MB variables.
+"""
+
+import dataclasses
+import os
+
+import pytest
+from benchmarks.memory import MemoryReport, profile, write_large_file
+from benchmarks.synthetic import build_corpus
+from tech_mcp import ingestion as ingestion_module
+from tech_mcp.ingestion import Ingestion
+
+KB_CHUNKS = int(os.environ.get("MEMORY_KB_CHUNKS", "4000"))
+FILE_MB = float(os.environ.get("MEMORY_FILE_MB", "1"))
+PAGE_SIZE = 200
+
+# Python heap (tracemalloc) budgets, in MiB
+SCAN_BUDGET_MB = float(os.environ.get("MEMORY_SCAN_BUDGET_MB", "2"))
+# Deletes page through ids only, no metadata or documents
+DELETE_BUDGET_MB = float(os.environ.get("MEMORY_DELETE_BUDGET_MB", "0.5"))
+INGEST_BUDGET_MB = float(os.environ.get("MEMORY_INGEST_BUDGET_MB", "24"))
+# Streamed ingest holds one window and one write batch, whatever the size
+STREAM_BUDGET_MB = float(os.environ.get("MEMORY_STREAM_BUDGET_MB", "10"))
+# RSS growth also covers Chroma's native allocations; sampled, so looser
+RSS_BUDGET_MB = float(os.environ.get("MEMORY_RSS_BUDGET_MB", "64"))
+
+
+def _assert_within(report: MemoryReport, heap_budget_mb: float) -> None:
+    heap_mb = report.python_peak_bytes / 2**20
+    rss_mb = report.rss_peak_delta_bytes / 2**20
+    assert heap_mb <= heap_budget_mb, (
+        f"Python heap peak {heap_mb:.1f}MiB > {heap_budget_mb}MiB"
+    )
+    assert rss_mb <= RSS_BUDGET_MB, f"RSS peak {rss_mb:.1f}MiB > {RSS_BUDGET_MB}MiB"
+
+
+@pytest.fixture()
+def large_kb(ingestion, graph, monkeypatch):
+    monkeypatch.setattr(ingestion_module, "_SCAN_PAGE_SIZE", PAGE_SIZE)
+    build_corpus(ingestion.collection, KB_CHUNKS, sorted(graph.list_repos()))
+    # Pay Chroma's one-off segment loading outside the measured calls
+    ingestion.collection.get(limit=1)
+    return ingestion
+
+
+def test_get_stats_memory(large_kb):
+    stats, report = profile(large_kb.get_stats)
+    assert sum(sum(s.values()) for s in stats.values()) == KB_CHUNKS
+    _assert_within(report, SCAN_BUDGET_MB)
+
+
+def test_list_recent_ingestions_memory(large_kb):
+    sessions, report = profile(large_kb.list_recent_ingestions)
+    assert sessions
+    _assert_within(report, SCAN_BUDGET_MB)
+
+
+def test_delete_by_repo_memory(large_kb):
+    before = large_kb.collection.count()
+    deleted, report = profile(lambda: large_kb.delete_by_repo("auth-api"))
+    assert deleted > PAGE_SIZE
+    assert large_kb.collection.count() == before - deleted
+    _assert_within(report, DELETE_BUDGET_MB)
+
+
+def test_ingest_large_file_memory(ingestion, tmp_path):
+    path = write_large_file(tmp_path / "large", FILE_MB)
+    (chunks, _), report = profile(lambda: ingestion.ingest_file(str(path), "auth-api"))
+    assert chunks > 0
+    _assert_within(report, INGEST_BUDGET_MB)
+
+
+def test_streamed_ingest_memory(settings, graph, fake_ef, tmp_path):
+    settings = dataclasses.replace(settings, stream_ingest_kb=256)
+    ingestion = Ingestion(settings, graph, fake_ef)
+    ingestion.collection.count()
+    path = write_large_file(tmp_path / "large", FILE_MB * 2)
+    (chunks, _), report = profile(lambda: ingestion.ingest_file(str(path), "auth-api"))
+    _assert_within(report, STREAM_BUDGET_MB)
+
+    metas = ingestion.collection.get(include=["metadatas"])["metadatas"]
+    assert len(metas) == chunks
+    assert {m["total_chunks"] for m in metas} == {chunks}
+    # Every window after the first starts inside a section
+    assert all(m["heading_context"].startswith("Section") for m in metas)
@@ -0,0 +1,46 @@
+"""Prometheus text rendering and instrumentation hooks."""
+
+from tech_mcp import metrics
+from tech_mcp.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_render_exposition_format():
+    registry = Registry()
+    calls = registry.register(Counter("calls_total", "Calls."))
+    size = registry.register(Gauge("size", "Size."))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", (0.1, 1)))
+
+    calls.inc(tool="search_kb")
+    calls.inc(2, tool="search_kb")
+    size.set_function(lambda: 42)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{tool="search_kb"} 3' in lines
+    assert "size 42" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_label_values_escaped():
+    counter = Counter("c", "C.")
+    counter.inc(path='a"b\\c')
+    assert counter.render()[-1] == 'c{path="a\\"b\\\\c"} 1'
+
+
+def test_search_records_cache_and_query(populated_kb):
+    _, retrieval = populated_kb
+    hits = metrics.CACHE_REQUESTS.value(cache="query_embedding", result="hit")
+    queries = metrics.CHROMA_SECONDS.count(op="query")
+
+    retrieval.search_kb("caddy reverse proxy")
+    retrieval.search_kb("caddy reverse proxy")
+
+    after = metrics.CACHE_REQUESTS.value(cache="query_embedding", result="hit")
+    assert after == hits + 1
+    assert metrics.CHROMA_SECONDS.count(op="query") == queries + 2
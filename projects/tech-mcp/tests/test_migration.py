@@ -0,0 +1,160 @@
+import json
+import time
+from dataclasses import replace
+
+import pytest
+from tech_mcp.dedup import signature
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.migration import EmbeddingMigration, load_state, open_ingestion
+from tech_mcp.retrieval import Retrieval
+from tech_mcp.snapshot import export_snapshot, import_snapshot
+
+from tests.conftest import FIXTURES_DIR, FakeEmbeddingFunction
+
+OLD_MODEL = "nomic-embed-text"
+NEW_MODEL = "mxbai-embed-large"
+
+
+class SmallEmbeddingFunction(FakeEmbeddingFunction):
+    """A second "model": 384 dimensions, so mixing spaces would fail loudly."""
+
+    def __call__(self, input):  # noqa: A002
+        return [vector[:384] for vector in super().__call__(input)]
+
+
+def _factory(model: str):
+    return SmallEmbeddingFunction() if model == NEW_MODEL else FakeEmbeddingFunction()
+
+
+@pytest.fixture()
+def kb(settings, graph, populated_kb):
+    """Reopen the populated KB the way the server does."""
+    settings = replace(settings, migration_rate=0)
+    ingestion = open_ingestion(settings, graph, _factory)
+    retrieval = Retrieval(
+        settings, graph, ingestion.embedding_fn, ingestion.collection_name
+    )
+    migration = EmbeddingMigration(settings, ingestion, retrieval, _factory)
+    return settings, ingestion, retrieval, migration
+
+
+def _wait(migration: EmbeddingMigration) -> dict:
+    deadline = time.monotonic() + 30
+    while migration.status()["status"] == "running":
+        assert time.monotonic() < deadline, "migration did not finish"
+        time.sleep(0.02)
+    return migration.status()
+
+
+def _dimensions(collection) -> int:
+    return len(collection.peek(limit=1)["embeddings"][0])
+
+
+def test_migrate_switches_both_sides(kb):
+    settings, ingestion, retrieval, migration = kb
+    before = ingestion.collection.count()
+
+    migration.start(NEW_MODEL)
+    status = _wait(migration)
+
+    assert status["status"] == "switched"
+    assert status["state"]["model"] == NEW_MODEL
+    assert status["state"]["previous_model"] == OLD_MODEL
+    assert retrieval.collection.name == ingestion.collection_name
+    assert retrieval.collection.count() == before
+    assert _dimensions(retrieval.collection) == 384
+    results = json.loads(retrieval.search_kb("passkey authentication"))
+    assert results["count"] > 0
+    # Persisted, so a restart opens the new collection
+    assert load_state(settings).collection == ingestion.collection_name
+
+
+def test_writes_during_migration_reach_new_collection(kb):
+    settings, ingestion, retrieval, migration = kb
+    total = ingestion.collection.count()
+    # Spread the copy over about a second so the writes below race it
+    migration._settings = replace(settings, migration_rate=total)
+    migration.start(NEW_MODEL)
+
+    ingestion.ingest_file(str(FIXTURES_DIR / "python-mcp" / "server.py"), "auth-api")
+    ingestion.delete_by_repo("auth-web")
+    assert migration.status()["status"] == "running"
+    expected = ingestion.collection.get(include=["documents"])
+
+    assert _wait(migration)["status"] == "switched"
+    got = retrieval.collection.get(include=["documents"])
+    assert sorted(zip(got["ids"], got["documents"], strict=True)) == sorted(
+        zip(expected["ids"], expected["documents"], strict=True)
+    )
+
+
+def test_rollback_keeps_writes_made_after_switch(kb):
+    _, ingestion, retrieval, migration = kb
+    migration.start(NEW_MODEL)
+    _wait(migration)
+
+    count, _ = ingestion.ingest_file(
+        str(FIXTURES_DIR / "python-mcp" / "server.py"), "auth-api"
+    )
+    migrated_total = ingestion.collection.count()
+
+    status = migration.rollback()
+    assert status["status"] == "rolled_back"
+    assert status["state"]["model"] == OLD_MODEL
+    assert retrieval.collection.count() == migrated_total
+    assert _dimensions(retrieval.collection) == 768
+    assert count > 0
+
+    status = migration.finalize()
+    assert status["state"]["previous_collection"] == ""
+    names = {c.name for c in ingestion.client.list_collections()}
+    assert names == {ingestion.collection_name}
+
+
+def test_rollback_keeps_snapshot_imported_after_switch(kb, graph, tmp_path):
+    settings, ingestion, retrieval, migration = kb
+    migration.start(NEW_MODEL)
+    _wait(migration)
+    # A snapshot of another KB already on the new model
+    source = Ingestion(
+        replace(settings, chroma_persist_dir=str(tmp_path / "source")),
+        graph,
+        SmallEmbeddingFunction(),
+    )
+    source.ingest_file(str(FIXTURES_DIR / "python-mcp" / "server.py"), "auth-api")
+    path = tmp_path / "kb.snap"
+    export_snapshot(source.collection, source.rerank_store, str(path), NEW_MODEL)
+
+    summary = import_snapshot(ingestion, str(path), NEW_MODEL)
+    migrated_total = ingestion.collection.count()
+    migration.rollback()
+
+    imported = source.collection.get(include=["documents"])
+    assert summary["chunks_imported"] == len(imported["ids"]) > 0
+    assert retrieval.collection.count() == migrated_total
+    restored = retrieval.collection.get(ids=imported["ids"], include=["embeddings"])
+    assert len(restored["ids"]) == len(imported["ids"])
+    assert {len(e) for e in restored["embeddings"]} == {768}
+    match = ingestion.signatures.find(signature(imported["documents"][0]), 0.99)
+    assert match is not None
+
+
+def test_cancel_drops_shadow(kb):
+    settings, ingestion, retrieval, migration = kb
+    # Slow enough to still be running when cancelled
+    migration._settings = replace(settings, migration_rate=1)
+    migration.start(NEW_MODEL)
+    shadow = migration.status()["shadow_collection"]
+
+    status = migration.rollback()
+
+    assert status["status"] == "cancelled"
+    assert status["state"]["pending_collection"] == ""
+    assert shadow not in {c.name for c in ingestion.client.list_collections()}
+    assert _dimensions(retrieval.collection) == 768
+
+
+def test_rejects_same_model(kb):
+    _, _, _, migration = kb
+    with pytest.raises(ValueError, match="already embedded"):
+        migration.start(OLD_MODEL)
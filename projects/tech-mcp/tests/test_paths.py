@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+
+import pytest
+from tech_mcp import retrieval as retrieval_module
+from tech_mcp.paths import glob_regex
+
+FILES = {
+    "internal/auth/token.go": "package auth\n\nfunc Verify() bool { return true }\n",
+    "internal/auth/keys.go": "package auth\n\nfunc Rotate() error { return nil }\n",
+    "internal/billing/invoice.go": "package billing\n\nfunc Total() int { return 1 }\n",
+    "deploy/values.yaml": "replicas: 2\nimage: auth-api\n",
+    "deploy/auth/config.yaml": "issuer: https://auth.example.com\n",
+    "docs/auth.md": "# Auth\n\nTokens are verified on every request.\n",
+}
+
+
+@pytest.mark.parametrize(
+    ("glob", "path", "matches"),
+    [
+        ("*.yaml", "/r/deploy/values.yaml", True),
+        ("*.yaml", "/r/deploy/values.yml", False),
+        ("internal/*/*.go", "/r/internal/auth/token.go", True),
+        ("internal/*.go", "/r/internal/auth/token.go", False),
+        ("internal/**/*.go", "/r/internal/auth/token.go", True),
+        ("deploy/**", "/r/deploy/auth/config.yaml", True),
+        ("/r/docs/*", "/r/docs/auth.md", True),
+        ("/docs/*", "/r/docs/auth.md", False),
+        ("?uth.md", "/r/docs/auth.md", True),
+    ],
+)
+def test_glob(glob, path, matches):
+    assert bool(glob_regex(glob).fullmatch(path)) is matches
+
+
+@pytest.fixture()
+def repo(ingestion, tmp_path):
+    root = tmp_path / "auth-api"
+    for name, text in FILES.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text)
+    ingestion.ingest_directory(str(root), "auth-api")
+    return root
+
+
+def _files(retrieval, root, **kwargs):
+    payload = json.loads(retrieval.search_kb("auth", limit=20, **kwargs))
+    assert "error" not in payload
+    return {
+        Path(r["file_path"]).relative_to(root).as_posix() for r in payload["results"]
+    }
+
+
+def test_scoped_search(retrieval, repo):
+    assert _files(retrieval, repo, path_prefix="internal/auth/") == {
+        "internal/auth/token.go",
+        "internal/auth/keys.go",
+    }
+    assert _files(retrieval, repo, path_prefix=f"{repo}/deploy") == {
+        "deploy/values.yaml",
+        "deploy/auth/config.yaml",
+    }
+    assert _files(retrieval, repo, path_glob="*.yaml") == {
+        "deploy/values.yaml",
+        "deploy/auth/config.yaml",
+    }
+    assert _files(retrieval, repo, path_prefix="deploy/", path_glob="auth/*") == {
+        "deploy/auth/config.yaml"
+    }
+    assert _files(retrieval, repo, path_glob="*.md", source_type="code") == set()
+    assert _files(retrieval, repo, path_glob="*.go", repos=["auth-web"]) == set()
+
+    similar = retrieval.search_similar(
+        file_path=str(repo / "internal/auth/token.go"), path_prefix="internal/"
+    )
+    assert {r["file_path"] for r in json.loads(similar)["results"]} == {
+        str(repo / "internal/auth/keys.go"),
+        str(repo / "internal/billing/invoice.go"),
+    }
+
+
+def test_search_plans_agree(retrieval, repo, monkeypatch):
+    def search():
+        response = retrieval.search_kb("auth", limit=3, path_glob="*.go")
+        return json.loads(response)["results"]
+
+    exact = search()
+    # Shortlist from an unfiltered query, then an id-filtered query
+    monkeypatch.setattr(retrieval_module, "_EXACT_SCOPE_MAX", 0)
+    shortlist = search()
+    monkeypatch.setattr(retrieval_module, "_SHORTLIST_MAX", 0)
+    filtered = search()
+
+    for got in (shortlist, filtered):
+        assert [r["id"] for r in got] == [r["id"] for r in exact]
+        for a, b in zip(got, exact, strict=True):
+            assert a["distance"] == pytest.approx(b["distance"], abs=1e-5)
+
+
+def test_index_follows_deletes_and_existing_kbs(
+    settings, graph, fake_ef, ingestion, repo
+):
+    ingestion.delete_by_file(str(repo / "internal/auth/keys.go"), "auth-api")
+    retrieval = retrieval_module.Retrieval(settings, graph, fake_ef)
+    assert _files(retrieval, repo, path_prefix="internal/auth") == {
+        "internal/auth/token.go"
+    }
+
+    # A KB from before the index existed is indexed on first use
+    (Path(settings.chroma_persist_dir) / "paths.sqlite3").unlink()
+
+    fresh = retrieval_module.Retrieval(settings, graph, fake_ef)
+    assert _files(fresh, repo, path_prefix="internal/") == {
+        "internal/auth/token.go",
+        "internal/billing/invoice.go",
+    }
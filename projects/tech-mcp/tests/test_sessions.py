@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.sessions import parse_sessions
+
+from tests.conftest import FIXTURES_DIR, FakeEmbeddingFunction
+
+SESSION = json.loads((FIXTURES_DIR / "debug_session.json").read_text())
+
+
+def _lines(n):
+    return [
+        json.dumps({**SESSION, "problem": f"{SESSION['problem']} #{i}"}) + "\n"
+        for i in range(n)
+    ]
+
+
+def test_parse_reports_every_bad_line(graph):
+    bad = {**SESSION, "repos": ["nope"], "severity": "high"}
+    lines = [*_lines(1), "\n", "{not json\n", json.dumps(bad) + "\n", "[]\n"]
+    with pytest.raises(ValueError, match="3 invalid sessions") as exc:
+        parse_sessions(lines, graph)
+    message = str(exc.value)
+    assert "line 3: invalid JSON" in message
+    assert "line 4: unknown key 'severity'; unknown repo 'nope'" in message
+    assert "line 5: not a JSON object" in message
+
+    assert len(parse_sessions([*_lines(2), "\n"], graph)) == 2
+
+
+class CallRecordingEmbeddingFunction(FakeEmbeddingFunction):
+    def __init__(self) -> None:
+        self.calls: list[int] = []
+
+    def __call__(self, input):  # noqa: A002
+        self.calls.append(len(input))
+        return super().__call__(input)
+
+
+def test_bulk_sessions_batch_embedding(settings, graph):
+    ef = CallRecordingEmbeddingFunction()
+    ingestion = Ingestion(settings, graph, ef)
+    summary = ingestion.ingest_sessions(parse_sessions(_lines(30), graph))
+
+    assert summary["sessions"] == 30
+    assert len(set(summary["ingest_session_ids"])) == 30
+    assert summary["chunks_created"] == ingestion.collection.count()
+    # One embed call per write batch, not one per session
+    assert len(ef.calls) < 5
+
+
+def test_rerun_replaces_sessions(ingestion, graph):
+    sessions = parse_sessions(
+        [*_lines(3), json.dumps({**SESSION, "date": "2024-02-01"})], graph
+    )
+    first = ingestion.ingest_sessions(sessions)
+    count = ingestion.collection.count()
+
+    again = ingestion.ingest_sessions(sessions)
+    assert again["ingest_session_ids"] == first["ingest_session_ids"]
+    assert ingestion.collection.count() == count
+
+    sid = first["ingest_session_ids"][-1]
+    got = ingestion.collection.get(where={"ingest_session_id": sid})
+    assert got["metadatas"][0]["modified_at"] == "2024-02-01T00:00:00+00:00"
+    assert "**Date:** 2024-02-01" in got["documents"][0]
@@ -0,0 +1,82 @@
+import json
+from dataclasses import replace
+
+import pytest
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.retrieval import Retrieval
+
+from tests.conftest import FIXTURES_DIR, FakeEmbeddingFunction
+
+
+class OllamaDownEmbeddingFunction(FakeEmbeddingFunction):
+    def __call__(self, input):  # noqa: A002
+        msg = "Ollama is down"
+        raise ConnectionError(msg)
+
+
+@pytest.fixture()
+def offline(populated_kb, settings, graph):
+    ingestion, _ = populated_kb
+    return ingestion, Retrieval(settings, graph, OllamaDownEmbeddingFunction())
+
+
+def _similar(retrieval, **kwargs):
+    payload = json.loads(retrieval.search_similar(**kwargs))
+    assert "error" not in payload
+    return payload["results"]
+
+
+def test_similar_to_chunk_skips_its_file(offline):
+    ingestion, retrieval = offline
+    readme = str(FIXTURES_DIR / "auth-api" / "README.md")
+    chunk_id = ingestion.collection.get(where={"file_path": readme})["ids"][0]
+
+    results = _similar(retrieval, chunk_id=chunk_id, limit=10)
+    assert results
+    assert all(r["file_path"] != readme for r in results)
+    distances = [r["distance"] for r in results]
+    assert distances == sorted(distances)
+
+    results = _similar(retrieval, chunk_id=chunk_id, repos=["auth-web"])
+    assert {r["repo"] for r in results} == {"auth-web"}
+    results = _similar(retrieval, chunk_id=chunk_id, source_type="session")
+    assert {r["source_type"] for r in results} == {"session"}
+
+
+def test_similar_to_file_and_session(offline):
+    ingestion, retrieval = offline
+    server = str(FIXTURES_DIR / "python-mcp" / "server.py")
+    results = _similar(retrieval, file_path=server, limit=50)
+    assert results
+    assert all(r["file_path"] != server for r in results)
+
+    session = ingestion.collection.get(where={"source": "session"})["ids"][0]
+    results = _similar(retrieval, chunk_id=session, limit=50)
+    assert results
+    assert all(r["source_type"] != "session" for r in results)
+
+    for kwargs in ({"chunk_id": "nope:0"}, {"file_path": "/nope"}, {}):
+        assert "error" in json.loads(retrieval.search_similar(**kwargs))
+
+
+def test_reduced_index_uses_full_vectors(populated_kb, settings, graph, fake_ef):
+    ingestion, retrieval = populated_kb
+    reduced_settings = replace(
+        settings,
+        chroma_persist_dir=settings.chroma_persist_dir + "-reduced",
+        embed_dimensions=64,
+        rerank_dtype="float32",
+    )
+    reduced = Ingestion(reduced_settings, graph, fake_ef)
+    for path, repo in (
+        ("auth-api/README.md", "auth-api"),
+        ("auth-web/README.md", "auth-web"),
+        ("python-mcp/server.py", "home-mcp"),
+    ):
+        reduced.ingest_file(str(FIXTURES_DIR / path), repo)
+
+    chunk_id = ingestion.collection.get(where={"repo": "auth-web"})["ids"][0]
+    kwargs = {"chunk_id": chunk_id, "source_type": "doc", "limit": 3}
+    got = _similar(Retrieval(reduced_settings, graph, fake_ef), **kwargs)
+    expected = _similar(retrieval, **kwargs)
+    assert [r["id"] for r in got] == [r["id"] for r in expected]
@@ -0,0 +1,182 @@
+from dataclasses import replace
+
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.snapshot import SnapshotError, export_snapshot, import_snapshot
+
+from tests.conftest import FIXTURES_DIR
+
+MODEL = "nomic-embed-text"
+
+
+class NoEmbeddingFunction(EmbeddingFunction):
+    """Fails the test if an import tries to embed anything."""
+
+    def __init__(self) -> None:
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:  # noqa: A002
+        msg = "import must not call the embedding function"
+        raise AssertionError(msg)
+
+
+def _restored(settings, graph, tmp_path, name="restored", **overrides) -> Ingestion:
+    other = replace(settings, chroma_persist_dir=str(tmp_path / name), **overrides)
+    return Ingestion(other, graph, NoEmbeddingFunction())
+
+
+@pytest.fixture()
+def target(settings, graph, tmp_path):
+    return _restored(settings, graph, tmp_path)
+
+
+def _dump(collection) -> dict:
+    rows = collection.get(include=["documents", "metadatas", "embeddings"])
+    return {
+        id_: (doc, meta, [round(float(v), 5) for v in emb])
+        for id_, doc, meta, emb in zip(
+            rows["ids"],
+            rows["documents"],
+            rows["metadatas"],
+            rows["embeddings"],
+            strict=True,
+        )
+    }
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip_without_embedding(populated_kb, target, tmp_path, compress):
+    ingestion, _ = populated_kb
+    path = tmp_path / "kb.snap"
+
+    exported = export_snapshot(
+        ingestion.collection,
+        ingestion.rerank_store,
+        str(path),
+        MODEL,
+        compress=compress,
+    )
+    imported = import_snapshot(target, str(path), MODEL)
+
+    assert exported["chunks"] == ingestion.collection.count()
+    assert exported["dimensions"] == 768
+    assert imported["chunks_imported"] == exported["chunks"]
+    assert _dump(target.collection) == _dump(ingestion.collection)
+
+
+def test_repo_filters(populated_kb, target, tmp_path):
+    ingestion, _ = populated_kb
+    path = tmp_path / "kb.snap"
+
+    export_snapshot(
+        ingestion.collection,
+        ingestion.rerank_store,
+        str(path),
+        MODEL,
+        repos=["auth-api"],
+    )
+    summary = import_snapshot(target, str(path), MODEL)
+    repos = {
+        m["repo"] for m in target.collection.get(include=["metadatas"])["metadatas"]
+    }
+    assert repos == {"auth-api"}
+    assert summary["chunks_skipped"] == 0
+
+    export_snapshot(ingestion.collection, ingestion.rerank_store, str(path), MODEL)
+    summary = import_snapshot(target, str(path), MODEL, repos=["auth-web"])
+    repos = {
+        m["repo"] for m in target.collection.get(include=["metadatas"])["metadatas"]
+    }
+    assert repos == {"auth-api", "auth-web"}
+    assert summary["chunks_skipped"] > 0
+
+
+def test_rejects_other_model(populated_kb, target, tmp_path):
+    ingestion, _ = populated_kb
+    path = tmp_path / "kb.snap"
+    export_snapshot(ingestion.collection, ingestion.rerank_store, str(path), MODEL)
+
+    with pytest.raises(SnapshotError, match="embedded with"):
+        import_snapshot(target, str(path), "mxbai-embed-large")
+    assert target.collection.count() == 0
+
+    import_snapshot(target, str(path), "mxbai-embed-large", force=True)
+    assert target.collection.count() == ingestion.collection.count()
+
+
+def test_rejects_truncated_file(populated_kb, target, tmp_path):
+    ingestion, _ = populated_kb
+    path = tmp_path / "kb.snap"
+    export_snapshot(ingestion.collection, ingestion.rerank_store, str(path), MODEL)
+    path.write_bytes(path.read_bytes()[:-10])
+
+    with pytest.raises(SnapshotError, match="truncated"):
+        import_snapshot(target, str(path), MODEL)
+
+
+def test_reduced_kb_exports_full_vectors(settings, graph, fake_ef, tmp_path):
+    reduced = replace(
+        settings,
+        chroma_persist_dir=str(tmp_path / "reduced"),
+        embed_dimensions=64,
+        rerank_dtype="float32",
+    )
+    source = Ingestion(reduced, graph, fake_ef)
+    source.ingest_file(str(FIXTURES_DIR / "auth-api" / "README.md"), "auth-api")
+    path = tmp_path / "kb.snap"
+    exported = export_snapshot(source.collection, source.rerank_store, str(path), MODEL)
+    assert exported["dimensions"] == 768
+    assert exported["full_vectors"] is True
+
+    # Into a reduced KB: truncated in the index, full vectors kept for rerank
+    target = _restored(settings, graph, tmp_path, embed_dimensions=128)
+    import_snapshot(target, str(path), MODEL)
+    ids = target.collection.get()["ids"]
+    assert len(target.collection.peek(limit=1)["embeddings"][0]) == 128
+    full = target.rerank_store.get(target.collection.name, ids)
+    assert set(full) == set(ids)
+    assert {len(v) for v in full.values()} == {768}
+
+
+def test_rejects_truncated_vectors(settings, graph, fake_ef, tmp_path):
+    reduced = replace(
+        settings,
+        chroma_persist_dir=str(tmp_path / "reduced"),
+        embed_dimensions=64,
+        rerank_dtype="none",
+    )
+    source = Ingestion(reduced, graph, fake_ef)
+    source.ingest_file(str(FIXTURES_DIR / "auth-api" / "README.md"), "auth-api")
+    path = tmp_path / "kb.snap"
+    exported = export_snapshot(source.collection, source.rerank_store, str(path), MODEL)
+    assert exported["dimensions"] == 64
+    assert exported["full_vectors"] is False
+
+    target = _restored(settings, graph, tmp_path)
+    with pytest.raises(SnapshotError, match="needs full vectors"):
+        import_snapshot(target, str(path), MODEL)
+    assert target.collection.count() == 0
+
+    wider = _restored(settings, graph, tmp_path, "wider", embed_dimensions=128)
+    with pytest.raises(SnapshotError, match="indexes 128"):
+        import_snapshot(wider, str(path), MODEL)
+
+
+def test_symbols_travel_with_snapshot(ingestion, settings, graph, tmp_path):
+    ingestion.ingest_file(str(FIXTURES_DIR / "python-mcp" / "server.py"), "home-mcp")
+    expected = ingestion.symbols.rows(ingestion.collection.get()["ids"])
+    assert expected
+    path = tmp_path / "kb.snap"
+    export_snapshot(
+        ingestion.collection,
+        ingestion.rerank_store,
+        str(path),
+        MODEL,
+        symbols=ingestion.symbols,
+    )
+
+    target = _restored(settings, graph, tmp_path)
+    summary = import_snapshot(target, str(path), MODEL)
+    assert summary["symbols_imported"] == sum(map(len, expected.values()))
+    assert target.symbols.rows(list(expected)) == expected
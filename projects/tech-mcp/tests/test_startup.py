@@ -0,0 +1,83 @@
+"""Import-time benchmark for the server module.
+
+Importing tech_mcp.server must stay cheap: the stdio transport pays it on
+every launch. Heavy libraries are deferred to the first tool call.
+
+Run: uv run pytest tests/test_startup.py -s
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# Generous default; tighten locally with STARTUP_BUDGET_MS.
+_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "3000"))
+
+_DEFERRED_MODULES = ("chromadb", "langchain_text_splitters", "tech_mcp.ingestion")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import tech_mcp.server
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    "import_ms": elapsed,
+    "loaded": [m for m in sys.argv[1:] if m in sys.modules],
+}))
+"""
+
+
+_LIFESPAN_PROBE = """
+import asyncio, json
+import tech_mcp.server as server
+
+async def main():
+    app = server.mcp.streamable_http_app()
+    before = server._background_started.is_set()
+    async with app.router.lifespan_context(app):
+        started = server._background_started.is_set()
+    print(json.dumps({"before": before, "started": started}))
+
+asyncio.run(main())
+"""
+
+
+def _probe(tmp_path, probe: str = _PROBE, *args: str) -> dict:
+    env = {
+        **os.environ,
+        # Unroutable host: any network call at import would stall or fail
+        "OLLAMA_HOST": "http://127.0.0.1:9",
+        "PORT": "8091",
+        "CHROMA_PERSIST_DIR": str(tmp_path / "chroma"),
+        "RELATIONSHIPS_FILE": str(tmp_path / "relationships.json"),
+        "LOG_LEVEL": "WARNING",
+        "WARMUP_ENABLED": "false",
+    }
+    proc = subprocess.run(
+        [sys.executable, "-c", probe, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_import_defers_heavy_dependencies(tmp_path):
+    result = _probe(tmp_path, _PROBE, *_DEFERRED_MODULES)
+    assert result["loaded"] == []
+    # Nothing is constructed at import, so no files are written either
+    assert not (tmp_path / "relationships.json").exists()
+
+
+def test_import_time_budget(tmp_path):
+    result = _probe(tmp_path, _PROBE, *_DEFERRED_MODULES)
+    print(f"\nimport tech_mcp.server: {result['import_ms']:.0f}ms")
+    assert result["import_ms"] < _BUDGET_MS
+
+
+def test_http_lifespan_starts_background_tasks(tmp_path):
+    result = _probe(tmp_path, _LIFESPAN_PROBE)
+    assert result == {"before": False, "started": True}
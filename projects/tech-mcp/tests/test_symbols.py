@@ -0,0 +1,257 @@
+import json
+import textwrap
+
+import pytest
+from tech_mcp.symbols import chunk_code, find_spans
+
+from tests.conftest import FIXTURES_DIR
+
+PYTHON = textwrap.dedent(
+    '''\
+    import os
+
+    LIMIT = 3
+
+
+    # Reads the config file
+    @cache
+    def load(path):
+        return open(path).read()
+
+
+    class Store:
+        """Key-value store."""
+
+        def get(self, key):
+            return self.data[key]
+
+        def put(self, key, value):
+            self.data[key] = value
+
+
+    if __name__ == "__main__":
+        load(os.environ["CONFIG"])
+    '''
+)
+
+GO = textwrap.dedent(
+    """\
+    package server
+
+    import "net/http"
+
+    type ID string
+
+    // Server handles requests.
+    type Server struct {
+    \taddr string
+    }
+
+    // Start listens on addr.
+    func (s *Server) Start() error {
+    \tpath := "/api/{id}"
+    \treturn http.ListenAndServe(s.addr, nil)
+    }
+
+    func New(addr string) *Server {
+    \treturn &Server{addr: addr}
+    }
+    """
+)
+
+TS = textwrap.dedent(
+    """\
+    import { api } from "./api";
+
+    const ID = /^[a-z{]+$/;
+
+    /**
+     * Fetches a user.
+     */
+    export async function getUser(id: string) {
+      if (!ID.test(id)) {
+        throw new Error(`bad id: ${id}`);
+      }
+      return api.get(`/users/${id}`);
+    }
+
+    export default class Client {
+      private base = "/";
+
+      fetch(path: string) {
+        return api.get(this.base + path);
+      }
+    }
+    """
+)
+
+
+def _spans(text, language):
+    return [(s.name, s.kind, s.start, s.end) for s in find_spans(text, language)]
+
+
+def test_python_spans_include_decorators_and_comments():
+    spans = find_spans(PYTHON, "python")
+    assert [(s.name, s.kind, s.start, s.end) for s in spans] == [
+        ("load", "function", 5, 9),
+        ("Store", "class", 11, 19),
+    ]
+    assert [c.name for c in spans[1].children] == ["Store.get", "Store.put"]
+
+
+def test_go_spans():
+    assert _spans(GO, "go") == [
+        ("Server", "type", 6, 10),
+        ("Server.Start", "method", 11, 16),
+        ("New", "function", 17, 20),
+    ]
+
+
+def test_ts_spans_skip_regex_and_template_brackets():
+    assert _spans(TS, "ts") == [
+        ("getUser", "function", 4, 13),
+        ("Client", "class", 14, 21),
+    ]
+
+
+def test_chunks_are_whole_symbols_without_overlap():
+    chunks = chunk_code(PYTHON, "python", max_chars=120)
+    # Store is too big, so its methods go separately; module code packs along
+    assert [c["heading_context"] for c in chunks] == [
+        "load",
+        "Store, Store.get",
+        "Store.put",
+    ]
+    text = "".join(c["text"] for c in chunks)
+    assert text.count("def get") == 1
+    assert len(text) < len(PYTHON)
+
+    # Small neighbours share a chunk
+    packed = chunk_code(PYTHON, "python", max_chars=1600)
+    assert len(packed) == 1
+    assert packed[0]["heading_context"] == "load, Store"
+
+
+def test_oversized_class_splits_into_methods():
+    chunks = chunk_code(PYTHON, "python", max_chars=60)
+    headings = [c["heading_context"] for c in chunks]
+    assert "Store.get" in headings
+    assert "Store.put" in headings
+    assert all(len(c["text"]) <= 60 for c in chunks)
+
+
+def test_unparsable_source_falls_back(ingestion):
+    assert chunk_code("def broken(:\n", "python", 1600) is None
+    assert chunk_code("func main() {\n", "go", 1600) is None
+
+    chunks = ingestion._chunk_code("def broken(:\n    pass\n", "python")
+    assert chunks == [{"text": "def broken(:\n    pass", "heading_context": ""}]
+
+
+def test_ingested_code_has_symbol_headings(ingestion):
+    ingestion.ingest_file(str(FIXTURES_DIR / "python-mcp" / "server.py"), "tech-mcp")
+    metas = ingestion.collection.get()["metadatas"]
+    assert all(m["heading_context"] for m in metas)
+
+
+def test_chunks_list_defined_symbols_and_env_vars():
+    chunks = chunk_code(PYTHON, "python", max_chars=1600)
+    assert chunks[0]["lines"] == (1, 23)
+    assert chunks[0]["symbols"] == [
+        ("load", "function", 8),
+        ("Store", "class", 12),
+        ("Store.get", "method", 15),
+        ("Store.put", "method", 18),
+        ("CONFIG", "env", 23),
+    ]
+    ts = chunk_code("const a = process.env.API_URL;\n", "ts", 1600)
+    assert ts[0]["symbols"] == [("API_URL", "env", 1)]
+
+
+@pytest.fixture()
+def code_repo(tmp_path):
+    (tmp_path / "store.py").write_text(PYTHON)
+    (tmp_path / "server.go").write_text(GO)
+    return tmp_path
+
+
+def test_lookup_symbol(ingestion, retrieval, code_repo):
+    ingestion.ingest_directory(str(code_repo), "auth-api")
+
+    found = json.loads(retrieval.lookup_symbol("start"))
+    assert found["count"] == 1
+    hit = found["results"][0]
+    assert hit["name"] == "Server.Start"
+    assert hit["kind"] == "method"
+    assert hit["line"] == 13
+    assert hit["file_path"] == str(code_repo / "server.go")
+
+    env = json.loads(retrieval.lookup_symbol("CONFIG", include_content=True))
+    assert env["results"][0]["kind"] == "env"
+    assert 'os.environ["CONFIG"]' in env["results"][0]["content"]
+
+    assert (
+        json.loads(retrieval.lookup_symbol("Store", repos=["auth-web"]))["count"] == 0
+    )
+
+
+def test_symbol_index_follows_chunks(ingestion, retrieval, code_repo):
+    path = str(code_repo / "store.py")
+    ingestion.ingest_file(path, "auth-api")
+    ingestion.ingest_file(path, "auth-api")
+    assert json.loads(retrieval.lookup_symbol("Store.get"))["count"] == 1
+
+    ingestion.delete_by_file(path, "auth-api")
+    assert json.loads(retrieval.lookup_symbol("Store.get"))["count"] == 0
+
+
+def test_rebuild_fills_missing_index(ingestion, retrieval, code_repo):
+    ingestion.ingest_directory(str(code_repo), "auth-api")
+    expected = json.loads(retrieval.lookup_symbol("Store.get"))["results"]
+    ids = ingestion.collection.get()["ids"]
+    ingestion.symbols.delete(ids)
+    assert json.loads(retrieval.lookup_symbol("Store.get"))["count"] == 0
+
+    (code_repo / "server.go").unlink()
+    summary = ingestion.rebuild_symbols()
+    assert summary["files_indexed"] == 1
+    assert summary["files_missing"] == 1
+    assert summary["chunks_unmatched"] == 0
+    assert json.loads(retrieval.lookup_symbol("Store.get"))["results"] == expected
+
+
+def test_rebuild_indexes_character_split_chunks(ingestion, retrieval, tmp_path):
+    # Before symbol chunking, code went through the overlapping splitter
+    path = tmp_path / "handlers.py"
+    path.write_text(
+        "\n\n".join(
+            f"def handle_{i}(request):\n"
+            + "".join(f"    step_{j} = request.get('k{j}')\n" for j in range(8))
+            + "    return step_0\n"
+            for i in range(20)
+        )
+    )
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr("tech_mcp.ingestion.chunk_code", lambda *_args: None)
+        count, _ = ingestion.ingest_file(str(path), "auth-api")
+    assert count > 2
+    assert json.loads(retrieval.lookup_symbol("handle_7"))["count"] == 0
+
+    summary = ingestion.rebuild_symbols()
+    assert summary["files_indexed"] == 1
+    assert summary["chunks_unmatched"] == 0
+    assert summary["symbols"] == 20
+    for i in (0, 7, 19):
+        found = json.loads(retrieval.lookup_symbol(f"handle_{i}", include_content=True))
+        assert found["count"] == 1
+        assert f"def handle_{i}(" in found["results"][0]["content"]
+
+
+def test_rebuild_counts_only_files_that_got_symbols(ingestion, code_repo):
+    path = code_repo / "store.py"
+    ingestion.ingest_file(str(path), "auth-api")
+    path.write_text("def other():\n    return 1\n")
+    summary = ingestion.rebuild_symbols()
+    assert summary["files_indexed"] == 0
+    assert summary["chunks_unmatched"] > 0
+    assert summary["symbols"] == 0
@@ -0,0 +1,49 @@
+"""Search timing breakdown and slow-query log."""
+
+import dataclasses
+import json
+from pathlib import Path
+
+from tech_mcp.retrieval import Retrieval
+
+
+def test_debug_timing_breakdown(populated_kb):
+    _, retrieval = populated_kb
+    data = json.loads(retrieval.search_kb("caddy 502", debug_timing=True))
+    timing = data["timing"]
+    for stage in ("embed_ms", "query_ms", "format_ms", "total_ms"):
+        assert timing[stage] >= 0
+    assert timing["embed_cache_hit"] is False
+    assert data["count"] > 0
+
+
+def test_timing_omitted_by_default(populated_kb):
+    _, retrieval = populated_kb
+    assert "timing" not in json.loads(retrieval.search_kb("caddy 502"))
+
+
+def test_search_related_times_expansion(populated_kb):
+    _, retrieval = populated_kb
+    data = json.loads(
+        retrieval.search_related("login flow", "auth-api", debug_timing=True)
+    )
+    assert "expand_ms" in data["timing"]
+
+
+def test_slow_query_logged(populated_kb, settings, graph, fake_ef):
+    slow = dataclasses.replace(settings, slow_query_ms=0.001)
+    retrieval = Retrieval(slow, graph, fake_ef)
+    retrieval.search_kb("docker dns", repos=["homelab"], limit=3)
+
+    lines = Path(settings.slow_query_log).read_text().splitlines()
+    record = json.loads(lines[-1])
+    assert record["query"] == "docker dns"
+    assert record["repos"] == ["homelab"]
+    assert record["limit"] == 3
+    assert "query_ms" in record["timing"]
+
+
+def test_fast_query_not_logged(populated_kb, settings):
+    _, retrieval = populated_kb
+    retrieval.search_kb("docker dns")
+    assert not Path(settings.slow_query_log).exists()
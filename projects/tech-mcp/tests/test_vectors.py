@@ -0,0 +1,111 @@
+import json
+import random
+from dataclasses import replace
+
+import pytest
+from tech_mcp.ingestion import Ingestion
+from tech_mcp.migration import EmbeddingMigration
+from tech_mcp.retrieval import Retrieval
+from tech_mcp.vectors import StorageMode, cosine_distance, decode, encode
+
+from tests.conftest import FIXTURES_DIR, FakeEmbeddingFunction
+
+QUERIES = [
+    "passkey authentication flow",
+    "docker network configuration",
+    "debugging a timeout",
+]
+
+
+@pytest.mark.parametrize(
+    ("dtype", "tolerance"),
+    [("float32", 1e-7), ("float16", 1e-3), ("int8", 1e-2)],
+)
+def test_encode_round_trip(dtype, tolerance):
+    rng = random.Random(0)
+    vector = [rng.uniform(-1, 1) for _ in range(768)]
+    decoded = decode(encode(vector, dtype), dtype)
+    assert len(decoded) == 768
+    assert max(abs(a - b) for a, b in zip(vector, decoded, strict=True)) < tolerance
+    assert cosine_distance(vector, decoded) < tolerance
+
+
+def _ingest_fixtures(ingestion: Ingestion) -> None:
+    ingestion.ingest_file(str(FIXTURES_DIR / "auth-api" / "README.md"), "auth-api")
+    ingestion.ingest_file(str(FIXTURES_DIR / "auth-web" / "README.md"), "auth-web")
+    ingestion.ingest_file(str(FIXTURES_DIR / "python-mcp" / "server.py"), "home-mcp")
+
+
+@pytest.fixture()
+def reduced(settings, graph, fake_ef):
+    settings = replace(settings, embed_dimensions=64, rerank_dtype="int8")
+    ingestion = Ingestion(settings, graph, fake_ef)
+    _ingest_fixtures(ingestion)
+    return ingestion, Retrieval(settings, graph, fake_ef)
+
+
+def _search(retrieval: Retrieval, query: str) -> list[tuple[str, float]]:
+    results = json.loads(retrieval.search_kb(query, limit=3))["results"]
+    return [(r["id"], r["distance"]) for r in results]
+
+
+def test_reduced_index_matches_full_ranking(reduced, settings, graph, fake_ef):
+    ingestion, retrieval = reduced
+    stored = ingestion.collection.peek(limit=1)["embeddings"][0]
+    assert len(stored) == 64
+    assert StorageMode.from_collection(ingestion.collection).reranks
+
+    full_settings = replace(
+        settings, chroma_persist_dir=settings.chroma_persist_dir + "-full"
+    )
+    _ingest_fixtures(Ingestion(full_settings, graph, fake_ef))
+    full = Retrieval(full_settings, graph, fake_ef)
+
+    for query in QUERIES:
+        got, expected = _search(retrieval, query), _search(full, query)
+        assert [i for i, _ in got] == [i for i, _ in expected]
+        for (_, a), (_, b) in zip(got, expected, strict=True):
+            assert a == pytest.approx(b, abs=1e-2)
+
+
+def test_delete_removes_full_vectors(reduced):
+    ingestion, _ = reduced
+    ids = ingestion.collection.get(where={"repo": "auth-api"}, include=[])["ids"]
+    assert ingestion.rerank_store.get(ingestion.collection.name, ids)
+
+    ingestion.delete_by_repo("auth-api")
+
+    assert ingestion.rerank_store.get(ingestion.collection.name, ids) == {}
+
+
+def test_search_without_full_vectors_falls_back(reduced):
+    ingestion, retrieval = reduced
+    ingestion.rerank_store.drop(ingestion.collection.name)
+    results = _search(retrieval, QUERIES[0])
+    assert len(results) == 3
+
+
+def test_existing_collection_keeps_its_mode(reduced, settings, graph, fake_ef):
+    ingestion, _ = reduced
+    # Settings changed back to full vectors: the collection still holds 64
+    reopened = Ingestion(settings, graph, fake_ef)
+    assert StorageMode.from_collection(reopened.collection).dimensions == 64
+    reopened.ingest_file(str(FIXTURES_DIR / "auth-api" / "README.md"), "auth-api")
+    assert reopened.collection.count() == ingestion.collection.count()
+
+
+def test_migration_applies_new_storage_mode(populated_kb, settings, graph, fake_ef):
+    _, retrieval = populated_kb
+    settings = replace(settings, embed_dimensions=128, migration_rate=0)
+    migration = EmbeddingMigration(
+        settings,
+        Ingestion(settings, graph, fake_ef),
+        retrieval,
+        lambda _model: FakeEmbeddingFunction(),
+    )
+    migration.start(settings.ollama_embed_model)
+    migration._thread.join()
+
+    assert migration.status()["status"] == "switched"
+    assert len(retrieval.collection.peek(limit=1)["embeddings"][0]) == 128
+    assert _search(retrieval, QUERIES[0])
@@ -0,0 +1,45 @@
+"""Startup warmup of the collection, index and embedding model."""
+
+import pytest
+from tech_mcp.warmup import Warmup
+
+
+def test_retrieval_warm_up_loads_index(populated_kb):
+    _, retrieval = populated_kb
+    report = retrieval.warm_up()
+    assert report["chunks"] > 0
+    assert report["model_loaded"]
+    assert report["index_loaded"]
+
+
+def test_warm_up_empty_collection(retrieval):
+    report = retrieval.warm_up()
+    assert report == {"chunks": 0, "model_loaded": True, "index_loaded": False}
+
+
+def test_warmup_reports_ready():
+    w = Warmup(True, lambda: {"chunks": 3})
+    assert w.status()["status"] == "pending"
+    w.start()
+    w._thread.join(timeout=5)
+    status = w.status()
+    assert status["status"] == "ready"
+    assert status["chunks"] == 3
+
+
+def test_warmup_reports_failure():
+    def boom() -> dict:
+        raise RuntimeError("ollama down")
+
+    w = Warmup(True, boom)
+    w.start()
+    w._thread.join(timeout=5)
+    assert w.status()["status"] == "failed"
+    assert w.status()["error"] == "ollama down"
+
+
+def test_warmup_disabled_never_runs():
+    w = Warmup(False, lambda: pytest.fail("should not run"))
+    w.start()
+    assert w._thread is None
+    assert w.status() == {"status": "disabled"}
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from tech_mcp import watch
+from tech_mcp.watch import RepoWatcher
+
+DOC = "# Deploy\n\nRun the playbook against the {env} inventory.\n"
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _stored(ingestion, path):
+    got = ingestion.collection.get(where={"file_path": str(path)})
+    return got["documents"]
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    root = tmp_path / "homelab"
+    root.mkdir()
+    return root
+
+
+def test_events_are_filtered_and_coalesced(ingestion, repo):
+    watcher = RepoWatcher(ingestion, {"homelab": repo}, debounce_ms=60_000)
+    for _ in range(5):
+        watcher.notify(repo / "deploy.md")
+    watcher.notify(repo / "node_modules" / "x.md")
+    watcher.notify(repo / "image.png")
+    watcher.notify(repo.parent / "elsewhere.md")
+    assert watcher.pending() == 1
+
+
+def test_events_map_onto_ingested_path(ingestion, repo, monkeypatch):
+    monkeypatch.chdir(repo.parent)
+    watcher = RepoWatcher(ingestion, {"homelab": repo.relative_to(repo.parent)})
+    match = watcher._match(repo / "docs" / "deploy.md")
+    assert match is not None
+    assert str(match[1]) == "homelab/docs/deploy.md"
+
+
+def _sync_cycle(ingestion, repo, polling):
+    watcher = RepoWatcher(
+        ingestion,
+        {"homelab": repo},
+        debounce_ms=100,
+        rate=0,
+        polling=polling,
+        poll_seconds=0.05,
+    )
+    watcher.start()
+    try:
+        # Let the watch attach (or the first scan run) before writing
+        time.sleep(0.2)
+        path = repo / "deploy.md"
+        for env in ["staging", "canary", "production"]:
+            path.write_text(DOC.format(env=env))
+        assert _wait_for(lambda: watcher.status()["ingested"])
+        # The burst of writes was ingested once, at its final content
+        assert watcher.status()["ingested"] == 1
+        assert "production" in _stored(ingestion, path)[0]
+
+        path.unlink()
+        assert _wait_for(lambda: watcher.status()["deleted"])
+        assert not _stored(ingestion, path)
+    finally:
+        watcher.stop(timeout=5)
+
+
+def test_polling_keeps_kb_in_sync(ingestion, repo):
+    _sync_cycle(ingestion, repo, polling=True)
+
+
+@pytest.mark.skipif(watch.watchfiles is None, reason="watchfiles not installed")
+def test_inotify_keeps_kb_in_sync(ingestion, repo):
+    _sync_cycle(ingestion, repo, polling=False)
+
+
+def test_rate_limits_ingest(ingestion, repo):
+    watcher = RepoWatcher(ingestion, {"homelab": repo}, debounce_ms=0, rate=10)
+    for n in range(3):
+        (repo / f"{n}.md").write_text(DOC.format(env=n))
+        watcher.notify(repo / f"{n}.md")
+    start = time.monotonic()
+    watcher.start()
+    try:
+        assert _wait_for(lambda: watcher.status()["ingested"] == 3)
+        # One chunk per file at 10 chunks/s: the first two sleep 0.1s each
+        assert time.monotonic() - start >= 0.2
+    finally:
+        watcher.stop(timeout=5)